@@ -0,0 +1,74 @@
+# Precision of best-only vs. sequential best-worst estimation on simulated
+# MaxDiff data with known utilities.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_best_worst [n_respondents] [n_replicates]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import ChoiceData, fit_maxdiff_logit
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+
+
+# Best choices from k items and worst choices from the remaining k-1 items,
+# both drawn from a logit with the given utilities
+def simulate(
+    true_utilities: np.ndarray, n_respondents: int, rng: np.random.Generator
+) -> ChoiceData:
+    n_questions = n_respondents * N_QUESTIONS_PER_PARTICIPANT
+    items = np.argsort(rng.random((n_questions, len(true_utilities))), axis=1)
+    items = items[:, :N_ITEMS_PER_QUESTION]
+    utilities = true_utilities[items]
+    best = (utilities + rng.gumbel(size=items.shape)).argmax(axis=1)
+    negated = -utilities + rng.gumbel(size=items.shape)
+    negated[np.arange(n_questions), best] = -np.inf
+    return ChoiceData(
+        respondent=np.repeat(np.arange(n_respondents), N_QUESTIONS_PER_PARTICIPANT),
+        items=items,
+        best=best,
+        worst=negated.argmax(axis=1),
+    )
+
+
+def main(n_respondents: int, n_replicates: int):
+    rng = np.random.default_rng(0)
+    true_utilities = rng.normal(scale=1.0, size=N_ITEMS)
+    true_utilities -= true_utilities[0]
+
+    errors = {False: [], True: []}
+    standard_errors = {False: [], True: []}
+    timings = {False: 0.0, True: 0.0}
+    for _ in range(n_replicates):
+        choice_data = simulate(true_utilities, n_respondents, rng)
+        for best_worst in (False, True):
+            start = time.perf_counter()
+            result = fit_maxdiff_logit(choice_data, N_ITEMS, best_worst=best_worst)
+            timings[best_worst] += time.perf_counter() - start
+            errors[best_worst].append(result["params"] - true_utilities[1:])
+            standard_errors[best_worst].append(result["bse"])
+
+    print(
+        f"{N_ITEMS} items, {N_ITEMS_PER_QUESTION} per question, "
+        f"{N_QUESTIONS_PER_PARTICIPANT} questions, {n_respondents} respondents, "
+        f"{n_replicates} replicates"
+    )
+    print(f"{'model':>10} {'mean SE':>9} {'RMSE':>8} {'fit (ms)':>9}")
+    for best_worst, name in ((False, "best"), (True, "best-worst")):
+        mean_se = np.mean(standard_errors[best_worst])
+        rmse = np.sqrt(np.mean(np.square(errors[best_worst])))
+        fit_ms = 1000 * timings[best_worst] / n_replicates
+        print(f"{name:>10} {mean_se:>9.4f} {rmse:>8.4f} {fit_ms:>9.1f}")
+
+    # Variance scales with 1 / n, so the squared SE ratio is the factor by
+    # which best-only estimation needs more respondents for the same precision
+    ratio = np.mean(standard_errors[False]) / np.mean(standard_errors[True])
+    print(f"Equivalent sample size factor of best-worst: {ratio**2:.2f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [500, 100]))
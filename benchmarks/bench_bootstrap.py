@@ -0,0 +1,87 @@
+# Respondent-level bootstrap of the aggregate logit: weighted, warm-started
+# refits vs. refitting from scratch on the resampled rows.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_bootstrap [n_respondents] [n_bootstrap] [n_jobs]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import (
+    ChoiceData,
+    MaxDiffSurvey,
+    bootstrap_maxdiff_logit,
+    fit_maxdiff_logit,
+)
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+N_NAIVE_REPLICATES = 20
+
+
+# Resample respondents by concatenating their rows and fit from zero
+def naive_bootstrap(
+    choice_data: ChoiceData, n_bootstrap: int, rng: np.random.Generator
+) -> np.ndarray:
+    order = np.argsort(choice_data.respondent, kind="stable")
+    _, starts, counts = np.unique(
+        choice_data.respondent[order], return_index=True, return_counts=True
+    )
+    params = []
+    for _ in range(n_bootstrap):
+        drawn = rng.integers(0, len(starts), len(starts))
+        rows = order[
+            np.concatenate(
+                [np.arange(s, s + c) for s, c in zip(starts[drawn], counts[drawn])]
+            )
+        ]
+        resample = ChoiceData(*(field[rows] for field in choice_data))
+        params.append(fit_maxdiff_logit(resample, N_ITEMS, best_worst=True)["params"])
+    return np.array(params)
+
+
+def main(n_respondents: int, n_bootstrap: int, n_jobs: int):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_respondents,
+        n_design_versions=300,
+    )
+    survey.generate_random_responses(
+        true_utilities=np.linspace(-1, 1, N_ITEMS), heterogeneity=0.5, seed=0
+    )
+    choice_data = survey.get_choice_data()
+    full_sample = fit_maxdiff_logit(choice_data, N_ITEMS, best_worst=True)
+
+    start = time.perf_counter()
+    naive_bootstrap(choice_data, N_NAIVE_REPLICATES, np.random.default_rng(0))
+    naive = (time.perf_counter() - start) * n_bootstrap / N_NAIVE_REPLICATES
+
+    start = time.perf_counter()
+    draws = bootstrap_maxdiff_logit(
+        choice_data,
+        N_ITEMS,
+        best_worst=True,
+        n_bootstrap=n_bootstrap,
+        start_params=full_sample["params"],
+        n_jobs=n_jobs,
+    )
+    weighted = time.perf_counter() - start
+
+    print(
+        f"{n_respondents} respondents x {N_QUESTIONS_PER_PARTICIPANT} questions, "
+        f"{n_bootstrap} replicates, {n_jobs} job(s)"
+    )
+    print(f"naive refits (extrapolated):    {naive:8.1f} s")
+    print(f"weighted warm-started refits:   {weighted:8.1f} s")
+    print(
+        "mean bootstrap SE / model SE: "
+        f"{np.mean(draws.std(axis=0) / full_sample['bse']):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [5000, 1000, 1]))
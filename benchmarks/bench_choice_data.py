@@ -0,0 +1,74 @@
+# Benchmark: turning the responses of a survey into choice data. Compares
+# the original iterrows() loop over the wide response frame with
+# MaxDiffSurvey.get_choice_data.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_choice_data [n_respondents ...]
+import sys
+import time
+import pandas as pd
+
+from utils.MaxDiff import MaxDiffSurvey
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 15
+
+
+# Original implementation from run_multinomial_logit, kept for comparison
+def legacy_long_format(responses: pd.DataFrame) -> pd.DataFrame:
+    choices = []
+    for _, row in responses.iterrows():
+        items_in_question = row[:-2]
+        for item in items_in_question:
+            choice = (
+                1 if row["highest"] == item else (-1 if row["lowest"] == item else 0)
+            )
+            participant_id = row.name[0]
+            question_number = row.name[1]
+            question_id = "_".join([str(participant_id), str(question_number)])
+            choices.append(
+                {
+                    "participant_id": participant_id,
+                    "question_id": question_id,
+                    "item_id": item,
+                    "choice": choice,
+                }
+            )
+    return pd.DataFrame(choices)
+
+
+# Survey with every question answered at random
+def make_survey(n_respondents: int, seed: int = 0) -> MaxDiffSurvey:
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_respondents,
+        seed=seed,
+    )
+    survey.generate_random_responses(seed=seed)
+    return survey
+
+
+def main(sizes: list[int]):
+    print(f"{'respondents':>12} {'legacy (s)':>12} {'arrays (s)':>12} {'speedup':>9}")
+    for n in sizes:
+        survey = make_survey(n)
+        responses = survey.get_responses()
+
+        start = time.perf_counter()
+        legacy_long_format(responses)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        survey.get_choice_data()
+        vectorized = time.perf_counter() - start
+
+        print(
+            f"{n:>12} {legacy:>12.3f} {vectorized:>12.4f} {legacy / vectorized:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000])
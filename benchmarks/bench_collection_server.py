@@ -0,0 +1,111 @@
+# Load test of the collection server: concurrent respondents fetch their
+# question sets and submit one answer per request over keep-alive
+# connections. Reports submissions per second and checks that the store and
+# the in-memory survey hold every answer.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_collection_server [n_participants] [n_clients]
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from utils.CollectionServer import CollectionServer, ResponseStore
+from utils.MaxDiff import MaxDiffSurvey
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+
+
+async def request(reader, writer, method: str, path: str, payload=None) -> dict:
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    content_length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            content_length = int(value)
+    response = json.loads(await reader.readexactly(content_length))
+    if status != 200:
+        raise RuntimeError(f"{status}: {response}")
+    return response
+
+
+# One simulated respondent after another on a single connection, answering
+# every question with a random best and worst item
+async def client(port: int, participant_ids: list[int], seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    n_answers = 0
+    for participant_id in participant_ids:
+        survey = await request(
+            reader, writer, "GET", f"/participants/{participant_id}/questions"
+        )
+        for question in survey["questions"]:
+            lowest, highest = rng.choice(
+                [item["id"] for item in question["items"]], 2, replace=False
+            )
+            await request(
+                reader,
+                writer,
+                "POST",
+                "/responses",
+                {
+                    "participant_id": participant_id,
+                    "question_number": question["question_number"],
+                    "lowest": int(lowest),
+                    "highest": int(highest),
+                },
+            )
+            n_answers += 1
+    writer.close()
+    return n_answers
+
+
+async def main(n_participants: int, n_clients: int):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        n_design_versions=300,
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResponseStore(os.path.join(directory, "responses.db"))
+        server = CollectionServer(survey, store, port=0)
+        await server.start()
+
+        start = time.perf_counter()
+        participants = np.array_split(np.arange(1, n_participants + 1), n_clients)
+        n_answers = sum(
+            await asyncio.gather(
+                *(
+                    client(server.port, ids.tolist(), seed)
+                    for seed, ids in enumerate(participants)
+                )
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await server.stop()
+
+        stored, _ = store.read()
+        store.close()
+
+    print(f"{n_clients} concurrent clients, {n_answers} answers in {elapsed:.1f} s")
+    print(f"submissions per second: {n_answers / elapsed:,.0f}")
+    print(f"stored answers: {len(stored)}, survey: {survey.get_progress()}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args or [2000, 200])))
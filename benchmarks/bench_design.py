@@ -0,0 +1,140 @@
+# Benchmark: greedy balanced design engine vs. the original per-participant
+# generator, on a 60-item design with 5 items per question.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_design [n_participants] [n_legacy_participants]
+import sys
+import time
+import random
+import itertools
+import numpy as np
+
+from utils.MaxDiff import design_statistics, generate_designs
+
+N_ITEMS = 60
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS = 3 * N_ITEMS // N_ITEMS_PER_QUESTION
+
+
+# Original MaxDiffSurvey._generate_sets_for_participant, kept for comparison
+def legacy_sets_for_participant(
+    participant_id: int, n_items: int, k: int, n_questions: int, seed: int
+) -> list[list[int]]:
+    items_dict = {i + 1: i for i in range(n_items)}
+    random.seed(seed + participant_id)
+    sets = []
+    item_counts = {item: 0 for item in items_dict.keys()}
+
+    # Define a target number of appearances for each item
+    target_appearances = n_questions * k // n_items
+
+    # Generate each question set
+    for _ in range(n_questions):
+
+        # Available items are those that haven't reached the target number of appearances yet
+        available_items = [
+            item for item in items_dict.keys() if item_counts[item] < target_appearances
+        ]
+
+        # If there are not enough available items to fill the question, add from remaining items
+        if len(available_items) < k:
+            remaining_items = [
+                item for item in items_dict.keys() if item not in available_items
+            ]
+            # Choose least used remaining items first
+            additional_items = sorted(remaining_items, key=lambda x: item_counts[x])
+            available_items.extend(additional_items[: k - len(available_items)])
+
+        # Sample the available items to fill the question
+        set_items = random.sample(available_items, k)
+
+        # Add the set to the list of sets
+        sets.append(set_items)
+
+        # Update the item counts
+        for item in set_items:
+            item_counts[item] += 1
+
+    # Ensure all items appear at least once
+    unused_items = [item for item, count in item_counts.items() if count == 0]
+    for item in unused_items:
+        least_used_set = min(sets, key=lambda s: sum(item_counts[i] for i in s))
+        replace_index = random.randint(0, k - 1)
+        least_used_set[replace_index] = item
+        item_counts[item] += 1
+        item_counts[least_used_set[replace_index]] -= 1
+
+    # Ensure each pair of items appears together at least once
+    item_pairs = set(itertools.combinations(items_dict.keys(), 2))
+    for i, set_items in enumerate(sets):
+        for pair in itertools.combinations(set_items, 2):
+            if pair in item_pairs:
+                item_pairs.remove(pair)
+            elif (pair[1], pair[0]) in item_pairs:
+                item_pairs.remove((pair[1], pair[0]))
+
+    # If there are still pairs that haven't appeared together, modify sets to include them
+    for pair in item_pairs:
+        for i, set_items in enumerate(sets):
+            if pair[0] in set_items or pair[1] in set_items:
+                if pair[0] not in set_items:
+                    replace_index = random.randint(0, k - 1)
+                    sets[i][replace_index] = pair[0]
+                elif pair[1] not in set_items:
+                    replace_index = random.randint(0, k - 1)
+                    sets[i][replace_index] = pair[1]
+                break
+        else:
+            # If there is no set with either item, replace two items in a random set
+            random_set = random.choice(sets)
+            replace_indices = random.sample(range(k), 2)
+            random_set[replace_indices[0]] = pair[0]
+            random_set[replace_indices[1]] = pair[1]
+
+    return sets
+
+
+def print_statistics(statistics: dict):
+    for name, value in statistics.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{key} {v:.4g}" for key, v in value.items())
+        else:
+            value = f"{value:.4f}"
+        print(f"  {name}: {value}")
+
+
+def main(n_participants: int, n_legacy_participants: int):
+    participant_ids = np.arange(1, n_participants + 1)
+
+    start = time.perf_counter()
+    designs = generate_designs(
+        participant_ids, N_ITEMS, N_ITEMS_PER_QUESTION, N_QUESTIONS, seed=42
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"generate_designs: {n_participants} participants x {N_QUESTIONS} "
+        f"questions in {elapsed:.2f}s"
+    )
+    print_statistics(design_statistics(designs, N_ITEMS))
+
+    start = time.perf_counter()
+    legacy = np.array(
+        [
+            legacy_sets_for_participant(
+                int(pid), N_ITEMS, N_ITEMS_PER_QUESTION, N_QUESTIONS, seed=42
+            )
+            for pid in participant_ids[:n_legacy_participants]
+        ]
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"legacy generator: {n_legacy_participants} participants in {elapsed:.2f}s "
+        f"(~{elapsed * n_participants / n_legacy_participants:.0f}s for "
+        f"{n_participants})"
+    )
+    print_statistics(design_statistics(legacy, N_ITEMS))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [10_000, 1_000][len(args) :]))
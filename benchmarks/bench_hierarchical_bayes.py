@@ -0,0 +1,75 @@
+# Hierarchical Bayes on simulated heterogeneous MaxDiff data: run time,
+# recovery of population and individual utilities, convergence diagnostics.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_hierarchical_bayes \
+#       [n_respondents] [n_items] [n_iterations] [n_chains]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import ChoiceData, fit_hierarchical_bayes
+
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 15
+HETEROGENEITY = 0.8
+
+
+def simulate(n_respondents: int, n_items: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    mu = np.linspace(-1.5, 1.5, n_items)
+    mu -= mu[0]
+    beta = mu + rng.normal(scale=HETEROGENEITY, size=(n_respondents, n_items))
+    beta[:, 0] = 0
+
+    n_questions = n_respondents * N_QUESTIONS_PER_PARTICIPANT
+    respondent = np.repeat(np.arange(n_respondents), N_QUESTIONS_PER_PARTICIPANT)
+    items = np.argsort(rng.random((n_questions, n_items)), axis=1)
+    items = items[:, :N_ITEMS_PER_QUESTION]
+    utilities = beta[respondent[:, None], items]
+    best = (utilities + rng.gumbel(size=items.shape)).argmax(axis=1)
+    negated = -utilities + rng.gumbel(size=items.shape)
+    negated[np.arange(n_questions), best] = -np.inf
+    choice_data = ChoiceData(respondent + 1, items, best, negated.argmax(axis=1))
+    return choice_data, mu, beta
+
+
+def main(n_respondents: int, n_items: int, n_iterations: int, n_chains: int):
+    choice_data, mu, beta = simulate(n_respondents, n_items)
+
+    start = time.perf_counter()
+    result = fit_hierarchical_bayes(
+        choice_data,
+        n_items,
+        best_worst=True,
+        n_iterations=n_iterations,
+        n_burn=n_iterations // 2,
+        n_chains=n_chains,
+        n_jobs=n_chains,
+    )
+    elapsed = time.perf_counter() - start
+    diagnostics = result["diagnostics"]
+
+    print(
+        f"{n_respondents} respondents, {n_items} items, "
+        f"{n_iterations} iterations x {n_chains} chains: {elapsed:.1f}s "
+        f"({1000 * elapsed / n_iterations:.1f} ms per iteration)"
+    )
+    print(f"max |mu error|: {np.max(np.abs(result['mu_mean'] - mu[1:])):.3f}")
+    print(
+        "mean population variance: "
+        f"{np.diag(result['sigma_mean']).mean():.3f} "
+        f"(true {HETEROGENEITY**2:.3f})"
+    )
+    print(
+        "correlation of individual utilities with truth: "
+        f"{np.corrcoef(result['beta_mean'].ravel(), beta[:, 1:].ravel())[0, 1]:.3f}"
+    )
+    print(f"max R-hat (mu): {diagnostics['rhat_mu'].max():.3f}")
+    print(f"R-hat (log-likelihood): {diagnostics['rhat_loglike']:.3f}")
+    print(f"acceptance rate: {np.round(diagnostics['acceptance_rate'], 3)}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [1_000, 20, 4_000, 2][len(args) :]))
@@ -0,0 +1,72 @@
+# Latent class MNL on simulated data with known classes: run time, recovery
+# of class sizes and utilities, and BIC across numbers of classes.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_latent_class [n_respondents] [n_starts] [n_jobs]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import ChoiceData, fit_latent_class_logit, simulate_best_worst
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+TRUE_CLASS_SIZES = np.array([0.5, 0.3, 0.2])
+
+
+def simulate(n_respondents: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    utilities = np.stack(
+        [
+            np.linspace(-1.5, 1.5, N_ITEMS),
+            np.linspace(1.0, -1.0, N_ITEMS),
+            np.sin(np.arange(N_ITEMS)),
+        ]
+    )
+    utilities -= utilities[:, :1]
+    classes = rng.choice(len(TRUE_CLASS_SIZES), n_respondents, p=TRUE_CLASS_SIZES)
+
+    question_items = np.argsort(
+        rng.random((n_respondents, N_QUESTIONS_PER_PARTICIPANT, N_ITEMS)), axis=2
+    )[:, :, :N_ITEMS_PER_QUESTION] + 1
+    lowest, highest = simulate_best_worst(question_items, utilities[classes], rng)
+
+    items = question_items.reshape(-1, N_ITEMS_PER_QUESTION)
+    respondent = np.arange(1, n_respondents + 1)
+    choice_data = ChoiceData(
+        respondent=np.repeat(respondent, N_QUESTIONS_PER_PARTICIPANT),
+        items=items - 1,
+        best=(items == highest.reshape(-1, 1)).argmax(axis=1),
+        worst=(items == lowest.reshape(-1, 1)).argmax(axis=1),
+    )
+    return choice_data, utilities
+
+
+def main(n_respondents: int, n_starts: int, n_jobs: int):
+    choice_data, utilities = simulate(n_respondents)
+
+    for n_classes in (1, 2, 3, 4):
+        start = time.perf_counter()
+        result = fit_latent_class_logit(
+            choice_data,
+            N_ITEMS,
+            n_classes,
+            best_worst=True,
+            n_starts=n_starts,
+            n_jobs=n_jobs,
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"{n_classes} classes: {elapsed:6.1f}s, {result['n_iterations']:3d} "
+            f"iterations, llf={result['llf']:.1f}, BIC={result['bic']:.1f}"
+        )
+        if n_classes == len(TRUE_CLASS_SIZES):
+            estimated = np.column_stack([np.zeros(n_classes), result["params"]])
+            print(f"  class sizes: {np.round(result['class_sizes'], 3)}")
+            print(f"  max |utility error|: {np.abs(estimated - utilities).max():.3f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [20000, 3, 1]))
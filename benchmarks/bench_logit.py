@@ -0,0 +1,79 @@
+# Benchmark: batched MaxDiff logit engine vs. statsmodels ConditionalLogit.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_logit [n_items] [n_questions]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import ChoiceData, _logit_derivatives, fit_maxdiff_logit
+
+N_ITEMS_PER_QUESTION = 5
+
+
+# Random choice sets with best choices drawn from a logit with known utilities
+def make_choice_data(n_items: int, n_questions: int, seed: int = 0) -> ChoiceData:
+    rng = np.random.default_rng(seed)
+    items = np.argsort(rng.random((n_questions, n_items)), axis=1)
+    items = items[:, :N_ITEMS_PER_QUESTION]
+    true_utilities = np.linspace(-1.5, 1.5, n_items)
+    noisy = true_utilities[items] + rng.gumbel(size=items.shape)
+    return ChoiceData(
+        respondent=np.arange(n_questions),
+        items=items,
+        best=noisy.argmax(axis=1),
+        worst=np.full(n_questions, -1),
+    )
+
+
+# statsmodels model on the same data, for checking the batched derivatives.
+# One row per item shown, grouped by question, with the best item chosen.
+def statsmodels_model(choice_data: ChoiceData, n_items: int):
+    from statsmodels.discrete.conditional_models import ConditionalLogit
+
+    n_questions, k = choice_data.items.shape
+    group = np.repeat(np.arange(n_questions), k)
+    chosen = np.zeros((n_questions, k), dtype=bool)
+    chosen[np.arange(n_questions), choice_data.best] = True
+    X = np.eye(n_items)[choice_data.items.ravel()][:, 1:]
+    return ConditionalLogit(endog=chosen.ravel(), exog=X, groups=group)
+
+
+def main(n_items: int, n_questions: int):
+    choice_data = make_choice_data(n_items, n_questions)
+
+    start = time.perf_counter()
+    result = fit_maxdiff_logit(choice_data, n_items)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{n_items} items, {n_questions} questions: {elapsed:.3f}s "
+        f"({result['n_iterations']} iterations, llf={result['llf']:.3f})"
+    )
+
+    try:
+        import statsmodels  # noqa: F401
+    except ImportError:
+        print("statsmodels not installed, skipping comparison")
+        return
+
+    # Compare on a subsample, statsmodels is too slow on the full data
+    subsample = ChoiceData(*(array[:5_000] for array in choice_data))
+    params = fit_maxdiff_logit(subsample, n_items)["params"]
+    loglike, gradient, hessian = _logit_derivatives(
+        params, subsample.items, subsample.best, n_items
+    )
+    model = statsmodels_model(subsample, n_items)
+    print("statsmodels comparison on 5,000 questions at the fitted params:")
+    print(f"  |loglike difference|: {abs(loglike - model.loglike(params)):.2e}")
+    print(
+        f"  max |score difference|: {np.max(np.abs(gradient - model.score(params))):.2e}"
+    )
+    print(
+        "  max |hessian difference|: "
+        f"{np.max(np.abs(hessian - model.hessian(params))):.2e}"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [100, 50_000]))
@@ -0,0 +1,65 @@
+# Incremental logit updates while responses stream in vs. refitting on all
+# answered questions after every batch.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_online [n_participants] [batch_size] [n_batches]
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import MaxDiffSurvey, fit_maxdiff_logit
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+
+
+def make_survey(n_participants: int) -> MaxDiffSurvey:
+    return MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        n_design_versions=300,
+    )
+
+
+def main(n_participants: int, batch_size: int, n_batches: int):
+    source = make_survey(n_participants)
+    source.generate_random_responses(
+        true_utilities=np.linspace(-1, 1, N_ITEMS), heterogeneity=0.5, seed=0
+    )
+    responses = source.get_responses()[["lowest", "highest"]].reset_index()
+    responses = responses.sample(frac=1.0, random_state=0)
+
+    # Start with all but the streamed batches answered
+    survey = make_survey(n_participants)
+    n_initial = len(responses) - batch_size * n_batches
+    survey.add_responses(responses.iloc[:n_initial])
+    start = time.perf_counter()
+    survey.update_multinomial_logit(best_worst=True)
+    full_fit = time.perf_counter() - start
+
+    update_times = []
+    for batch in range(n_batches):
+        offset = n_initial + batch * batch_size
+        survey.add_responses(responses.iloc[offset : offset + batch_size])
+        start = time.perf_counter()
+        survey.update_multinomial_logit(best_worst=True)
+        update_times.append(time.perf_counter() - start)
+
+    result = survey._multinomial_logit_model["result"]
+    exact = fit_maxdiff_logit(survey.get_choice_data(), N_ITEMS, best_worst=True)
+
+    print(f"{n_initial} answered questions, then {n_batches} batches of {batch_size}")
+    print(f"full fit:                   {1000 * full_fit:9.1f} ms")
+    print(f"incremental update (mean):  {1000 * np.mean(update_times):9.1f} ms")
+    print(
+        "max |utility difference| to a full refit: "
+        f"{np.abs(result['params'] - exact['params']).max():.2e}"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [50000, 1000, 20]))
@@ -0,0 +1,82 @@
+# Durable response collection: cost of logging single answers, and recovery
+# of a survey from its snapshot plus a write-ahead log of n_answers answers.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_response_log [n_participants] [n_answers]
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from utils.MaxDiff import MaxDiffSurvey
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 10
+N_SINGLE_ANSWERS = 20000
+
+
+def make_survey(n_participants: int) -> MaxDiffSurvey:
+    return MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        n_design_versions=300,
+    )
+
+
+def add_single_answers(survey: MaxDiffSurvey, answers) -> float:
+    start = time.perf_counter()
+    for participant_id, question_number, lowest, highest in answers:
+        survey.add_response(participant_id, question_number, (lowest, highest))
+    return (time.perf_counter() - start) / len(answers)
+
+
+def main(n_participants: int, n_answers: int):
+    source = make_survey(n_participants)
+    source.generate_random_responses(seed=0)
+    responses = source.get_responses()[["lowest", "highest"]].reset_index()
+    answers = responses.sample(n=n_answers, replace=True, random_state=0)
+    single = answers.iloc[:N_SINGLE_ANSWERS].to_numpy().tolist()
+
+    with tempfile.TemporaryDirectory() as path:
+        plain = add_single_answers(make_survey(n_participants), single)
+
+        survey = make_survey(n_participants)
+        survey.start_response_log(path, compact_bytes=1 << 40)
+        logged = add_single_answers(survey, single)
+        # The rest arrives in batches of 1000, as from the collection server
+        for offset in range(N_SINGLE_ANSWERS, n_answers, 1000):
+            survey.add_responses(answers.iloc[offset : offset + 1000])
+        expected = survey.get_responses()
+        survey.stop_response_log()
+        log_size = sum(
+            os.path.getsize(os.path.join(path, name))
+            for name in os.listdir(path)
+            if name.endswith(".log")
+        )
+
+        start = time.perf_counter()
+        recovered = MaxDiffSurvey.load(path)
+        recovery = time.perf_counter() - start
+        assert recovered.get_responses().equals(expected)
+
+        start = time.perf_counter()
+        recovered.start_response_log(path)
+        recovered.compact_response_log(wait=True)
+        compaction = time.perf_counter() - start
+        recovered.stop_response_log()
+
+    print(f"{n_participants} participants, {n_answers} logged answers")
+    print(f"add_response:               {1e6 * plain:9.1f} us")
+    print(f"add_response with log:      {1e6 * logged:9.1f} us")
+    print(f"log size:                   {log_size / 1e6:9.1f} MB")
+    print(f"recovery (load + replay):   {1000 * recovery:9.1f} ms")
+    print(f"restart log and compact:    {1000 * compaction:9.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [100000, 1000000]))
@@ -0,0 +1,72 @@
+# Segment-level logits: one batched fit over all segments vs. a separate
+# fit_maxdiff_logit per segment.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_segmented [n_participants] [n_segments] [n_jobs]
+import os
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import (
+    ChoiceData,
+    MaxDiffSurvey,
+    fit_maxdiff_logit,
+    fit_segmented_logit,
+)
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+
+
+def main(n_participants: int, n_segments: int, n_jobs: int):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        n_design_versions=300,
+    )
+    survey.generate_random_responses(
+        true_utilities=np.linspace(-1, 1, N_ITEMS), heterogeneity=0.5, seed=0
+    )
+    choice_data = survey.get_choice_data()
+    segment = np.random.default_rng(0).integers(0, n_segments, n_participants)[
+        choice_data.respondent - 1
+    ]
+
+    start = time.perf_counter()
+    separate = []
+    for s in range(n_segments):
+        rows = segment == s
+        separate.append(
+            fit_maxdiff_logit(
+                ChoiceData(*(field[rows] for field in choice_data)),
+                N_ITEMS,
+                best_worst=True,
+            )["params"]
+        )
+    separate_time = time.perf_counter() - start
+
+    timings = {}
+    for jobs in sorted({1, n_jobs}):
+        start = time.perf_counter()
+        result = fit_segmented_logit(
+            choice_data, segment, n_segments, N_ITEMS, best_worst=True, n_jobs=jobs
+        )
+        timings[jobs] = time.perf_counter() - start
+
+    print(f"{choice_data.n_questions} questions in {n_segments} segments")
+    print(f"separate fits:            {separate_time:7.2f} s")
+    for jobs, seconds in timings.items():
+        print(f"batched fit ({jobs:2d} jobs):   {seconds:7.2f} s")
+    print(
+        "max |utility difference|: "
+        f"{np.abs(result['params'] - np.array(separate)).max():.2e}"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [20000, 200, os.cpu_count() or 1]))
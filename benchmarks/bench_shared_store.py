@@ -0,0 +1,65 @@
+# Several viewers of the same study at once, each with its own survey
+# object (as in separate app sessions), with and without a SharedStore:
+# building the surveys and fitting the logit from their threads.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_shared_store [n_participants] [n_viewers]
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from utils.MaxDiff import MaxDiffSurvey
+from utils.SharedStore import SharedStore
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+
+
+def view(n_participants: int, responses, shared_store: SharedStore | None):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        shared_store=shared_store,
+    )
+    survey.add_responses(responses)
+    survey.update_multinomial_logit(best_worst=True)
+    return survey._multinomial_logit_model["item_utilities"]
+
+
+def main(n_participants: int, n_viewers: int):
+    source = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+    )
+    source.generate_random_responses(
+        true_utilities=np.linspace(-1, 1, N_ITEMS), heterogeneity=0.5, seed=0
+    )
+    responses = source.get_responses()[["lowest", "highest"]].reset_index()
+
+    print(f"{n_viewers} viewers of a study with {n_participants} participants")
+    for shared_store in (None, SharedStore()):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_viewers) as executor:
+            utilities = list(
+                executor.map(
+                    lambda _: view(n_participants, responses, shared_store),
+                    range(n_viewers),
+                )
+            )
+        elapsed = time.perf_counter() - start
+        assert all(np.allclose(u, utilities[0]) for u in utilities)
+        label = "separate" if shared_store is None else "shared store"
+        print(f"{label:14s} {elapsed:8.2f} s")
+        if shared_store is not None:
+            print(shared_store.stats())
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [20000, 10]))
@@ -0,0 +1,74 @@
+# Speed of the vectorized response simulator vs. the previous per-question
+# loop, and recovery of the true utilities from the simulated responses.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_simulation [n_participants]
+import random
+import sys
+import time
+import numpy as np
+
+from utils.MaxDiff import MaxDiffSurvey
+
+N_ITEMS = 20
+N_ITEMS_PER_QUESTION = 5
+N_QUESTIONS_PER_PARTICIPANT = 12
+N_DESIGN_VERSIONS = 300
+
+
+# The previous generate_random_responses: one uniformly random pair per
+# unanswered question, written through add_response
+def legacy_random_responses(survey: MaxDiffSurvey):
+    for participant_id in survey._participant_ids:
+        for question_number in range(1, survey.n_questions_per_participant + 1):
+            if None in survey.get_response(participant_id, question_number):
+                response = random.sample(
+                    sorted(survey._question_sets[participant_id][question_number - 1]),
+                    2,
+                )
+                survey.add_response(participant_id, question_number, response)
+
+
+def make_survey(n_participants: int) -> MaxDiffSurvey:
+    return MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        N_ITEMS_PER_QUESTION,
+        N_QUESTIONS_PER_PARTICIPANT,
+        n_participants,
+        n_design_versions=N_DESIGN_VERSIONS,
+    )
+
+
+def main(n_participants: int):
+    legacy_participants = min(n_participants, 5000)
+    survey = make_survey(legacy_participants)
+    start = time.perf_counter()
+    legacy_random_responses(survey)
+    legacy = (time.perf_counter() - start) * n_participants / legacy_participants
+
+    rng = np.random.default_rng(0)
+    true_utilities = rng.normal(size=N_ITEMS)
+    true_utilities -= true_utilities[0]
+    survey = make_survey(n_participants)
+    start = time.perf_counter()
+    survey.generate_random_responses(
+        true_utilities=true_utilities, heterogeneity=0.5, random_share=0.1, seed=1
+    )
+    vectorized = time.perf_counter() - start
+
+    print(
+        f"{n_participants} participants x {N_QUESTIONS_PER_PARTICIPANT} questions, "
+        f"{N_ITEMS_PER_QUESTION} of {N_ITEMS} items per question"
+    )
+    print(f"legacy loop (extrapolated from {legacy_participants}): {legacy:8.2f} s")
+    print(f"vectorized simulator:                   {vectorized:8.2f} s")
+
+    survey.run_multinomial_logit(best_worst=True)
+    estimated = survey._multinomial_logit_model["item_utilities"].to_numpy()
+    correlation = np.corrcoef(estimated, true_utilities)[0, 1]
+    print(f"correlation of estimated and true utilities: {correlation:.4f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args or [100000]))
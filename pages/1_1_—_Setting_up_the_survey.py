@@ -1,6 +1,8 @@
 import streamlit as st
-from utils.MaxDiff import MaxDiffSurvey
+from utils.MaxDiff import MaxDiffSurvey, plan_sample_size
+from utils.SharedResources import get_shared_store
 import math
+import os
 
 st.set_page_config(
     page_title="MaxDiff Tutorial | Setting up the Survey",
@@ -44,6 +46,21 @@ def load_demo_items():
         return f.read().splitlines()
 
 
+# The Analyze page fits the model on the most preferred choices only, so
+# the simulated surveys are analyzed the same way
+@st.cache_data
+def load_sample_size_plan(n_items, n_items_per_question, n_questions_per_participant):
+    return plan_sample_size(
+        n_items,
+        n_items_per_question,
+        n_questions_per_participant,
+        sample_sizes=[50, 100, 200, 500, 1000],
+        n_replicates=200,
+        best_worst=False,
+        n_jobs=os.cpu_count() or 1,
+    )
+
+
 if st.session_state.wizard_step > 0 and st.session_state.wizard_step <= 7:
     st.markdown(f"**:grey[Step {st.session_state.wizard_step} of 7]**")
 
@@ -69,6 +86,7 @@ if st.session_state.wizard_step == 0 and st.session_state.survey is None:
             question_text="Which of these features are most and least important for you in our hiking app?",
             low_response_option="Least important",
             high_response_option="Most important",
+            shared_store=get_shared_store(),
         )
         st.session_state.wizard_step = 100
         st.rerun()
@@ -286,6 +304,41 @@ if st.session_state.wizard_step == 6:
         min_value=1,
         max_value=10000,
     )
+    with st.expander("How many participants do I need?"):
+        st.write(
+            f"The more participants, the more precise the results. To get a sense of how many you need, we can simulate 200 surveys with {st.session_state.n_items_total} items, {st.session_state.n_items_per_question} items per question and {st.session_state.n_questions_per_participant} questions per participant for different numbers of participants, and check how well the analysis recovers the true ranking of the items."
+        )
+        if st.button("Run simulation", type="secondary"):
+            with st.spinner("Simulating surveys..."):
+                sample_size_plan = load_sample_size_plan(
+                    st.session_state.n_items_total,
+                    st.session_state.n_items_per_question,
+                    st.session_state.n_questions_per_participant,
+                )
+            sample_size_plan = sample_size_plan.assign(
+                pair_order_recovery=100 * sample_size_plan["pair_order_recovery"],
+                top_item_recovery=100 * sample_size_plan["top_item_recovery"],
+            )
+            st.dataframe(
+                sample_size_plan.rename(
+                    columns={
+                        "mean_se": "Average standard error",
+                        "max_se": "Largest standard error",
+                        "rmse": "Estimation error (RMSE)",
+                        "pair_order_recovery": "Item pairs ranked correctly",
+                        "top_item_recovery": "Top item found",
+                    }
+                ).rename_axis("Participants"),
+                column_config={
+                    "Item pairs ranked correctly": st.column_config.NumberColumn(
+                        format="%.1f%%"
+                    ),
+                    "Top item found": st.column_config.NumberColumn(format="%.1f%%"),
+                },
+            )
+            st.caption(
+                "The simulated item utilities are evenly spread between -1 and 1, and, as in the analysis in step 3, only the most preferred choices are used. Percentages are shares of item pairs and of simulated surveys."
+            )
 
     if st.session_state.input_error:
         st.error(st.session_state.input_error)
@@ -338,6 +391,7 @@ if st.session_state.wizard_step == 7:
                 high_response_option=st.session_state.question_phrasing[
                     "high_response_option"
                 ],
+                shared_store=get_shared_store(),
             )
             st.session_state.wizard_step = 100
             st.session_state.input_error = None
@@ -407,12 +461,12 @@ if st.session_state.wizard_step == 100 or st.session_state.survey is not None:
 
     st.subheader("How is the survey generated?")
     st.write(
-        f"Each respondent will receive a different set of {st.session_state.survey.n_questions_per_participant} questions, in which they are asked to pick their most and least preferred option. Each question contains {st.session_state.survey.n_items_per_question} randomly selected items from the list of {len(st.session_state.survey.items)} items. In the randomization process, it's ensured that each possible pair of items appears in at least one question for each respondent."
+        f"Each respondent will receive a different set of {st.session_state.survey.n_questions_per_participant} questions, in which they are asked to pick their most and least preferred option. Each question contains {st.session_state.survey.n_items_per_question} randomly selected items from the list of {len(st.session_state.survey.items)} items. In the randomization process, it's ensured that each item appears about equally often for each respondent, and that pairs of items are repeated as rarely as possible."
     )
     st.write(
         f"The dataset was already initialized (without responses), so you can get a sense of the randomization below. The columns `item1`, `item2`, etc. determine the items shown to a respondent in a given question. In your case, there are {st.session_state.survey.n_items_per_question} of these `item` columns, because there are {st.session_state.survey.n_items_per_question} items per question. The respondent's choices will be captured in the columns `lowest` and `highest`."
     )
-    st.write(st.session_state.survey._responses)
+    st.write(st.session_state.survey.get_responses())
 
     st.write(
         "Head over to the next section to see what the survey looks like for respondents."
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import random
 from utils.MaxDiff import MaxDiffSurvey
+from utils.CollectionServer import ResponseStore
 
 st.set_page_config(
     page_title="MaxDiff Tutorial | Collecting responses",
@@ -18,6 +19,10 @@ if "current_question" not in st.session_state:
     st.session_state.current_question = 1
 if "randomly_generated" not in st.session_state:
     st.session_state.randomly_generated = False
+if "response_error" not in st.session_state:
+    st.session_state.response_error = None
+if "store_positions" not in st.session_state:
+    st.session_state.store_positions = {}  # last synced row per response database
 
 st.title("Collecting responses")
 
@@ -30,6 +35,7 @@ if st.session_state.survey is None:
     )
 
 if st.session_state.survey is not None:
+    progress = st.session_state.survey.get_progress()
 
     st.write(
         "Your survey is ready to collect responses. You can answer a few questions yourself, and then generate random responses to speed things up. Since this is a tutorial and not an actual survey tool (quite yet), you can't send a survey link to respondents at this point."
@@ -39,7 +45,7 @@ if st.session_state.survey is not None:
         f"""
         **Your survey: {st.session_state.survey.survey_name}**  
         Planned respondents: {st.session_state.survey.n_participants}  
-        Completed responses: {st.session_state.survey._responses['highest'].notna().sum() // st.session_state.survey.n_questions_per_participant}
+        Completed responses: {progress["n_completed_participants"]}
         """,
         icon=":material/assignment:",
     )
@@ -65,7 +71,17 @@ if st.session_state.survey is not None:
         st.session_state.previous_participant = st.session_state.current_participant
         st.rerun()
 
-    question_items = st.session_state.survey._question_sets[participant][question - 1]
+    question_items = st.session_state.survey._question_sets.question(
+        participant, question
+    ).tolist()
+    lowest, highest = st.session_state.survey.get_response(participant, question)
+
+    def record_choice(response):
+        try:
+            st.session_state.survey.add_response(participant, question, response)
+            st.session_state.response_error = None
+        except ValueError:
+            st.session_state.response_error = f'You can\'t choose the same item as "{st.session_state.survey.high_response_option.lower()}" and "{st.session_state.survey.low_response_option.lower()}"!'
 
     with st.container(border=True):
         st.caption(
@@ -84,65 +100,34 @@ if st.session_state.survey is not None:
                 st.markdown(f"{st.session_state.survey._items_dict[item]}")
 
             with col2:
-                btn_selected = (
-                    st.session_state.survey._responses.loc[
-                        (participant, question), f"item_{i+1}"
-                    ]
-                    == st.session_state.survey._responses.loc[
-                        (participant, question), "lowest"
-                    ]
-                )
+                btn_selected = item == lowest
                 if st.button(
                     f"{st.session_state.survey.low_response_option}",
                     key=f"low_{i}",
                     type=f"{'primary' if btn_selected else 'secondary'}",
                 ):
-                    st.session_state.survey._responses.loc[
-                        (participant, question), "lowest"
-                    ] = item
+                    record_choice((item, None))
                     st.rerun()
 
             with col3:
-                btn_selected = (
-                    st.session_state.survey._responses.loc[
-                        (participant, question), f"item_{i+1}"
-                    ]
-                    == st.session_state.survey._responses.loc[
-                        (participant, question), "highest"
-                    ]
-                )
+                btn_selected = item == highest
                 if st.button(
                     f"{st.session_state.survey.high_response_option}",
                     key=f"high_{i}",
                     type=f"{'primary' if btn_selected else 'secondary'}",
                 ):
-                    st.session_state.survey._responses.loc[
-                        (participant, question), "highest"
-                    ] = item
+                    record_choice((None, item))
                     st.rerun()
 
-        participant_completed_all_questions = (
-            st.session_state.survey._responses.loc[participant, ["lowest", "highest"]]
-            .notnull()
-            .all()
-            .all()
-        )
-        if participant_completed_all_questions:
+        if st.session_state.survey.is_participant_complete(participant):
             st.success(
                 "All questions are answered for this participant.",
                 icon=":material/check_circle:",
             )
 
-        if (
-            st.session_state.survey._responses.loc[(participant, question), "highest"]
-            == st.session_state.survey._responses.loc[(participant, question), "lowest"]
-            and st.session_state.survey._responses.loc[
-                (participant, question), "highest"
-            ]
-            is not None
-        ):
+        if st.session_state.response_error:
             st.error(
-                f'You can\'t choose the same item as "{st.session_state.survey.high_response_option.lower()}" and "{st.session_state.survey.low_response_option.lower()}"!',
+                st.session_state.response_error,
                 icon=":material/error:",
             )
         col4, col5, col6 = st.columns([1, 1, 1])
@@ -167,6 +152,39 @@ if st.session_state.survey is not None:
                 st.session_state.current_question += 1
                 st.rerun()
 
+    st.subheader("Collect responses online")
+    st.write(
+        "To field the survey to many respondents at once, save it and start the collection server below. Respondents' answers are stored in a response database, which you can sync into this survey at any time."
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        survey_dir = st.text_input("Survey directory", value="survey")
+    with col2:
+        store_path = st.text_input("Response database", value="responses.db")
+    st.code(
+        f"python -m utils.CollectionServer {survey_dir} {store_path}", language="bash"
+    )
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        if st.button("Save survey", type="secondary", icon=":material/save:"):
+            st.session_state.survey.save(survey_dir)
+            st.toast(f"Saved the survey to {survey_dir}")
+    with col2:
+        if st.button("Sync responses", type="secondary", icon=":material/sync:"):
+            store = ResponseStore(store_path)
+            try:
+                st.session_state.store_positions[store_path] = store.sync(
+                    st.session_state.survey,
+                    st.session_state.store_positions.get(store_path, 0),
+                )
+            except ValueError as error:
+                st.error(f"The responses do not match this survey: {error}")
+            else:
+                st.rerun()
+            finally:
+                store.close()
+
     st.subheader("Generate random responses")
 
     st.write("Speed things up by generating the remaining responses randomly.")
@@ -186,13 +204,7 @@ if st.session_state.survey is not None:
             st.session_state.randomly_generated = True
             st.rerun()
 
-    all_responses_completed = (
-        st.session_state.survey._responses.loc[:, ["lowest", "highest"]]
-        .notnull()
-        .all()
-        .all()
-    )
-    if all_responses_completed:
+    if progress["complete"]:
         st.subheader("Move on to analysis")
         st.write(
             f"Now that you collected all {st.session_state.survey.n_participants} responses, move on to analyzing the data."
@@ -1,6 +1,9 @@
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
+import os
+from utils.FitService import FitJob
+from utils.SharedResources import get_fit_service
 
 
 st.set_page_config(
@@ -11,6 +14,22 @@ st.set_page_config(
 if "survey" not in st.session_state:
     st.session_state.survey = None
 
+
+# Show what a background job reports with describe(job.progress) until it is
+# done, then rerun the page to show its result. The job can be cancelled.
+def show_job_progress(job: FitJob, describe, key: str):
+    @st.fragment(run_every=0.5)
+    def show_progress():
+        if job.done():
+            st.rerun()
+        describe(job.progress)
+        if st.button("Cancel", type="secondary", key=f"cancel_{key}"):
+            job.cancel()
+            st.rerun()
+
+    show_progress()
+
+
 st.title("Analyzing the results")
 
 if st.session_state.survey is None:
@@ -20,7 +39,7 @@ if st.session_state.survey is None:
         label="**:blue-background[Go to step 1 — Setting up the survey]**",
         icon="👉",
     )
-elif st.session_state.survey._responses["highest"].notna().sum() == 0:
+elif st.session_state.survey.get_progress()["n_questions_with_highest"] == 0:
     st.info("No responses yet! Please enter some responses or generate them randomly.")
     st.page_link(
         "./pages/2_2_—_Collecting_responses.py",
@@ -28,10 +47,10 @@ elif st.session_state.survey._responses["highest"].notna().sum() == 0:
         icon="👉",
     )
 
-elif st.session_state.survey._responses["highest"].notna().sum() > 0:
+else:
     st.write("Your survey has responses! Let's analyze them.")
     with st.expander("View responses"):
-        st.write(st.session_state.survey._responses)
+        st.write(st.session_state.survey.get_responses())
 
     st.subheader("1. Absolute counts and net value")
     item_counts = st.session_state.survey.get_item_counts()
@@ -46,6 +65,15 @@ elif st.session_state.survey._responses["highest"].notna().sum() > 0:
     # Display the plot
     st.plotly_chart(item_counts_fig)
 
+    st.write(
+        "Not every item is shown equally often, so items that appeared more often have more chances to be chosen. Dividing the net value by the number of times an item was shown gives its **best-worst score**, ranging from -1 (always chosen as the lowest) to 1 (always chosen as the highest)."
+    )
+    st.dataframe(
+        item_counts.rename(index=st.session_state.survey._items_dict).sort_values(
+            "score", ascending=False
+        )
+    )
+
     st.subheader("2. Multinomial logit model & utilities")
     st.write(
         "Using a multinomial logit model, we can estimate the **utilities** of the items. These utilities represent the relative preferences for each item — in other words: the estimated probability of choosing a particular item over others in a set."
@@ -82,11 +110,91 @@ Where:
             "Note: Although the **least preferred option** is also captured in MaxDiff surveys, it does not seem to be included when estimating utilities."
         )
 
-    if st.session_state.survey._multinomial_logit_model is None:
-        with st.spinner("Running multinomial logit model..."):
-            st.session_state.survey.run_multinomial_logit()
-    item_utilities_fig = st.session_state.survey.plot_item_utilities()
-    st.plotly_chart(item_utilities_fig)
+    # The model is fit in the background, so the counts above show right
+    # away. Only responses that came in since the last fit are added to it.
+    survey = st.session_state.survey
+    fit_key = (id(survey), survey.get_response_fingerprint())
+    job = st.session_state.get("logit_job")
+    if job is None or job.key != fit_key:
+        if job is not None:
+            job.cancel()
+        job = get_fit_service().submit(survey.update_multinomial_logit, key=fit_key)
+        st.session_state.logit_job = job
+
+    def describe_fit(progress):
+        if "iteration" in progress:
+            st.write(
+                f"Running multinomial logit model... iteration {progress['iteration']}, "
+                f"log-likelihood {progress['llf']:,.1f} ({job.elapsed:.0f} s)"
+            )
+            partial = survey._multinomial_logit_results(progress, False)
+            st.caption("Utilities so far")
+            st.bar_chart(partial["item_utilities"].rename(index=survey._items_dict))
+        else:
+            st.write("Running multinomial logit model...")
+
+    if not job.done():
+        show_job_progress(job, describe_fit, "logit")
+    elif job.status == "cancelled":
+        st.info("The model was cancelled.")
+        if st.button("Run the model", type="secondary"):
+            st.session_state.logit_job = None
+            st.rerun()
+    elif job.status == "failed":
+        st.error(f"The model could not be fit: {job.exception()}")
+    elif survey._multinomial_logit_model is None:
+        st.info(
+            "There are not enough responses to run the multinomial logit model yet."
+        )
+    else:
+        item_utilities_fig = survey.plot_item_utilities()
+        st.plotly_chart(item_utilities_fig)
+        if not survey._multinomial_logit_model["result"]["converged"]:
+            st.warning(
+                "Some utilities cannot be estimated from the responses so far, e.g. because an item was chosen as the highest every time it was shown. Their values are not reliable yet — collect more responses to get stable estimates."
+            )
+
+        if "bootstrap" not in survey._multinomial_logit_model:
+            st.write(
+                "How certain are these utilities? By resampling the respondents many times and re-running the model on each sample (bootstrapping), we can add 95% confidence intervals to the chart."
+            )
+            # Like the model, the bootstrap runs in the background
+            bootstrap_job = st.session_state.get("bootstrap_job")
+            if bootstrap_job is not None and bootstrap_job.key != fit_key:
+                bootstrap_job.cancel()
+                bootstrap_job = st.session_state.bootstrap_job = None
+
+            def describe_bootstrap(progress):
+                if "replicate" in progress:
+                    st.write(
+                        f"Bootstrapping the multinomial logit model... "
+                        f"{progress['replicate']} of {progress['n_bootstrap']} resamples "
+                        f"({bootstrap_job.elapsed:.0f} s)"
+                    )
+                    st.progress(progress["replicate"] / progress["n_bootstrap"])
+                else:
+                    st.write("Bootstrapping the multinomial logit model...")
+
+            if bootstrap_job is not None and not bootstrap_job.done():
+                show_job_progress(bootstrap_job, describe_bootstrap, "bootstrap")
+            else:
+                if bootstrap_job is not None and bootstrap_job.status == "cancelled":
+                    st.info("The bootstrap was cancelled.")
+                elif bootstrap_job is not None and bootstrap_job.status == "failed":
+                    st.error(
+                        f"The confidence intervals could not be computed: {bootstrap_job.exception()}"
+                    )
+                if st.button("Add confidence intervals", type="secondary"):
+                    st.session_state.bootstrap_job = get_fit_service().submit(
+                        survey.bootstrap_multinomial_logit,
+                        n_jobs=os.cpu_count() or 1,
+                        key=fit_key,
+                    )
+                    st.rerun()
+        else:
+            st.caption(
+                f"Error bars show 95% bootstrap confidence intervals from {survey._multinomial_logit_model['bootstrap']['n_bootstrap']} resamples of the respondents."
+            )
 
     st.subheader("")
 
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+
+N_ITEMS = 8
+
+
+# Small survey in which every question is answered by respondents with
+# increasing true utilities
+@pytest.fixture
+def answered_survey() -> MaxDiffSurvey:
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(N_ITEMS)],
+        n_items_per_question=4,
+        n_questions_per_participant=6,
+        n_participants=60,
+    )
+    survey.generate_random_responses(true_utilities=np.linspace(-1, 1, N_ITEMS))
+    return survey
@@ -0,0 +1,50 @@
+import numpy as np
+
+from utils.MaxDiff import bootstrap_maxdiff_logit, fit_maxdiff_logit
+
+
+def test_bootstrap_draws_scatter_around_the_estimate(answered_survey):
+    choice_data = answered_survey.get_choice_data()
+    n_items = len(answered_survey.items)
+    result = fit_maxdiff_logit(choice_data, n_items)
+
+    draws = bootstrap_maxdiff_logit(choice_data, n_items, n_bootstrap=200)
+    assert draws.shape == (200, n_items - 1)
+    np.testing.assert_allclose(draws.mean(axis=0), result["params"], atol=0.1)
+    np.testing.assert_allclose(draws.std(axis=0), result["bse"], rtol=0.3)
+
+
+def test_bootstrap_is_reproducible_across_processes(answered_survey):
+    choice_data = answered_survey.get_choice_data()
+    n_items = len(answered_survey.items)
+    serial = bootstrap_maxdiff_logit(choice_data, n_items, n_bootstrap=40, seed=3)
+    again = bootstrap_maxdiff_logit(choice_data, n_items, n_bootstrap=40, seed=3)
+    np.testing.assert_array_equal(serial, again)
+
+    # Chunks draw from their own seeds, so the draws depend on the chunking
+    # but not on the scheduling of the processes
+    parallel = bootstrap_maxdiff_logit(
+        choice_data, n_items, n_bootstrap=40, seed=3, n_jobs=2
+    )
+    assert parallel.shape == serial.shape
+    np.testing.assert_array_equal(
+        parallel,
+        bootstrap_maxdiff_logit(choice_data, n_items, n_bootstrap=40, seed=3, n_jobs=2),
+    )
+
+
+def test_bootstrap_intervals_cover_the_estimates(answered_survey):
+    answered_survey.run_multinomial_logit()
+    answered_survey.bootstrap_multinomial_logit(n_bootstrap=100)
+    model = answered_survey._multinomial_logit_model
+    bootstrap = model["bootstrap"]
+
+    assert bootstrap["item_utility_draws"].shape == (100, 8)
+    assert (bootstrap["item_utility_draws"][1] == 0).all()
+    intervals = bootstrap["item_utilities"]
+    assert list(intervals.columns) == ["lower", "upper"]
+    assert (intervals["lower"] <= intervals["upper"]).all()
+    rescaled = bootstrap["rescaled_item_utilities"]
+    assert ((rescaled >= 0) & (rescaled <= 1)).all().all()
+    # The top item is clearly preferred to the bottom one
+    assert intervals.loc[8, "lower"] > intervals.loc[1, "upper"]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from utils.MaxDiff import ChoiceData
+
+
+def test_choice_data_matches_the_response_frame(answered_survey):
+    # Leave some questions unanswered and some without a lowest choice
+    answered_survey._set_responses(np.arange(0, 40, 3), 0, 0)
+    answered_survey._set_responses(
+        np.arange(1, 40, 3), 0, answered_survey._highest.flat[1:40:3]
+    )
+
+    choice_data = answered_survey.get_choice_data()
+    responses = answered_survey.get_responses()
+    answered = responses[responses["highest"].notna()]
+    assert choice_data.n_questions == len(answered)
+
+    items = answered.filter(like="item_").to_numpy()
+    np.testing.assert_array_equal(choice_data.items, items - 1)
+    np.testing.assert_array_equal(
+        choice_data.respondent, answered.index.get_level_values("participant_id")
+    )
+    rows = np.arange(len(items))
+    np.testing.assert_array_equal(
+        items[rows, choice_data.best], answered["highest"].to_numpy(dtype=int)
+    )
+    has_lowest = answered["lowest"].notna().to_numpy()
+    assert (choice_data.worst[~has_lowest] == -1).all()
+    np.testing.assert_array_equal(
+        items[rows[has_lowest], choice_data.worst[has_lowest]],
+        answered["lowest"][has_lowest].to_numpy(dtype=int),
+    )
+
+
+def test_choice_data_without_responses(answered_survey):
+    answered_survey.delete_all_responses()
+    choice_data = answered_survey.get_choice_data()
+    assert isinstance(choice_data, ChoiceData)
+    assert choice_data.n_questions == 0
+    assert choice_data.items.shape == (0, answered_survey.n_items_per_question)
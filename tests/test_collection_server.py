@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from utils.CollectionServer import CollectionServer, ResponseStore
+from utils.MaxDiff import MaxDiffSurvey
+
+
+@pytest.fixture
+def survey() -> MaxDiffSurvey:
+    return MaxDiffSurvey([f"Item {i + 1}" for i in range(6)], 3, 4, 10)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.db"))
+    yield store
+    store.close()
+
+
+# An answer choosing the first and second item of a question
+def answer(survey: MaxDiffSurvey, participant_id: int, question_number: int) -> dict:
+    items = survey._question_sets.question(participant_id, question_number).tolist()
+    return {
+        "participant_id": participant_id,
+        "question_number": question_number,
+        "lowest": items[0],
+        "highest": items[1],
+    }
+
+
+async def request(port: int, method: str, target: str, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    status = int((await reader.readline()).split()[1])
+    _, _, data = (await reader.read()).partition(b"\r\n\r\n")
+    writer.close()
+    return status, json.loads(data)
+
+
+# Run requests(port) against a server on a free port
+def serve(survey, store, requests, **kwargs):
+    async def main():
+        server = CollectionServer(survey, store, port=0, **kwargs)
+        await server.start()
+        try:
+            return await requests(server.port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_store_keeps_the_latest_answer(survey, store):
+    store.append(np.array([[1, 1, 1, 2], [1, 2, 3, 4]]))
+    rows, last = store.read()
+    assert rows.tolist() == [[1, 1, 1, 2], [1, 2, 3, 4]]
+    assert last == 2
+
+    store.append(np.array([[1, 1, 5, 6]]))
+    rows, last = store.read(after=2)
+    assert rows.tolist() == [[1, 1, 5, 6]]
+    assert store.read(after=last)[0].shape == (0, 4)
+
+
+def test_store_syncs_into_the_survey(survey, store):
+    first, second = answer(survey, 2, 1), answer(survey, 2, 1)
+    second["lowest"], second["highest"] = first["highest"], first["lowest"]
+    store.append(np.array([list(first.values()), list(second.values())]))
+    last = store.sync(survey)
+    assert survey.get_response(2, 1) == (second["lowest"], second["highest"])
+    assert store.sync(survey, last) == last
+
+
+def test_server_stores_answers(survey, store):
+    answers = [answer(survey, 1, q) for q in range(1, 5)] + [answer(survey, 2, 1)]
+
+    async def requests(port):
+        status, questions = await request(port, "GET", "/participants/1/questions")
+        assert status == 200
+        assert len(questions["questions"]) == 4
+        assert [item["id"] for item in questions["questions"][0]["items"]] == (
+            survey._question_sets.question(1, 1).tolist()
+        )
+
+        results = await asyncio.gather(
+            *(request(port, "POST", "/responses", a) for a in answers)
+        )
+        assert results == [(200, {"stored": 1})] * len(answers)
+        return await request(port, "GET", "/progress")
+
+    status, progress = serve(survey, store, requests)
+    assert status == 200
+    assert progress["n_answered_questions"] == 5
+    assert progress["n_completed_participants"] == 1
+    assert len(store.read()[0]) == 5
+    assert survey.get_response(2, 1) == (answers[-1]["lowest"], answers[-1]["highest"])
+
+
+def test_server_rejects_invalid_answers(survey, store):
+    invalid = answer(survey, 1, 1)
+    invalid["highest"] = invalid["lowest"]
+
+    async def requests(port):
+        return [
+            await request(port, "POST", "/responses", [answer(survey, 1, 2), invalid]),
+            await request(port, "POST", "/responses", {"participant_id": 1}),
+            await request(port, "GET", "/participants/11/questions"),
+            await request(port, "GET", "/responses"),
+        ]
+
+    rejected, incomplete, not_found, wrong_method = serve(survey, store, requests)
+    assert rejected[0] == 400
+    assert list(rejected[1]["invalid"]) == ["1"]
+    assert incomplete[0] == 400
+    assert not_found[0] == 404
+    assert wrong_method[0] == 405
+    assert len(store.read()[0]) == 0
+    assert survey.get_progress()["n_answered_questions"] == 0
+
+
+def test_server_limits_the_body_size(survey, store):
+    async def requests(port):
+        return await request(port, "POST", "/responses", [answer(survey, 1, 1)] * 100)
+
+    status, _ = serve(survey, store, requests, max_body_size=1000)
+    assert status == 413
+
+
+def test_failed_survey_update_is_reported(survey, store, monkeypatch):
+    def fail(responses):
+        raise RuntimeError("survey is read-only")
+
+    monkeypatch.setattr(survey, "add_responses", fail)
+
+    async def requests(port):
+        return await request(port, "POST", "/responses", answer(survey, 1, 1))
+
+    status, payload = serve(survey, store, requests)
+    assert status == 500
+    assert "read-only" in payload["error"]
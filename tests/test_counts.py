@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from utils.MaxDiff import MaxDiffSurvey
+
+
+# Count analysis row by row from the response frame
+def naive_counts(survey: MaxDiffSurvey, participant_ids) -> pd.DataFrame:
+    counts = pd.DataFrame(
+        0, index=list(survey._items_dict), columns=["lowest", "highest", "shown"]
+    )
+    responses = survey.get_responses()
+    for (participant_id, _), row in responses.iterrows():
+        if participant_id not in participant_ids:
+            continue
+        if pd.isna(row["lowest"]) and pd.isna(row["highest"]):
+            continue
+        for item in row.filter(like="item_"):
+            counts.loc[item, "shown"] += 1
+        for choice in ("lowest", "highest"):
+            if not pd.isna(row[choice]):
+                counts.loc[row[choice], choice] += 1
+    return counts
+
+
+def test_item_counts_match_a_row_by_row_count(answered_survey):
+    # Partly answered and unanswered questions
+    responses = answered_survey.get_responses().reset_index()
+    responses.loc[0, "lowest"] = pd.NA
+    answered_survey.delete_all_responses()
+    answered_survey.add_responses(responses.drop(index=6))
+
+    counts = answered_survey.get_item_counts()
+    expected = naive_counts(answered_survey, range(1, 61))
+    np.testing.assert_array_equal(counts[["lowest", "highest", "shown"]], expected)
+    np.testing.assert_array_equal(
+        counts["net"], expected["highest"] - expected["lowest"]
+    )
+    np.testing.assert_allclose(
+        counts["score"], (expected["highest"] - expected["lowest"]) / expected["shown"]
+    )
+    assert counts["highest"].sum() == 60 * 6 - 1
+    assert counts["lowest"].sum() == 60 * 6 - 2
+
+
+def test_item_counts_by_segment(answered_survey):
+    answered_survey.set_respondent_attributes(
+        pd.DataFrame(
+            {"group": ["a"] * 20 + ["b"] * 30},
+            index=pd.Index(range(1, 51), name="participant_id"),
+        )
+    )
+    counts = answered_survey.get_item_counts(by="group")
+    assert counts.index.names == ["group", "item_id"]
+    np.testing.assert_array_equal(
+        counts.loc["b"][["lowest", "highest", "shown"]],
+        naive_counts(answered_survey, range(21, 51)),
+    )
+    # Participants without a group are left out
+    assert counts["shown"].sum() == 50 * 6 * 4
+
+
+def test_individual_scores(answered_survey):
+    scores = answered_survey.get_individual_count_scores()
+    assert scores.shape == (60, 8)
+    expected = naive_counts(answered_survey, [7])
+    shown = expected["shown"] > 0
+    np.testing.assert_allclose(
+        scores.loc[7][shown],
+        ((expected["highest"] - expected["lowest"]) / expected["shown"])[shown],
+    )
+    assert scores.loc[7][~shown].isna().all()
+    assert ((scores.stack() >= -1) & (scores.stack() <= 1)).all()
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey, design_statistics, generate_designs
+
+
+def test_questions_show_distinct_items():
+    designs = generate_designs(np.arange(1, 51), 12, 4, 9, seed=42)
+    assert designs.shape == (50, 9, 4)
+    assert designs.min() == 1 and designs.max() == 12
+    ordered = np.sort(designs, axis=2)
+    assert (np.diff(ordered, axis=2) > 0).all()
+
+
+def test_items_are_shown_equally_often():
+    designs = generate_designs(np.arange(1, 51), 12, 4, 9, seed=42)
+    statistics = design_statistics(designs, 12)
+    assert statistics["individual_frequency_range"]["max"] == 0
+    assert statistics["d_efficiency"] > 0.95
+
+
+def test_designs_do_not_depend_on_the_batch():
+    together = generate_designs(np.arange(1, 21), 10, 4, 8, seed=1, chunk_size=7)
+    alone = generate_designs([13], 10, 4, 8, seed=1)
+    np.testing.assert_array_equal(together[12], alone[0])
+
+
+@pytest.mark.parametrize("n_items_per_question", [0, 1, 4])
+def test_question_size_must_fit_the_items(n_items_per_question):
+    with pytest.raises(ValueError):
+        generate_designs([1], 3, n_items_per_question, 5, seed=42)
+    with pytest.raises(ValueError):
+        MaxDiffSurvey(["A", "B", "C"], n_items_per_question, 5, 1)
+
+
+def test_all_items_in_every_question():
+    designs = generate_designs([1, 2], 4, 4, 3, seed=42)
+    np.testing.assert_array_equal(
+        np.sort(designs, axis=2), np.tile([1, 2, 3, 4], (2, 3, 1))
+    )
+
+
+@pytest.mark.parametrize(
+    "n_questions_per_participant, n_participants, n_design_versions",
+    [(0, 1, None), (5, 0, None), (5, 1, 0)],
+)
+def test_survey_needs_questions_and_participants(
+    n_questions_per_participant, n_participants, n_design_versions
+):
+    with pytest.raises(ValueError):
+        MaxDiffSurvey(
+            ["A", "B", "C", "D"],
+            3,
+            n_questions_per_participant,
+            n_participants,
+            n_design_versions=n_design_versions,
+        )
+
+
+def make_survey(**kwargs) -> MaxDiffSurvey:
+    return MaxDiffSurvey([f"Item {i + 1}" for i in range(10)], 4, 6, 40, **kwargs)
+
+
+def test_lazy_designs_match_eager_ones():
+    eager = make_survey()
+    lazy = make_survey(lazy_designs=True)
+    assert not lazy._question_sets.arrays()[1].any()
+    np.testing.assert_array_equal(
+        lazy._question_sets.question(7, 2), eager._question_sets.question(7, 2)
+    )
+    assert lazy._question_sets.arrays()[1].sum() == 1
+    np.testing.assert_array_equal(
+        lazy._question_sets.to_array(), eager._question_sets.to_array()
+    )
+
+
+def test_parallel_designs_match_serial_ones():
+    participant_ids = np.arange(1, 301)
+    serial = generate_designs(participant_ids, 10, 4, 6, seed=3)
+    parallel = generate_designs(
+        participant_ids, 10, 4, 6, seed=3, chunk_size=64, n_jobs=2
+    )
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_round_robin_design_versions():
+    survey = make_survey(n_design_versions=3)
+    versions = survey.get_design_versions()
+    assert versions.index.name == "participant_id"
+    assert versions.tolist()[:7] == [1, 2, 3, 1, 2, 3, 1]
+    designs = survey._question_sets.to_array()
+    np.testing.assert_array_equal(designs[0], designs[3])
+    assert len({design.tobytes() for design in designs}) == 3
+
+
+def test_random_design_versions_are_reproducible():
+    versions = make_survey(
+        n_design_versions=5, version_assignment="random"
+    ).get_design_versions()
+    assert versions.between(1, 5).all()
+    assert versions.nunique() > 1
+    again = make_survey(n_design_versions=5, version_assignment="random")
+    assert (again.get_design_versions() == versions).all()
+
+
+def test_unknown_version_assignment():
+    with pytest.raises(ValueError):
+        make_survey(n_design_versions=5, version_assignment="shuffled")
+    assert make_survey().get_design_versions() is None
@@ -0,0 +1,82 @@
+import threading
+import time
+import pytest
+
+from utils.FitService import FitCancelled, FitService
+
+
+@pytest.fixture
+def service():
+    service = FitService()
+    yield service
+    service.shutdown()
+
+
+def test_fit_runs_in_the_background(service, answered_survey):
+    job = service.submit(answered_survey.run_multinomial_logit, key="logit")
+    job.result(timeout=60)
+    assert job.status == "finished"
+    assert job.key == "logit"
+    assert job.progress["iteration"] >= 1
+    assert answered_survey._multinomial_logit_model is not None
+
+
+def test_cancelled_fit_stores_nothing(service, answered_survey):
+    started = threading.Event()
+
+    def fit(callback):
+        started.wait()
+        answered_survey.run_multinomial_logit(callback=callback)
+
+    job = service.submit(fit)
+    job.cancel()
+    started.set()
+    with pytest.raises(FitCancelled):
+        job.result(timeout=60)
+    assert job.cancelled()
+    assert answered_survey._multinomial_logit_model is None
+
+
+def test_bootstrap_reports_progress(service, answered_survey):
+    answered_survey.update_multinomial_logit()
+    reports = []
+    answered_survey.bootstrap_multinomial_logit(n_bootstrap=20, callback=reports.append)
+    assert [report["replicate"] for report in reports] == list(range(1, 21))
+    assert all(report["n_bootstrap"] == 20 for report in reports)
+    bootstrap = answered_survey._multinomial_logit_model["bootstrap"]
+    intervals = bootstrap["item_utilities"]
+    assert (intervals["lower"] <= intervals["upper"]).all()
+
+
+def test_bootstrap_can_be_cancelled(service, answered_survey):
+    answered_survey.update_multinomial_logit()
+    job = service.submit(answered_survey.bootstrap_multinomial_logit, n_bootstrap=500)
+    while "replicate" not in job.progress and not job.done():
+        time.sleep(0.01)
+    job.cancel()
+    assert job.exception(timeout=60) is not None
+    assert job.cancelled()
+    assert "bootstrap" not in answered_survey._multinomial_logit_model
+
+
+def test_bootstrap_of_deleted_responses_is_dropped(answered_survey):
+    answered_survey.update_multinomial_logit()
+    model = answered_survey._multinomial_logit_model
+
+    def delete_once(progress):
+        if progress["replicate"] == 1:
+            answered_survey.delete_all_responses()
+
+    answered_survey.bootstrap_multinomial_logit(n_bootstrap=5, callback=delete_once)
+    assert "bootstrap" not in model
+    assert answered_survey._multinomial_logit_model is None
+
+
+def test_progress_counts_questions_with_a_highest_choice(answered_survey):
+    n_questions = answered_survey._highest.size
+    assert answered_survey.get_progress()["n_questions_with_highest"] == n_questions
+    answered_survey._set_responses(0, 0, 0)
+    answered_survey._set_responses(1, 0, answered_survey._highest.flat[1])
+    progress = answered_survey.get_progress()
+    assert progress["n_questions_with_highest"] == n_questions - 1
+    assert progress["n_answered_questions"] == n_questions - 2
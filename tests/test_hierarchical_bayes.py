@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+
+
+@pytest.fixture(scope="module")
+def heterogeneous_survey():
+    survey = MaxDiffSurvey([f"Item {i + 1}" for i in range(6)], 3, 12, 80)
+    utilities = survey.generate_random_responses(
+        true_utilities=np.linspace(-1.5, 1.5, 6), heterogeneity=1.0
+    )
+    return survey, utilities
+
+
+def test_individual_utilities_follow_the_respondents(heterogeneous_survey):
+    survey, utilities = heterogeneous_survey
+    survey.run_hierarchical_bayes(n_iterations=2000, n_burn=1000, n_chains=2)
+    model = survey._hierarchical_bayes_model
+
+    individual = model["individual_utilities"]
+    assert individual.shape == (80, 6)
+    assert (individual.iloc[:, 0] == 0).all()
+    np.testing.assert_allclose(model["rescaled_individual_utilities"].sum(axis=1), 1.0)
+    assert np.all(np.diff(model["mean_utilities"].to_numpy()) > 0)
+
+    # Individual estimates are shrunk, but still ordered like the utilities
+    # each respondent answered with
+    true_utilities = np.asarray(utilities) - np.asarray(utilities)[:, :1]
+    correlation = np.corrcoef(individual.to_numpy().ravel(), true_utilities.ravel())
+    assert correlation[0, 1] > 0.7
+
+    diagnostics = model["diagnostics"]
+    assert diagnostics["n_chains"] == 2
+    assert diagnostics["n_draws"] == 2000
+    assert diagnostics["max_rhat"] < 1.2
+    assert all(0 < rate < 1 for rate in diagnostics["acceptance_rate"])
+
+
+def test_chains_are_reproducible_in_parallel(heterogeneous_survey):
+    survey, _ = heterogeneous_survey
+    survey.cache_size = 0
+    survey.run_hierarchical_bayes(n_iterations=100, n_burn=50, n_chains=2)
+    serial = survey._hierarchical_bayes_model["individual_utilities"]
+    survey.run_hierarchical_bayes(n_iterations=100, n_burn=50, n_chains=2, n_jobs=2)
+    parallel = survey._hierarchical_bayes_model["individual_utilities"]
+    np.testing.assert_allclose(serial, parallel)
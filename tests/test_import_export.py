@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+
+
+def empty_copy(survey: MaxDiffSurvey) -> MaxDiffSurvey:
+    return MaxDiffSurvey(
+        survey.items,
+        survey.n_items_per_question,
+        survey.n_questions_per_participant,
+        survey.n_participants,
+    )
+
+
+def test_import_exported_responses(tmp_path, answered_survey):
+    path = tmp_path / "responses.csv"
+    answered_survey.export_responses(str(path))
+
+    survey = empty_copy(answered_survey)
+    report = survey.import_responses(str(path), chunk_size=50)
+    assert report["n_imported"] == report["n_rows"] == answered_survey._highest.size
+    assert report["n_rejected"] == 0
+    assert survey.get_response_fingerprint() == (
+        answered_survey.get_response_fingerprint()
+    )
+
+
+def test_import_platform_export(tmp_path, answered_survey):
+    responses = answered_survey.get_responses().reset_index()
+    labels = {item_id: label for item_id, label in answered_survey._items_dict.items()}
+    export = pd.DataFrame(
+        {
+            "Respondent": responses["participant_id"],
+            "Task": responses["question_number"],
+            "Worst": responses["lowest"].astype(int).map(labels),
+            "Best": responses["highest"].astype(int).map(labels),
+            "Duration": 1.0,
+        }
+    )
+    export.loc[3, "Best"] = "Not an item"
+    path = tmp_path / "export.jsonl"
+    export.to_json(path, orient="records", lines=True)
+
+    survey = empty_copy(answered_survey)
+    report = survey.import_responses(
+        str(path),
+        columns={
+            "participant_id": "Respondent",
+            "question_number": "Task",
+            "lowest": "Worst",
+            "highest": "Best",
+        },
+        item_labels=True,
+    )
+    assert report["n_rejected"] == 1
+    assert report["reasons"].to_dict() == {"highest item not found": 1}
+    assert list(report["rejected"].index) == [3]
+    assert report["n_imported"] == len(export) - 1
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_missing_columns_are_reported(tmp_path, answered_survey, suffix):
+    responses = answered_survey.get_responses().reset_index()
+    responses = responses[["participant_id", "question_number", "lowest"]]
+    path = tmp_path / f"responses{suffix}"
+    if suffix == ".csv":
+        responses.to_csv(path, index=False)
+    else:
+        responses.to_json(path, orient="records", lines=True)
+
+    with pytest.raises(ValueError, match="Export is missing columns {'highest'}"):
+        empty_copy(answered_survey).import_responses(str(path))
+
+
+def test_rejected_rows_are_limited(tmp_path, answered_survey):
+    responses = answered_survey.get_responses().reset_index()
+    responses["participant_id"] += 1000
+    path = tmp_path / "responses.csv"
+    responses.to_csv(path, index=False)
+
+    report = empty_copy(answered_survey).import_responses(
+        str(path), chunk_size=100, max_rejected=10
+    )
+    assert report["n_rejected"] == len(responses)
+    assert len(report["rejected"]) == 10
+    assert report["reasons"].to_dict() == {"participant not found": len(responses)}
+
+
+def read_table(path) -> pd.DataFrame:
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+@pytest.mark.parametrize(
+    "name", ["responses.csv", "responses.csv.gz", "responses.parquet"]
+)
+def test_export_wide_responses(tmp_path, answered_survey, name):
+    path = tmp_path / name
+    answered_survey.export_responses(str(path), chunk_size=7)
+
+    exported = read_table(path).set_index(["participant_id", "question_number"])
+    expected = answered_survey.get_responses()
+    assert len(exported) == len(expected)
+    np.testing.assert_array_equal(exported.to_numpy(), expected.to_numpy())
+
+
+def test_export_long_responses(tmp_path, answered_survey):
+    path = tmp_path / "responses.csv"
+    answered_survey.export_responses(str(path), layout="long", chunk_size=7)
+    exported = pd.read_csv(path)
+    assert list(exported.columns) == [
+        "participant_id",
+        "question_number",
+        "position",
+        "item_id",
+        "choice",
+    ]
+    assert len(exported) == 60 * 6 * 4
+
+    questions = exported.groupby(["participant_id", "question_number"])
+    assert (questions["choice"].sum() == 0).all()
+    expected = answered_survey.get_responses()
+    highest = exported[exported["choice"] == 1].set_index(
+        ["participant_id", "question_number"]
+    )["item_id"]
+    np.testing.assert_array_equal(highest, expected["highest"])
+    items = exported.pivot_table(
+        index=["participant_id", "question_number"],
+        columns="position",
+        values="item_id",
+    )
+    np.testing.assert_array_equal(items, expected.filter(like="item_"))
+
+
+def test_export_leaves_out_unanswered_questions(tmp_path, answered_survey):
+    responses = answered_survey.get_responses().reset_index()
+    answered_survey.delete_all_responses()
+    answered_survey.add_responses(responses.iloc[:100])
+
+    path = tmp_path / "responses.csv"
+    answered_survey.export_responses(str(path))
+    assert len(pd.read_csv(path)) == 100
+    answered_survey.export_responses(str(path), answered_only=False)
+    assert len(pd.read_csv(path)) == 360
+
+
+def test_export_design_with_versions(tmp_path):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(8)], 4, 5, 30, n_design_versions=3
+    )
+    path = tmp_path / "design.parquet"
+    survey.export_design(str(path), layout="long", chunk_size=4)
+    exported = pd.read_parquet(path)
+    assert len(exported) == 30 * 5 * 4
+    versions = exported.groupby("participant_id")["design_version"].first()
+    np.testing.assert_array_equal(versions, survey.get_design_versions())
+    np.testing.assert_array_equal(
+        exported["item_id"].to_numpy().reshape(30, 5, 4),
+        survey._question_sets.to_array(),
+    )
+
+
+def test_export_rejects_unknown_layouts(tmp_path, answered_survey):
+    with pytest.raises(ValueError, match="layout"):
+        answered_survey.export_design(str(tmp_path / "design.csv"), layout="tall")
+    with pytest.raises(ValueError, match="format"):
+        answered_survey.export_design(str(tmp_path / "design.csv"), file_format="xlsx")
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey, fit_maxdiff_logit, simulate_best_worst
+
+
+# Survey in which the first half of the respondents ranks the items in the
+# opposite order of the second half
+@pytest.fixture(scope="module")
+def two_class_survey() -> MaxDiffSurvey:
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(6)],
+        n_items_per_question=3,
+        n_questions_per_participant=10,
+        n_participants=120,
+    )
+    utilities = np.linspace(-2, 2, 6)
+    respondent_utilities = np.where(np.arange(120)[:, None] < 60, utilities, -utilities)
+    lowest, highest = simulate_best_worst(
+        survey._question_sets.to_array(),
+        respondent_utilities,
+        np.random.default_rng(0),
+    )
+    participant_id, question_number = np.indices(lowest.shape) + 1
+    survey.add_responses(
+        pd.DataFrame(
+            {
+                "participant_id": participant_id.ravel(),
+                "question_number": question_number.ravel(),
+                "lowest": lowest.ravel(),
+                "highest": highest.ravel(),
+            }
+        )
+    )
+    return survey
+
+
+def test_latent_classes_are_recovered(two_class_survey):
+    two_class_survey.run_latent_class(2, n_starts=3)
+    model = two_class_survey._latent_class_model
+
+    np.testing.assert_allclose(model["class_sizes"], [0.5, 0.5], atol=0.05)
+    np.testing.assert_allclose(model["membership"].sum(axis=1), 1)
+    groups = model["most_likely_class"].groupby(model["membership"].index <= 60)
+    assert (groups.nunique() == 1).all()
+    assert groups.first().nunique() == 2
+
+    # Each class prefers the last or the first item
+    top_items = model["class_utilities"].idxmax(axis=1)
+    assert sorted(top_items) == [1, 6]
+
+
+def test_one_class_is_the_multinomial_logit(two_class_survey):
+    model = two_class_survey._latent_class_results(1, False, 1, 1)
+    result = fit_maxdiff_logit(two_class_survey.get_choice_data(), 6)
+    np.testing.assert_allclose(
+        model["result"]["params"][0], result["params"], atol=1e-4
+    )
+    assert model["fit_statistics"]["llf"] == pytest.approx(result["llf"], abs=1e-6)
+
+
+def test_compare_latent_classes(two_class_survey):
+    comparison = two_class_survey.compare_latent_classes((1, 2, 3), n_starts=2)
+    assert list(comparison.index) == [1, 2, 3]
+    assert list(comparison.columns) == ["llf", "n_params", "aic", "bic"]
+    assert comparison["llf"].is_monotonic_increasing
+    assert comparison["bic"].idxmin() == 2
+
+
+def test_latent_class_starts_run_in_parallel(two_class_survey):
+    serial = two_class_survey._latent_class_results(2, True, 2, 1)["result"]
+    two_class_survey._results_cache.clear()
+    parallel = two_class_survey._latent_class_results(2, True, 2, 2)["result"]
+    assert parallel["llf"] == pytest.approx(serial["llf"])
+    np.testing.assert_allclose(parallel["params"], serial["params"])
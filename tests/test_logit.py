@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import (
+    ChoiceData,
+    _logit_derivatives,
+    fit_maxdiff_logit,
+    simulate_best_worst,
+)
+
+N_ITEMS = 6
+
+
+def simulated_choice_data(n_questions: int, seed: int = 0) -> ChoiceData:
+    rng = np.random.default_rng(seed)
+    items = np.argsort(rng.random((n_questions, N_ITEMS)), axis=1)[:, :4] + 1
+    utilities = np.linspace(-1, 1, N_ITEMS)
+    lowest, highest = simulate_best_worst(items[None], utilities, rng)
+    return ChoiceData(
+        respondent=np.arange(n_questions),
+        items=items - 1,
+        best=(items == highest.reshape(-1, 1)).argmax(axis=1),
+        worst=(items == lowest.reshape(-1, 1)).argmax(axis=1),
+    )
+
+
+def test_fit_converges_with_enough_data():
+    result = fit_maxdiff_logit(simulated_choice_data(2000), N_ITEMS)
+    assert result["converged"]
+    assert np.isfinite(result["bse"]).all()
+    np.testing.assert_allclose(
+        result["params"], np.linspace(-1, 1, N_ITEMS)[1:] + 1, atol=0.3
+    )
+
+
+def test_items_never_shown_have_no_standard_error():
+    choice_data = simulated_choice_data(500)
+    shown = ~(choice_data.items == N_ITEMS - 1).any(axis=1)
+    choice_data = ChoiceData(*(field[shown] for field in choice_data))
+
+    result = fit_maxdiff_logit(choice_data, N_ITEMS)
+    assert np.isnan(result["bse"][-1])
+    assert np.isfinite(result["bse"][:-1]).all()
+    assert np.isfinite(result["params"]).all()
+
+
+def test_few_answered_questions_still_give_utilities():
+    result = fit_maxdiff_logit(simulated_choice_data(2), N_ITEMS, best_worst=True)
+    assert np.isfinite(result["params"]).all()
+    assert not result["converged"]
+    assert np.isnan(result["bse"]).any()
+
+
+def test_separated_data_is_reported():
+    choice_data = simulated_choice_data(500)
+    # The last item wins every question it is in
+    has_last = choice_data.items == N_ITEMS - 1
+    best = np.where(has_last.any(axis=1), has_last.argmax(axis=1), choice_data.best)
+    choice_data = choice_data._replace(best=best)
+
+    result = fit_maxdiff_logit(choice_data, N_ITEMS)
+    assert not result["converged"]
+    assert np.isnan(result["bse"][-1])
+    assert np.isfinite(result["bse"][:-1]).all()
+
+
+def test_update_with_few_responses(answered_survey):
+    answered_survey.delete_all_responses()
+    answered_survey.add_response(
+        1, 1, (None, answered_survey._question_sets.question(1, 1)[0])
+    )
+    answered_survey.update_multinomial_logit()
+    model = answered_survey._multinomial_logit_model
+    assert not model["result"]["converged"]
+    assert np.isfinite(model["item_utilities"]).all()
+
+
+# Log-likelihood of the sequential best-worst logit, one question at a time
+def direct_loglike(params, choice_data, best_worst):
+    utilities = np.insert(params, 0, 0.0)
+    loglike = 0.0
+    for items, best, worst in zip(
+        choice_data.items, choice_data.best, choice_data.worst
+    ):
+        shown = utilities[items]
+        loglike += shown[best] - np.log(np.exp(shown).sum())
+        if best_worst and worst >= 0:
+            rest = np.delete(-shown, best)
+            loglike += -shown[worst] - np.log(np.exp(rest).sum())
+    return loglike
+
+
+@pytest.mark.parametrize("best_worst", [False, True])
+def test_derivatives_match_the_likelihood(best_worst):
+    choice_data = simulated_choice_data(40)
+    choice_data = choice_data._replace(
+        worst=np.where(np.arange(40) % 5 == 0, -1, choice_data.worst)
+    )
+    worst = choice_data.worst if best_worst else None
+    params = np.linspace(-0.5, 0.5, N_ITEMS - 1)
+
+    loglike, gradient, hessian = _logit_derivatives(
+        params, choice_data.items, choice_data.best, N_ITEMS, worst
+    )
+    assert loglike == pytest.approx(direct_loglike(params, choice_data, best_worst))
+
+    epsilon = 1e-6
+    shifts = np.eye(N_ITEMS - 1) * epsilon
+    numeric_gradient = [
+        (
+            direct_loglike(params + shift, choice_data, best_worst)
+            - direct_loglike(params - shift, choice_data, best_worst)
+        )
+        / (2 * epsilon)
+        for shift in shifts
+    ]
+    np.testing.assert_allclose(gradient, numeric_gradient, rtol=1e-5, atol=1e-6)
+    numeric_hessian = [
+        (
+            _logit_derivatives(
+                params + shift, choice_data.items, choice_data.best, N_ITEMS, worst
+            )[1]
+            - _logit_derivatives(
+                params - shift, choice_data.items, choice_data.best, N_ITEMS, worst
+            )[1]
+        )
+        / (2 * epsilon)
+        for shift in shifts
+    ]
+    np.testing.assert_allclose(hessian, numeric_hessian, rtol=1e-5, atol=1e-6)
+
+
+def test_weights_count_questions_repeatedly():
+    choice_data = simulated_choice_data(300)
+    weights = np.arange(300) % 3
+    repeated = ChoiceData(*(np.repeat(field, weights, axis=0) for field in choice_data))
+
+    weighted = fit_maxdiff_logit(
+        choice_data, N_ITEMS, best_worst=True, weights=weights.astype(float)
+    )
+    expected = fit_maxdiff_logit(repeated, N_ITEMS, best_worst=True)
+    np.testing.assert_allclose(weighted["params"], expected["params"], atol=1e-8)
+    assert weighted["llf"] == pytest.approx(expected["llf"])
+
+
+def test_best_worst_fit_is_more_precise():
+    choice_data = simulated_choice_data(2000)
+    best_only = fit_maxdiff_logit(choice_data, N_ITEMS)
+    best_worst = fit_maxdiff_logit(choice_data, N_ITEMS, best_worst=True)
+    assert best_worst["converged"]
+    assert (best_worst["bse"] < best_only["bse"]).all()
+    assert best_worst["llnull"] < best_only["llnull"] < best_only["llf"]
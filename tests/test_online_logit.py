@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import fit_maxdiff_logit
+
+
+# Callback that runs action once, at the first iteration of a fit
+def run_once(action):
+    calls = []
+
+    def callback(progress):
+        if not calls:
+            calls.append(progress)
+            action()
+
+    return callback
+
+
+def test_update_matches_a_full_fit(answered_survey):
+    answered_survey.update_multinomial_logit()
+    model = answered_survey._multinomial_logit_model
+    expected = fit_maxdiff_logit(
+        answered_survey.get_choice_data(), len(answered_survey.items)
+    )
+    np.testing.assert_allclose(model["result"]["params"], expected["params"])
+
+
+def test_update_uses_questions_with_only_a_highest_choice(answered_survey):
+    answered_survey._lowest[:] = 0
+    answered_survey.update_multinomial_logit()
+    model = answered_survey._multinomial_logit_model
+    assert model["result"]["n_questions"] == answered_survey._highest.size
+
+
+def test_responses_written_during_a_refit_are_folded_in(answered_survey):
+    answered_survey.delete_all_responses()
+    answered_survey.generate_random_responses()
+    answered_survey._set_responses(0, 0, 0)
+    lowest, highest = answered_survey._question_sets.question(1, 1)[:2]
+
+    answered_survey.update_multinomial_logit(
+        callback=run_once(lambda: answered_survey.add_response(1, 1, (lowest, highest)))
+    )
+    model = answered_survey._multinomial_logit_model
+    assert model["result"]["n_questions"] == answered_survey._highest.size - 1
+    answered_survey.update_multinomial_logit()
+    model = answered_survey._multinomial_logit_model
+    assert model["result"]["n_questions"] == answered_survey._highest.size
+
+
+def test_refit_of_deleted_responses_is_dropped(answered_survey):
+    answered_survey.update_multinomial_logit(
+        callback=run_once(answered_survey.delete_all_responses)
+    )
+    assert answered_survey._multinomial_logit_model is None
+    assert answered_survey._online_logit is None
+
+    answered_survey.generate_random_responses(seed=1)
+    answered_survey.update_multinomial_logit()
+    expected = fit_maxdiff_logit(
+        answered_survey.get_choice_data(), len(answered_survey.items)
+    )
+    np.testing.assert_allclose(
+        answered_survey._multinomial_logit_model["result"]["params"],
+        expected["params"],
+    )
+
+
+@pytest.mark.parametrize("best_worst", [False, True])
+def test_fit_of_changed_responses_is_not_stored(answered_survey, best_worst):
+    answered_survey.run_multinomial_logit(
+        best_worst=best_worst, callback=run_once(answered_survey.delete_all_responses)
+    )
+    assert answered_survey._multinomial_logit_model is None
+
+
+# Full fit without the last participants, whose responses are then added back
+def withhold_participants(survey, n_participants):
+    responses = survey.get_responses().reset_index()
+    withheld = responses["participant_id"] > survey.n_participants - n_participants
+    keys = np.flatnonzero(withheld.to_numpy())
+    survey._set_responses(keys, 0, 0)
+    survey.update_multinomial_logit()
+    survey.add_responses(responses[withheld])
+
+
+def test_new_questions_are_folded_in_incrementally(answered_survey):
+    withhold_participants(answered_survey, 3)
+    answered_survey.update_multinomial_logit()
+    result = answered_survey._multinomial_logit_model["result"]
+    assert result["n_incremental"] == 18
+    assert result["n_questions"] == answered_survey._highest.size
+
+    expected = fit_maxdiff_logit(
+        answered_survey.get_choice_data(), len(answered_survey.items)
+    )
+    np.testing.assert_allclose(result["params"], expected["params"], atol=0.02)
+    np.testing.assert_allclose(result["bse"], expected["bse"], rtol=0.05)
+
+
+def test_many_new_questions_force_a_refit(answered_survey):
+    withhold_participants(answered_survey, 20)
+    answered_survey.update_multinomial_logit(refit_fraction=0.25)
+    result = answered_survey._multinomial_logit_model["result"]
+    assert result["n_incremental"] == 0
+    assert result["n_questions"] == answered_survey._highest.size
+
+
+def test_changed_estimated_questions_force_a_refit(answered_survey):
+    withhold_participants(answered_survey, 3)
+    answered_survey.update_multinomial_logit()
+    lowest, highest = answered_survey.get_response(1, 1)
+    answered_survey.add_response(1, 1, (highest, lowest))
+    answered_survey.update_multinomial_logit()
+
+    result = answered_survey._multinomial_logit_model["result"]
+    assert result["n_incremental"] == 0
+    expected = fit_maxdiff_logit(
+        answered_survey.get_choice_data(), len(answered_survey.items)
+    )
+    np.testing.assert_allclose(result["params"], expected["params"])
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+from utils.ResponseLog import log_file, log_generations, read_response_log
+
+
+@pytest.fixture
+def logged_survey(tmp_path):
+    survey = MaxDiffSurvey([f"Item {i + 1}" for i in range(8)], 4, 6, 60)
+    survey.start_response_log(str(tmp_path))
+    yield survey
+    survey.stop_response_log()
+
+
+def answer_all(survey: MaxDiffSurvey, seed: int = 0):
+    survey.generate_random_responses(overwrite=True, seed=seed)
+
+
+def assert_same_responses(path, survey: MaxDiffSurvey):
+    loaded = MaxDiffSurvey.load(str(path), mmap=False)
+    pd.testing.assert_frame_equal(loaded.get_responses(), survey.get_responses())
+    assert loaded.get_progress() == survey.get_progress()
+
+
+def test_responses_survive_a_crash(logged_survey, tmp_path):
+    answer_all(logged_survey)
+    lowest, highest = logged_survey.get_response(5, 2)
+    logged_survey.add_response(5, 2, (highest, lowest))
+    # Loading while the log is still open is what a restart after a crash sees
+    assert_same_responses(tmp_path, logged_survey)
+
+
+def test_torn_tail_is_ignored(logged_survey, tmp_path):
+    logged_survey.add_response(
+        1, 1, tuple(logged_survey._question_sets.question(1, 1)[:2])
+    )
+    logged_survey.add_response(
+        2, 1, tuple(logged_survey._question_sets.question(2, 1)[:2])
+    )
+    file = log_file(str(tmp_path), logged_survey._response_log.generation)
+    assert len(read_response_log(file, (60, 6))) == 2
+
+    # A record whose checksum does not match, then half a record
+    with open(file, "ab") as f:
+        f.write(np.array([3, 0x00010002, 12345], dtype="<u4").tobytes())
+        f.write(b"\x01\x02\x03")
+    assert len(read_response_log(file, (60, 6))) == 2
+    assert_same_responses(tmp_path, logged_survey)
+
+
+def test_logs_of_other_surveys_are_rejected(logged_survey, tmp_path):
+    file = log_file(str(tmp_path), logged_survey._response_log.generation)
+    with pytest.raises(ValueError, match="another size"):
+        read_response_log(file, (61, 6))
+
+
+def test_compaction_folds_the_log_into_the_snapshot(tmp_path):
+    survey = MaxDiffSurvey([f"Item {i + 1}" for i in range(8)], 4, 6, 60)
+    survey.start_response_log(str(tmp_path), compact_bytes=1000)
+    try:
+        for seed in range(3):
+            answer_all(survey, seed)
+        survey._response_log.wait_for_compaction()
+        # Only the logs written since the last compaction are left
+        generations = log_generations(str(tmp_path))
+        assert generations[0] > 1
+        assert_same_responses(tmp_path, survey)
+
+        survey.delete_all_responses()
+        assert_same_responses(tmp_path, survey)
+        assert (
+            os.path.getsize(
+                log_file(str(tmp_path), max(log_generations(str(tmp_path))))
+            )
+            < 100
+        )
+    finally:
+        survey.stop_response_log()
+    assert_same_responses(tmp_path, survey)
+
+
+def test_restarted_log_continues(logged_survey, tmp_path):
+    answer_all(logged_survey)
+    logged_survey.stop_response_log()
+
+    survey = MaxDiffSurvey.load(str(tmp_path))
+    survey.start_response_log(str(tmp_path))
+    try:
+        lowest, highest = survey.get_response(3, 3)
+        survey.add_response(3, 3, (highest, lowest))
+        assert_same_responses(tmp_path, survey)
+    finally:
+        survey.stop_response_log()
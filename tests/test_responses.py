@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import InvalidResponsesError, MaxDiffSurvey
+
+
+@pytest.fixture
+def survey() -> MaxDiffSurvey:
+    return MaxDiffSurvey([f"Item {i + 1}" for i in range(6)], 3, 4, 10)
+
+
+# (lowest, highest) choice of a question: its first and second item
+def choices(survey: MaxDiffSurvey, participant_id: int, question_number: int):
+    items = survey._question_sets.question(participant_id, question_number)
+    return int(items[0]), int(items[1])
+
+
+def test_add_response(survey):
+    survey.add_response(2, 3, choices(survey, 2, 3))
+    assert survey.get_response(2, 3) == choices(survey, 2, 3)
+    assert survey.get_response(2, 4) == (None, None)
+    assert survey.get_progress()["n_answered_questions"] == 1
+
+
+def test_add_response_keeps_the_other_choice(survey):
+    lowest, highest = choices(survey, 1, 1)
+    survey.add_response(1, 1, (None, highest))
+    survey.add_response(1, 1, (lowest, None))
+    assert survey.get_response(1, 1) == (lowest, highest)
+
+
+@pytest.mark.parametrize(
+    "participant_id, question_number, response",
+    [(11, 1, (None, None)), (1, 5, (None, None)), (1, 1, (1, 2, 3))],
+)
+def test_add_response_rejects_invalid_answers(
+    survey, participant_id, question_number, response
+):
+    with pytest.raises(ValueError):
+        survey.add_response(participant_id, question_number, response)
+
+
+def test_add_response_rejects_items_not_shown(survey):
+    not_shown = set(range(1, 7)) - set(survey._question_sets.question(1, 1).tolist())
+    with pytest.raises(ValueError):
+        survey.add_response(1, 1, (None, not_shown.pop()))
+    lowest, _ = choices(survey, 1, 1)
+    with pytest.raises(ValueError):
+        survey.add_response(1, 1, (lowest, lowest))
+
+
+def test_add_responses_from_a_frame(survey):
+    rows = [(p, q, *choices(survey, p, q)) for p in range(1, 11) for q in range(1, 5)]
+    responses = pd.DataFrame(
+        rows, columns=["participant_id", "question_number", "lowest", "highest"]
+    )
+    survey.add_responses(responses.set_index(["participant_id", "question_number"]))
+    assert survey.get_progress()["complete"]
+    assert survey.get_progress()["n_completed_participants"] == 10
+
+
+def test_last_answer_of_a_question_wins(survey):
+    lowest, highest = choices(survey, 1, 1)
+    survey.add_responses(np.array([[1, 1, lowest, highest], [1, 1, highest, lowest]]))
+    assert survey.get_response(1, 1) == (highest, lowest)
+
+
+def test_invalid_rows_are_all_reported(survey):
+    lowest, highest = choices(survey, 1, 1)
+    rows = [[1, 1, lowest, highest]] + [[99, 1, lowest, highest]] * 12
+    same, _ = choices(survey, 2, 1)
+    rows += [[2, 1, same, same], [1, 9, lowest, highest]]
+    with pytest.raises(InvalidResponsesError) as error:
+        survey.add_responses(np.array(rows))
+
+    invalid = error.value.rows
+    assert list(invalid.index) == list(range(1, 15))
+    assert invalid["reason"].value_counts().to_dict() == {
+        "participant not found": 12,
+        "lowest and highest are the same": 1,
+        "question number out of range": 1,
+    }
+    assert "14 invalid responses" in str(error.value)
+    assert survey.get_progress()["n_answered_questions"] == 0
+
+
+def test_response_frame_layout(survey):
+    lowest, highest = choices(survey, 3, 2)
+    survey.add_response(3, 2, (lowest, highest))
+    survey.add_response(3, 3, (None, choices(survey, 3, 3)[1]))
+
+    responses = survey.get_responses()
+    assert list(responses.index.names) == ["participant_id", "question_number"]
+    assert len(responses) == 40
+    assert list(responses.columns) == [
+        "item_1",
+        "item_2",
+        "item_3",
+        "lowest",
+        "highest",
+    ]
+    assert isinstance(responses["lowest"].array, pd.arrays.IntegerArray)
+    assert responses.loc[(3, 2), ["lowest", "highest"]].tolist() == [lowest, highest]
+    assert pd.isna(responses.loc[(3, 3), "lowest"])
+    assert responses["highest"].notna().sum() == 2
+    np.testing.assert_array_equal(
+        responses.loc[3].filter(like="item_").to_numpy(),
+        survey._question_sets.to_array([3])[0],
+    )
+
+
+def test_progress_index_follows_random_writes(answered_survey):
+    rng = np.random.default_rng(1)
+    n_questions = answered_survey._highest.size
+    items = answered_survey._question_sets.to_array().reshape(n_questions, -1)
+    for _ in range(50):
+        # Clear, complete and partly answer random questions, including
+        # repeated writes of the same choices
+        keys = rng.choice(n_questions, size=rng.integers(1, 20), replace=False)
+        lowest = items[keys, 0] * rng.integers(0, 2, size=len(keys))
+        highest = items[keys, 1] * rng.integers(0, 2, size=len(keys))
+        answered_survey._set_responses(keys, lowest, highest)
+
+        progress = answered_survey.get_progress()
+        completed = answered_survey.get_completed_participants()
+        by_participant = answered_survey._n_answered_by_participant.copy()
+        answered_survey._rebuild_progress()
+        assert answered_survey.get_progress() == progress
+        np.testing.assert_array_equal(
+            answered_survey._n_answered_by_participant, by_participant
+        )
+        np.testing.assert_array_equal(
+            answered_survey.get_completed_participants(), completed
+        )
+
+    responses = answered_survey.get_responses()
+    assert (
+        progress["n_answered_questions"]
+        == (responses["lowest"].notna() & responses["highest"].notna()).sum()
+    )
+    assert progress["n_questions_with_highest"] == responses["highest"].notna().sum()
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+
+
+def test_fingerprint_follows_the_responses(answered_survey):
+    fingerprint = answered_survey.get_response_fingerprint()
+    lowest, highest = answered_survey.get_response(1, 1)
+
+    # Writing the same answer again changes nothing
+    answered_survey.add_response(1, 1, (lowest, highest))
+    assert answered_survey.get_response_fingerprint() == fingerprint
+
+    answered_survey.add_response(1, 1, (highest, lowest))
+    assert answered_survey.get_response_fingerprint() != fingerprint
+    answered_survey.add_response(1, 1, (lowest, highest))
+    assert answered_survey.get_response_fingerprint() == fingerprint
+
+
+def test_results_are_reused_for_the_same_responses(answered_survey):
+    answered_survey.run_multinomial_logit()
+    first = answered_survey._multinomial_logit_model
+
+    lowest, highest = answered_survey.get_response(1, 1)
+    answered_survey.add_response(1, 1, (highest, lowest))
+    answered_survey.run_multinomial_logit()
+    changed = answered_survey._multinomial_logit_model
+    assert changed["result"] is not first["result"]
+
+    answered_survey.add_response(1, 1, (lowest, highest))
+    answered_survey.run_multinomial_logit()
+    assert answered_survey._multinomial_logit_model["result"] is first["result"]
+
+
+def test_results_persist_in_the_cache_dir(answered_survey, tmp_path):
+    def make_survey():
+        survey = MaxDiffSurvey(
+            answered_survey.items,
+            n_items_per_question=4,
+            n_questions_per_participant=6,
+            n_participants=60,
+            cache_dir=str(tmp_path),
+        )
+        survey.add_responses(answered_survey.get_responses().reset_index())
+        return survey
+
+    def fail():
+        pytest.fail("the cached result was computed again")
+
+    survey = make_survey()
+    result = survey._cached_result("counts", {}, lambda: {"value": 1})
+    assert len(list(tmp_path.glob("counts-*.pkl"))) == 1
+
+    # A rebuilt survey with the same responses loads the result from disk
+    assert make_survey()._cached_result("counts", {}, fail) == result
+    with pytest.raises(pytest.fail.Exception):
+        make_survey()._cached_result("counts", {"option": 1}, fail)
@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+
+
+def assert_same_survey(loaded: MaxDiffSurvey, survey: MaxDiffSurvey):
+    assert loaded.items == survey.items
+    assert loaded.get_survey_id() == survey.get_survey_id()
+    np.testing.assert_array_equal(
+        loaded._question_sets.to_array(), survey._question_sets.to_array()
+    )
+    pd.testing.assert_frame_equal(loaded.get_responses(), survey.get_responses())
+    assert loaded.get_progress() == survey.get_progress()
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_survey_loads_unchanged(answered_survey, tmp_path, mmap):
+    answered_survey.set_respondent_attributes(
+        pd.DataFrame({"region": ["north", "south"] * 30}, index=range(1, 61))
+    )
+    answered_survey.save(tmp_path)
+    loaded = MaxDiffSurvey.load(tmp_path, mmap=mmap)
+
+    assert_same_survey(loaded, answered_survey)
+    assert isinstance(loaded._lowest, np.memmap) == mmap
+    pd.testing.assert_frame_equal(
+        loaded.respondent_attributes,
+        answered_survey.respondent_attributes,
+        check_dtype=False,
+    )
+
+
+def test_lazy_designs_and_versions_survive_saving(tmp_path):
+    survey = MaxDiffSurvey(
+        [f"Item {i + 1}" for i in range(10)],
+        4,
+        6,
+        40,
+        lazy_designs=True,
+        n_design_versions=5,
+    )
+    # Only some designs have been generated
+    survey._question_sets.question(3, 1)
+    survey.save(tmp_path)
+    loaded = MaxDiffSurvey.load(tmp_path)
+
+    assert loaded.lazy_designs
+    pd.testing.assert_series_equal(
+        loaded.get_design_versions(), survey.get_design_versions()
+    )
+    for participant_id in (3, 17):
+        np.testing.assert_array_equal(
+            loaded._question_sets.question(participant_id, 2),
+            survey._question_sets.question(participant_id, 2),
+        )
+
+
+def test_memory_mapped_changes_stay_in_memory_until_saved(answered_survey, tmp_path):
+    answered_survey.save(tmp_path)
+    saved_highest = np.load(tmp_path / "highest.npy")
+
+    loaded = MaxDiffSurvey.load(tmp_path)
+    lowest, highest = loaded.get_response(1, 1)
+    loaded.add_response(1, 1, (highest, lowest))
+    np.testing.assert_array_equal(np.load(tmp_path / "highest.npy"), saved_highest)
+
+    # Saving back to the directory the arrays are mapped from
+    loaded.save(tmp_path)
+    assert MaxDiffSurvey.load(tmp_path).get_response(1, 1) == (highest, lowest)
+
+
+def test_newer_formats_are_rejected(answered_survey, tmp_path):
+    answered_survey.save(tmp_path)
+    header = json.loads((tmp_path / "survey.json").read_text())
+    header["format_version"] += 1
+    (tmp_path / "survey.json").write_text(json.dumps(header))
+    with pytest.raises(ValueError, match="not supported"):
+        MaxDiffSurvey.load(tmp_path)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.MaxDiff import ChoiceData, fit_maxdiff_logit
+
+
+@pytest.fixture
+def segmented_survey(answered_survey):
+    participant_ids = np.arange(1, 61)
+    answered_survey.set_respondent_attributes(
+        pd.DataFrame(
+            {
+                "participant_id": participant_ids,
+                "region": np.where(participant_ids % 3 == 0, "north", "south"),
+                "tier": np.where(participant_ids <= 30, "free", "paid"),
+            }
+        ).query("participant_id != 1")
+    )
+    return answered_survey
+
+
+def test_segments_match_separate_fits(segmented_survey):
+    segmented_survey.run_segmented("region")
+    model = segmented_survey._segmented_model
+    assert list(model["item_utilities"].index) == ["north", "south"]
+    # Participant 1 has no attributes and is left out
+    assert model["n_respondents"].to_dict() == {"north": 20, "south": 39}
+
+    choice_data = segmented_survey.get_choice_data()
+    north = (choice_data.respondent % 3 == 0) & (choice_data.respondent != 1)
+    result = fit_maxdiff_logit(ChoiceData(*(field[north] for field in choice_data)), 8)
+    np.testing.assert_allclose(
+        model["item_utilities"].loc["north"].to_numpy()[1:], result["params"]
+    )
+    np.testing.assert_allclose(model["standard_errors"].loc["north"], result["bse"])
+    assert model["n_questions"]["north"] == north.sum()
+
+
+def test_segments_fit_in_parallel(segmented_survey):
+    segmented_survey.run_segmented(["region", "tier"])
+    serial = segmented_survey._segmented_model["item_utilities"]
+    assert len(serial) == 4
+    segmented_survey.run_segmented(["region", "tier"], n_jobs=2)
+    pd.testing.assert_frame_equal(
+        segmented_survey._segmented_model["item_utilities"], serial
+    )
+
+
+def test_segments_need_known_attributes(answered_survey):
+    with pytest.raises(ValueError):
+        answered_survey.run_segmented("region")
+    answered_survey.set_respondent_attributes(
+        pd.DataFrame({"region": ["north"]}, index=pd.Index([1], name="participant_id"))
+    )
+    with pytest.raises(ValueError):
+        answered_survey.run_segmented("country")
+    with pytest.raises(ValueError):
+        answered_survey.set_respondent_attributes(
+            pd.DataFrame({"participant_id": [61], "region": ["north"]})
+        )
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey
+from utils.SharedStore import SharedStore
+
+
+def test_values_are_computed_once():
+    store = SharedStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(10)
+
+    first = store.get_or_compute("key", compute)
+    assert store.get_or_compute("key", compute) is first
+    assert len(calls) == 1
+    stats = store.stats()
+    assert (stats["n_values"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["size"] == first.nbytes
+
+
+def test_concurrent_requests_wait_for_the_running_computation():
+    store = SharedStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(store.get_or_compute("key", compute))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_failed_computations_are_not_stored():
+    store = SharedStore()
+
+    def fail():
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        store.get_or_compute("key", fail)
+    assert store.get_or_compute("key", lambda: 1) == 1
+
+
+def test_least_recently_used_values_are_evicted():
+    store = SharedStore(max_bytes=2500)
+    for key in ("a", "b"):
+        store.get_or_compute(key, lambda: np.zeros(1000, dtype=np.uint8))
+    store.get_or_compute("a", pytest.fail)
+    store.get_or_compute("c", lambda: np.zeros(1000, dtype=np.uint8))
+    assert store.stats()["size"] == 2000
+
+    store.get_or_compute("a", pytest.fail)
+    with pytest.raises(pytest.fail.Exception):
+        store.get_or_compute("b", pytest.fail)
+    # Values larger than the store are returned but not kept
+    store.get_or_compute("d", lambda: np.zeros(3000, dtype=np.uint8))
+    assert store.stats()["n_values"] == 2
+
+
+def test_surveys_share_designs_choice_data_and_results(answered_survey):
+    store = SharedStore()
+
+    def make_survey():
+        survey = MaxDiffSurvey(
+            answered_survey.items,
+            n_items_per_question=4,
+            n_questions_per_participant=6,
+            n_participants=60,
+            shared_store=store,
+        )
+        survey.add_responses(answered_survey.get_responses().reset_index())
+        return survey
+
+    first, second = make_survey(), make_survey()
+    assert first._question_sets.arrays()[0] is second._question_sets.arrays()[0]
+    assert first.get_choice_data() is second.get_choice_data()
+
+    first.run_multinomial_logit()
+    second.run_multinomial_logit()
+    assert (
+        first._multinomial_logit_model["result"]
+        is second._multinomial_logit_model["result"]
+    )
+
+    # Shared arrays cannot be changed by accident
+    with pytest.raises(ValueError):
+        first.get_choice_data().best[0] = 0
+
+    # Different responses do not share results
+    lowest, highest = second.get_response(1, 1)
+    second.add_response(1, 1, (highest, lowest))
+    assert second.get_choice_data() is not first.get_choice_data()
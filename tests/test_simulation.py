@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from utils.MaxDiff import MaxDiffSurvey, plan_sample_size, simulate_best_worst
+
+
+def test_simulated_choices_are_shown_and_distinct():
+    rng = np.random.default_rng(0)
+    question_items = np.array([[[1, 2, 3, 4], [5, 6, 7, 8]]] * 100)
+    lowest, highest = simulate_best_worst(question_items, np.zeros(8), rng)
+    assert lowest.shape == highest.shape == (100, 2)
+    assert (lowest != highest).all()
+    assert np.isin(highest[:, 0], [1, 2, 3, 4]).all()
+    assert np.isin(lowest[:, 1], [5, 6, 7, 8]).all()
+
+
+def test_simulated_choices_follow_the_utilities():
+    rng = np.random.default_rng(0)
+    question_items = np.tile([1, 2, 3, 4], (5000, 1, 1))
+    lowest, highest = simulate_best_worst(question_items, [3.0, 0, 0, -3.0], rng)
+    assert np.mean(highest == 1) > 0.8
+    assert np.mean(lowest == 4) > 0.8
+
+
+def test_random_responses_are_reproducible():
+    def simulate(**kwargs):
+        survey = MaxDiffSurvey([f"Item {i}" for i in range(6)], 3, 4, 20)
+        survey.generate_random_responses(**kwargs)
+        return survey.get_response_fingerprint()
+
+    assert simulate() == simulate()
+    assert simulate(seed=1) == simulate(seed=1)
+    assert simulate(seed=1) != simulate(seed=2)
+
+
+def test_random_responses_keep_answered_questions(answered_survey):
+    answered_survey._set_responses(0, 0, 0)
+    lowest, highest = answered_survey.get_response(1, 2)
+    answered_survey.generate_random_responses(seed=7)
+    assert answered_survey.get_response(1, 2) == (lowest, highest)
+    assert answered_survey.get_progress()["complete"]
+
+
+def test_true_utilities_must_match_the_items(answered_survey):
+    with pytest.raises(ValueError):
+        answered_survey.generate_random_responses(true_utilities=[1.0, 2.0])
+
+
+def test_sample_size_plan_improves_with_more_respondents():
+    plan = plan_sample_size(6, 3, 6, [20, 200], n_replicates=20)
+    assert list(plan.index) == [20, 200]
+    assert plan.loc[200, "mean_se"] < plan.loc[20, "mean_se"]
+    assert plan.loc[200, "rmse"] < plan.loc[20, "rmse"]
+
+
+def test_best_only_plans_need_more_respondents():
+    # The Analyze page fits best choices only, which the planner must match
+    best_only = plan_sample_size(6, 3, 6, [100], n_replicates=20, best_worst=False)
+    best_worst = plan_sample_size(6, 3, 6, [100], n_replicates=20, best_worst=True)
+    assert best_only.loc[100, "mean_se"] > 1.2 * best_worst.loc[100, "mean_se"]
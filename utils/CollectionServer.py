@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from utils.MaxDiff import MaxDiffSurvey
+
+ANSWER_COLUMNS = ["participant_id", "question_number", "lowest", "highest"]
+STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+# Responses collected by the server, stored in a SQLite database in WAL mode
+# so that other processes (e.g. the Streamlit app) can read while the server
+# writes. Rows are only ever appended; the latest row of a question wins.
+class ResponseStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                participant_id INTEGER NOT NULL,
+                question_number INTEGER NOT NULL,
+                lowest INTEGER NOT NULL,
+                highest INTEGER NOT NULL,
+                received_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    # Append (n, 4) rows of (participant_id, question_number, lowest, highest)
+    # in a single transaction
+    def append(self, rows: np.ndarray):
+        received_at = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO responses (participant_id, question_number, lowest, "
+                "highest, received_at) VALUES (?, ?, ?, ?, ?)",
+                [(*map(int, row), received_at) for row in rows],
+            )
+
+    # Rows stored after row id `after` as an (n, 4) array, with the id of the
+    # last row read (`after` if there are none)
+    def read(self, after: int = 0) -> tuple[np.ndarray, int]:
+        cursor = self._connection.execute(
+            "SELECT id, participant_id, question_number, lowest, highest "
+            "FROM responses WHERE id > ? ORDER BY id",
+            (after,),
+        )
+        rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 5)
+        last = int(rows[-1, 0]) if len(rows) else after
+        return rows[:, 1:], last
+
+    # Add the rows stored after row id `after` to the survey and return the
+    # id of the last row added, to pass as `after` on the next call
+    def sync(self, survey: MaxDiffSurvey, after: int = 0) -> int:
+        rows, last = self.read(after)
+        if len(rows):
+            survey.add_responses(rows)
+        return last
+
+
+# Asyncio HTTP/1.1 server for fielding a survey to many respondents at once.
+# Endpoints (JSON bodies and responses):
+# - GET /participants/{id}/questions: wording and question sets of a
+#   participant, with item ids and labels
+# - POST /responses: one answer {participant_id, question_number, lowest,
+#   highest} or a list of them; all are rejected if any is invalid
+# - GET /progress: see MaxDiffSurvey.get_progress
+# Answers are validated against the survey, queued and committed to the
+# store in batches by a single writer thread: everything that arrives while
+# a commit runs goes into the next one. A request is answered once its
+# answers are committed, and the in-memory survey is updated after each
+# commit.
+class CollectionServer:
+    def __init__(
+        self,
+        survey: MaxDiffSurvey,
+        store: ResponseStore,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_batch_size: int = 10_000,
+        max_body_size: int = 1 << 20,
+    ):
+        self.survey = survey
+        self.store = store
+        self.host = host
+        self.port = port
+        self.max_batch_size = max_batch_size
+        self.max_body_size = max_body_size
+        self._queue = None
+        self._server = None
+        self._writer_task = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_batches())
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        self._executor.shutdown()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get("content-length", 0))
+                if content_length > self.max_body_size:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(content_length)
+                    status, payload = await self._route(method, target, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        parts = target.split("?")[0].strip("/").split("/")
+        if parts == ["responses"]:
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            return await self._post_responses(body)
+        if method != "GET":
+            return 405, {"error": "use GET"}
+        if parts == ["progress"]:
+            return 200, self.survey.get_progress()
+        if len(parts) == 3 and parts[0] == "participants" and parts[2] == "questions":
+            return self._get_questions(parts[1])
+        return 404, {"error": "not found"}
+
+    def _get_questions(self, participant: str) -> tuple[int, dict]:
+        survey = self.survey
+        participant_id = int(participant) if participant.isdigit() else 0
+        if not 1 <= participant_id <= survey.n_participants:
+            return 404, {"error": f"participant {participant} not found"}
+        return 200, {
+            "participant_id": participant_id,
+            "question_text": survey.question_text,
+            "low_response_option": survey.low_response_option,
+            "high_response_option": survey.high_response_option,
+            "questions": [
+                {
+                    "question_number": question_number,
+                    "items": [
+                        {"id": item, "label": survey._items_dict[item]}
+                        for item in survey._question_sets.question(
+                            participant_id, question_number
+                        ).tolist()
+                    ],
+                }
+                for question_number in range(1, survey.n_questions_per_participant + 1)
+            ],
+        }
+
+    async def _post_responses(self, body: bytes) -> tuple[int, dict]:
+        try:
+            answers = json.loads(body)
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if isinstance(answers, dict):
+            answers = [answers]
+        if not isinstance(answers, list) or not answers:
+            return 400, {"error": "body must be an answer or a list of answers"}
+
+        errors = {}
+        for i, answer in enumerate(answers):
+            error = self._answer_error(answer)
+            if error is not None:
+                errors[i] = error
+        if errors:
+            return 400, {
+                "error": "invalid answers, nothing was stored",
+                "invalid": dict(list(errors.items())[:100]),
+            }
+
+        rows = np.array(
+            [[answer[column] for column in ANSWER_COLUMNS] for answer in answers],
+            dtype=np.int64,
+        )
+        committed = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((rows, committed))
+        try:
+            await committed
+        except Exception as error:
+            return 500, {"error": f"answers could not be stored: {error}"}
+        return 200, {"stored": len(rows)}
+
+    # Why an answer is invalid (as in MaxDiffSurvey.add_responses, but both
+    # choices are required), None if it is valid. Single answers are checked
+    # in plain Python, which is much faster than the vectorized checks.
+    def _answer_error(self, answer) -> str | None:
+        survey = self.survey
+        if not isinstance(answer, dict) or not set(ANSWER_COLUMNS) <= set(answer):
+            return f"answers need {ANSWER_COLUMNS}"
+        values = [answer[column] for column in ANSWER_COLUMNS]
+        if not all(type(value) is int for value in values):
+            return "values must be integers"
+        participant_id, question_number, lowest, highest = values
+        if not 1 <= participant_id <= survey.n_participants:
+            return "participant not found"
+        if not 1 <= question_number <= survey.n_questions_per_participant:
+            return "question number out of range"
+        items = survey._question_sets.question(participant_id, question_number)
+        if lowest not in items:
+            return "lowest item not in question"
+        if highest not in items:
+            return "highest item not in question"
+        if lowest == highest:
+            return "lowest and highest are the same"
+        return None
+
+    # Commit queued answers in batches, one transaction per batch
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            while not self._queue.empty() and n_rows < self.max_batch_size:
+                batch.append(self._queue.get_nowait())
+                n_rows += len(batch[-1][0])
+
+            # Every request of the batch is answered, whatever fails. If the
+            # survey cannot be updated, the answers are in the store anyway
+            # and a retry stores them again, which changes nothing.
+            rows = np.concatenate([rows for rows, _ in batch])
+            try:
+                await loop.run_in_executor(self._executor, self.store.append, rows)
+                # Answers with both choices were validated on arrival and
+                # cannot conflict with each other
+                self.survey.add_responses(rows)
+            except Exception as error:
+                for _, committed in batch:
+                    if not committed.done():
+                        committed.set_exception(error)
+            else:
+                for _, committed in batch:
+                    if not committed.done():
+                        committed.set_result(None)
+
+
+# Serve a survey saved with MaxDiffSurvey.save, collecting into a store:
+#   python -m utils.CollectionServer survey_dir responses.db [--port 8000]
+# Responses already in the store are loaded into the survey first.
+def main():
+    parser = argparse.ArgumentParser(
+        description="Collect MaxDiff survey responses over HTTP"
+    )
+    parser.add_argument("survey", help="directory of a saved survey")
+    parser.add_argument("store", help="SQLite file to store responses in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    survey = MaxDiffSurvey.load(args.survey)
+    store = ResponseStore(args.store)
+    store.sync(survey)
+    server = CollectionServer(survey, store, args.host, args.port)
+    print(f"Collecting responses on http://{args.host}:{args.port}")
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
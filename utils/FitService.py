@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable
+
+
+# Raised from the progress callback of a cancelled job, which stops the
+# estimator at its next iteration
+class FitCancelled(Exception):
+    pass
+
+
+# Handle of a model fit running in the background. The estimator reports
+# its progress after every iteration (see the callback argument of the
+# MaxDiffSurvey estimators): progress holds the latest report, e.g. the
+# iteration, the log-likelihood and the current params as partial result.
+class FitJob:
+    def __init__(self, key=None):
+        self.key = key
+        self.progress = {}
+        self._cancel = threading.Event()
+        self._future: Future | None = None
+        self._started_at = None
+        self._finished_at = None
+
+    # Progress callback for the estimator
+    def report(self, progress: dict):
+        if self._cancel.is_set():
+            raise FitCancelled()
+        self.progress = progress
+
+    def _run(self, fit: Callable, args: tuple, kwargs: dict):
+        self._started_at = time.monotonic()
+        try:
+            if self._cancel.is_set():
+                raise FitCancelled()
+            return fit(*args, callback=self.report, **kwargs)
+        finally:
+            self._finished_at = time.monotonic()
+
+    # Stop the fit at its next iteration (or before it starts). Nothing is
+    # stored on the survey by a cancelled fit.
+    def cancel(self):
+        self._cancel.set()
+        self._future.cancel()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancelled(self) -> bool:
+        return self.status == "cancelled"
+
+    # "queued", "running", "cancelled", "failed" or "finished"
+    @property
+    def status(self) -> str:
+        if not self._future.done():
+            return "running" if self._future.running() else "queued"
+        if self._future.cancelled() or isinstance(
+            self._future.exception(), FitCancelled
+        ):
+            return "cancelled"
+        return "failed" if self._future.exception() is not None else "finished"
+
+    # Seconds since the fit started (until it finished)
+    @property
+    def elapsed(self) -> float:
+        if self._started_at is None:
+            return 0.0
+        return (self._finished_at or time.monotonic()) - self._started_at
+
+    # Value returned by the fit; raises FitCancelled if it was cancelled and
+    # the estimator's exception if it failed
+    def result(self, timeout: float | None = None):
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            raise FitCancelled() from None
+
+    def exception(self, timeout: float | None = None) -> BaseException | None:
+        if self._future.cancelled():
+            return FitCancelled()
+        return self._future.exception(timeout)
+
+
+# Runs model fits in a thread pool, so that an app stays responsive while
+# they run. Fits are MaxDiffSurvey estimator methods (or functions) taking a
+# callback argument, e.g.
+#   job = service.submit(survey.run_multinomial_logit, best_worst=True)
+# and store their results on the survey as usual once they finish. The
+# numerical work releases the GIL, and estimators with n_jobs > 1 still
+# spread their work over a process pool.
+class FitService:
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fit"
+        )
+
+    # Run fit(*args, callback=..., **kwargs) in the background. key is kept
+    # on the job, e.g. to tell which data it was started for.
+    def submit(self, fit: Callable, *args, key=None, **kwargs) -> FitJob:
+        job = FitJob(key)
+        job._future = self._executor.submit(job._run, fit, args, kwargs)
+        return job
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
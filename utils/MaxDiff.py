@@ -1,9 +1,1516 @@
-import random
-import itertools
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from statsmodels.discrete.conditional_models import ConditionalLogit
+
+from utils.ResponseLog import (
+    ResponseLog,
+    log_file,
+    log_generations,
+    read_response_log,
+    replace_file,
+    write_response_snapshot,
+)
+from utils.SharedStore import SharedStore
+
+
+# Answered questions as integer arrays, one row per question:
+# - respondent: participant id of each question
+# - items: 0-based item indices shown in each question, shape (n_questions, k)
+# - best / worst: position (0..k-1) of the highest / lowest item, -1 if missing
+class ChoiceData(NamedTuple):
+    respondent: np.ndarray
+    items: np.ndarray
+    best: np.ndarray
+    worst: np.ndarray
+
+    @property
+    def n_questions(self) -> int:
+        return self.items.shape[0]
+
+
+# Questions show at least two different items, and no item twice
+def _check_design_size(n_items: int, n_items_per_question: int, n_questions: int):
+    if not 2 <= n_items_per_question <= n_items:
+        raise ValueError(
+            f"Questions must show at least 2 and at most all {n_items} items, "
+            f"got {n_items_per_question}"
+        )
+    if n_questions < 1:
+        raise ValueError(
+            f"Participants must answer at least one question, got {n_questions}"
+        )
+
+
+# Raised by MaxDiffSurvey.add_responses when some rows are invalid. rows
+# holds all of them (by their position in the input) with the reason each
+# was rejected.
+class InvalidResponsesError(ValueError):
+    def __init__(self, message: str, rows: pd.DataFrame):
+        super().__init__(message)
+        self.rows = rows
+
+
+# Greedy balanced designs for a batch of participants, shape
+# (n_participants, n_questions, k) with 1-based item ids. Each slot takes the
+# item shown least often to the participant so far, then the one that has
+# appeared least often with the items already in the question. Afterwards,
+# swapping items between questions (which keeps item frequencies) reduces
+# repeated pairs. All randomness comes from a generator seeded with
+# seed + participant_id, so a participant's design does not depend on the
+# batch it is generated in, and batches can be spread over a process pool
+# with n_jobs > 1 without changing the output.
+def generate_designs(
+    participant_ids: list[int] | np.ndarray,
+    n_items: int,
+    n_items_per_question: int,
+    n_questions: int,
+    seed: int,
+    n_swap_steps: int | None = None,
+    chunk_size: int = 1024,
+    n_jobs: int = 1,
+) -> np.ndarray:
+    _check_design_size(n_items, n_items_per_question, n_questions)
+    participant_ids = np.asarray(participant_ids)
+    if n_jobs > 1 and len(participant_ids) > chunk_size:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(
+                    generate_designs,
+                    batch,
+                    n_items,
+                    n_items_per_question,
+                    n_questions,
+                    seed,
+                    n_swap_steps,
+                    chunk_size,
+                )
+                for batch in np.array_split(participant_ids, n_jobs)
+            ]
+            return np.concatenate([future.result() for future in futures])
+
+    k = n_items_per_question
+    n_swap_steps = 10 * n_questions if n_swap_steps is None else n_swap_steps
+    designs = np.empty((len(participant_ids), n_questions, k), dtype=np.int16)
+
+    # Item frequency dominates the score, pair co-occurrence breaks its ties
+    # and the noise in [0, 1) breaks the remaining ties
+    frequency_weight = n_questions * k
+
+    for start in range(0, len(participant_ids), chunk_size):
+        chunk = participant_ids[start : start + chunk_size]
+        n = len(chunk)
+        rows = np.arange(n)
+        noise = np.empty((n, n_questions, k, n_items), dtype=np.float32)
+        swaps = np.empty((n, n_swap_steps, 4), dtype=np.intp)
+        position_noise = np.empty((n, n_questions, k))
+        for i, participant_id in enumerate(chunk):
+            rng = np.random.default_rng(seed + int(participant_id))
+            noise[i] = rng.random((n_questions, k, n_items), dtype=np.float32)
+            swaps[i] = rng.integers(
+                0, [n_questions, k, n_questions, k], (n_swap_steps, 4)
+            )
+            position_noise[i] = rng.random((n_questions, k))
+
+        design = np.empty((n, n_questions, k), dtype=np.intp)
+        frequency = np.zeros((n, n_items), dtype=np.int32)
+        pairs = np.zeros((n, n_items, n_items), dtype=np.int32)
+
+        for question in range(n_questions):
+            picked = design[:, question]
+            pair_penalty = np.zeros((n, n_items), dtype=np.int32)
+            score_offset = np.zeros((n, n_items))
+            for slot in range(k):
+                score = (
+                    frequency_weight * frequency
+                    + pair_penalty
+                    + noise[:, question, slot]
+                    + score_offset
+                )
+                item = score.argmin(axis=1)
+                picked[:, slot] = item
+                pair_penalty += pairs[rows, item]
+                score_offset[rows, item] = np.inf
+
+            frequency[rows[:, None], picked] += 1
+            pairs[rows[:, None, None], picked[:, :, None], picked[:, None, :]] += 1
+
+        for step in range(n_swap_steps):
+            _swap_for_pair_balance(design, pairs, swaps[:, step])
+
+        # Randomize the order in which the items are displayed
+        order = position_noise.argsort(axis=2)
+        designs[start : start + n] = np.take_along_axis(design, order, axis=2) + 1
+
+    return designs
+
+
+# One vectorized swap step on designs of shape (n, n_questions, k) with 0-based
+# item ids and their co-occurrence counts (n, n_items, n_items). Each
+# participant proposes exchanging item x at (question_a, slot_a) with item y at
+# (question_b, slot_b); the swap is applied if it lowers the sum of squared
+# pair counts.
+def _swap_for_pair_balance(
+    design: np.ndarray, pairs: np.ndarray, proposal: np.ndarray
+) -> None:
+    n, n_items = pairs.shape[:2]
+    k = design.shape[2]
+    rows = np.arange(n)
+    question_a, slot_a, question_b, slot_b = proposal.T
+    items_a, items_b = design[rows, question_a], design[rows, question_b]
+    x, y = items_a[rows, slot_a], items_b[rows, slot_b]
+
+    # Pairs with items shown in both questions are unchanged by the swap
+    shared = items_a[:, :, None] == items_b[:, None, :]
+    changed_a = ~shared.any(axis=2)
+    changed_b = ~shared.any(axis=1)
+    valid = changed_a[rows, slot_a] & changed_b[rows, slot_b]
+    changed_a[rows, slot_a] = False
+    changed_b[rows, slot_b] = False
+
+    # Change in sum of squares: (c - 1)^2 - c^2 = 1 - 2c, (c + 1)^2 - c^2 = 1 + 2c
+    flat_pairs = pairs.reshape(-1)
+    offset = rows[:, None] * n_items * n_items
+    x_a = offset + x[:, None] * n_items + items_a
+    y_a = offset + y[:, None] * n_items + items_a
+    y_b = offset + y[:, None] * n_items + items_b
+    x_b = offset + x[:, None] * n_items + items_b
+    delta = np.where(changed_a, flat_pairs[y_a] - flat_pairs[x_a] + 1, 0).sum(
+        axis=1
+    ) + np.where(changed_b, flat_pairs[x_b] - flat_pairs[y_b] + 1, 0).sum(axis=1)
+
+    accept = valid & (question_a != question_b) & (delta < 0)
+    if not accept.any():
+        return
+
+    # All changed pairs are distinct, so plain fancy indexing is safe
+    changed_a &= accept[:, None]
+    changed_b &= accept[:, None]
+    item_a, item_b = items_a[changed_a], items_b[changed_b]
+    row_a, row_b = np.nonzero(changed_a)[0], np.nonzero(changed_b)[0]
+    x_a, y_a = x[row_a], y[row_a]
+    y_b, x_b = y[row_b], x[row_b]
+    square = n_items * n_items
+    for rows_changed, removed, added, items in (
+        (row_a, x_a, y_a, item_a),
+        (row_b, y_b, x_b, item_b),
+    ):
+        offset = rows_changed * square
+        flat_pairs[offset + removed * n_items + items] -= 1
+        flat_pairs[offset + items * n_items + removed] -= 1
+        flat_pairs[offset + added * n_items + items] += 1
+        flat_pairs[offset + items * n_items + added] += 1
+
+    design[accept, question_a[accept], slot_a[accept]] = y[accept]
+    design[accept, question_b[accept], slot_b[accept]] = x[accept]
+
+
+# MNL information matrix at zero utilities from item co-occurrence counts
+# (diagonal = item frequency): diag(frequency) / k - pairs / k^2
+def _design_information(pairs: np.ndarray, k: int) -> np.ndarray:
+    frequency = np.diagonal(pairs, axis1=-2, axis2=-1)
+    information = -pairs / k**2
+    diagonal = np.einsum("...ii->...i", information)
+    diagonal += frequency / k
+    return information
+
+
+def _summary(values: np.ndarray) -> dict:
+    return {
+        "mean": float(np.mean(values)),
+        "std": float(np.std(values)),
+        "min": float(np.min(values)),
+        "max": float(np.max(values)),
+    }
+
+
+# Balance and efficiency of designs of shape (n_participants, n_questions, k)
+# with 1-based item ids. D-efficiency is det(I)^(1/p) of the per-question MNL
+# information matrix at zero utilities, relative to a perfectly balanced
+# design in which every item and every pair appear equally often; it is
+# reported for the pooled design and for individual designs (0 where an
+# individual design cannot identify all utilities).
+def design_statistics(designs: np.ndarray, n_items: int, chunk_size: int = 512) -> dict:
+    n_participants, n_questions, k = designs.shape
+
+    # Per-question co-occurrence of a perfectly balanced design
+    balanced_pairs = np.full(
+        (n_items, n_items), k * (k - 1) / (n_items * (n_items - 1))
+    )
+    balanced_pairs[np.diag_indices(n_items)] = k / n_items
+    _, balanced_logdet = np.linalg.slogdet(
+        _design_information(balanced_pairs, k)[1:, 1:]
+    )
+
+    def relative_d_efficiency(information):
+        sign, logdet = np.linalg.slogdet(information)
+        return np.where(sign > 0, np.exp((logdet - balanced_logdet) / (n_items - 1)), 0)
+
+    position = np.zeros((k, n_items))
+    np.add.at(position, (np.arange(k), designs.reshape(-1, k) - 1), 1)
+
+    off_diagonal = ~np.eye(n_items, dtype=bool)
+    pooled_pairs = np.zeros((n_items, n_items))
+    frequency_range = np.empty(n_participants)
+    max_pair_frequency = np.empty(n_participants)
+    individual_d_efficiency = np.empty(n_participants)
+    for start in range(0, n_participants, chunk_size):
+        chunk = designs[start : start + chunk_size].astype(np.intp) - 1
+        n = len(chunk)
+        pair_index = (
+            np.arange(n)[:, None, None, None] * n_items * n_items
+            + chunk[:, :, :, None] * n_items
+            + chunk[:, :, None, :]
+        )
+        pairs = np.bincount(
+            pair_index.ravel(), minlength=n * n_items * n_items
+        ).reshape(n, n_items, n_items)
+        pooled_pairs += pairs.sum(axis=0)
+
+        frequency = np.diagonal(pairs, axis1=1, axis2=2)
+        frequency_range[start : start + n] = frequency.max(axis=1) - frequency.min(
+            axis=1
+        )
+        max_pair_frequency[start : start + n] = pairs[:, off_diagonal].max(axis=1)
+        individual_d_efficiency[start : start + n] = relative_d_efficiency(
+            _design_information(pairs, k)[:, 1:, 1:] / n_questions
+        )
+
+    pooled_information = _design_information(pooled_pairs, k)[1:, 1:] / (
+        n_participants * n_questions
+    )
+    return {
+        "item_frequency": _summary(np.diagonal(pooled_pairs)),
+        "pair_frequency": _summary(pooled_pairs[off_diagonal]),
+        "position_frequency": _summary(position),
+        "individual_frequency_range": _summary(frequency_range),
+        "individual_max_pair_frequency": _summary(max_pair_frequency),
+        "d_efficiency": float(relative_d_efficiency(pooled_information)),
+        "individual_d_efficiency": _summary(individual_d_efficiency),
+    }
+
+
+# Simulate best-worst responses to (n, n_questions, k) question sets of item
+# ids from item utilities, either shared (n_items,) or per respondent
+# (n, n_items). Choices follow the sequential best-worst logit: the best item
+# maximizes utility plus Gumbel noise and the worst item minimizes it among
+# the remaining ones. Returns the (lowest, highest) item ids, each (n, n_questions).
+def simulate_best_worst(
+    question_items: np.ndarray, utilities: np.ndarray, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    utilities = np.asarray(utilities, dtype=float)
+    item_index = question_items.astype(np.intp) - 1
+    if utilities.ndim == 1:
+        shown = utilities[item_index]
+    else:
+        respondent = np.arange(len(question_items))[:, None, None]
+        shown = utilities[respondent, item_index]
+
+    best = (shown + rng.gumbel(size=shown.shape)).argmax(axis=2)
+    negated = rng.gumbel(size=shown.shape) - shown
+    np.put_along_axis(negated, best[..., None], -np.inf, axis=2)
+    worst = negated.argmax(axis=2)
+
+    highest = np.take_along_axis(question_items, best[..., None], axis=2)[..., 0]
+    lowest = np.take_along_axis(question_items, worst[..., None], axis=2)[..., 0]
+    return lowest, highest
+
+
+# Log-probabilities and choice probabilities of a single choice from each
+# column of (k, n) utilities; -inf utilities mark alternatives that are not
+# available. Questions are laid out along the last axis so that the
+# reductions over the k alternatives are elementwise operations.
+def _choice_probabilities(
+    utilities: np.ndarray, chosen: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    columns = np.arange(utilities.shape[1])
+    utilities = utilities - utilities.max(axis=0)
+    exp_utilities = np.exp(utilities)
+    denominator = exp_utilities.sum(axis=0)
+    log_probabilities = utilities[chosen, columns] - np.log(denominator)
+    return log_probabilities, exp_utilities / denominator
+
+
+# Log-likelihood, gradient and Hessian of the conditional logit for choice
+# sets of fixed size k, computed over the (n_questions, k) item index matrix.
+# Utilities are reference-coded: params holds items 2..J, item 1 is fixed at 0.
+# If worst positions are given, the sequential best-worst model is used: the
+# worst item is chosen with negated utilities from the k-1 remaining items.
+# Optional weights count each question that many times. pair_index (see
+# _item_pairs) can be passed in to reuse it across evaluations.
+def _logit_derivatives(
+    params: np.ndarray,
+    items: np.ndarray,
+    best: np.ndarray,
+    n_items: int,
+    worst: np.ndarray | None = None,
+    weights: np.ndarray | None = None,
+    pair_index: np.ndarray | None = None,
+) -> tuple[float, np.ndarray, np.ndarray]:
+    loglike, gradient, hessian = _segmented_logit_derivatives(
+        params[None], items, best, n_items, worst, weights, pair_index
+    )
+    return loglike[0], gradient[0], hessian[0]
+
+
+# The same for independent models of several segments at once: params is
+# (n_segments, J-1) and segment holds the segment of each question (all
+# questions belong to a single segment if None). Each segment's derivatives
+# are accumulated with the same bincount passes, offset by segment. Questions
+# are processed in chunks of chunk_size so that intermediates stay in cache.
+def _segmented_logit_derivatives(
+    params: np.ndarray,
+    items: np.ndarray,
+    best: np.ndarray,
+    n_items: int,
+    worst: np.ndarray | None = None,
+    weights: np.ndarray | None = None,
+    pair_index: np.ndarray | None = None,
+    segment: np.ndarray | None = None,
+    chunk_size: int = 32768,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n_segments = params.shape[0]
+    if pair_index is None:
+        pair_index = _item_pairs(items, n_items, segment)
+
+    if len(best) > chunk_size:
+        totals = None
+        for start in range(0, len(best), chunk_size):
+            rows = slice(start, start + chunk_size)
+            chunk = _segmented_logit_derivatives(
+                params,
+                items[rows],
+                best[rows],
+                n_items,
+                None if worst is None else worst[rows],
+                None if weights is None else weights[rows],
+                pair_index[:, rows],
+                None if segment is None else segment[rows],
+                chunk_size,
+            )
+            totals = chunk if totals is None else [a + b for a, b in zip(totals, chunk)]
+        return tuple(totals)
+
+    # Work in the (k, n_questions) layout throughout, with item indices offset
+    # by segment into the flattened (n_segments, J) utilities
+    items = np.ascontiguousarray(items.T)
+    if segment is not None:
+        items = items + segment * n_items
+    utilities = np.column_stack([np.zeros(n_segments), params]).ravel()[items]
+    first, second = np.triu_indices(items.shape[0], 1)
+
+    # (questions, utilities, chosen position, sign of the utilities) per choice
+    stages = [(slice(None), utilities, best, 1.0)]
+    if worst is not None:
+        has_worst = worst >= 0
+        worst_rows = slice(None) if has_worst.all() else np.flatnonzero(has_worst)
+        remaining = -utilities[:, worst_rows]
+        remaining[best[worst_rows], np.arange(remaining.shape[1])] = -np.inf
+        stages.append((worst_rows, remaining, worst[worst_rows], -1.0))
+
+    loglike = np.zeros(n_segments)
+    gradient = np.zeros(n_segments * n_items)
+    diagonal = np.zeros(n_segments * n_items)
+    pair_information = np.zeros(n_segments * n_items * n_items)
+    for stage_rows, stage_utilities, chosen, sign in stages:
+        log_probabilities, probabilities = _choice_probabilities(
+            stage_utilities, chosen
+        )
+        residuals = -probabilities
+        residuals[chosen, np.arange(residuals.shape[1])] += 1
+        weighted_probabilities = probabilities
+        if weights is not None:
+            stage_weights = weights[stage_rows]
+            log_probabilities = log_probabilities * stage_weights
+            residuals *= stage_weights
+            weighted_probabilities = probabilities * stage_weights
+
+        if segment is None:
+            loglike += log_probabilities.sum()
+        else:
+            loglike += np.bincount(
+                segment[stage_rows], log_probabilities, minlength=n_segments
+            )
+
+        # Information matrix: sum over choices of diag(p) - p p', with the
+        # off-diagonal terms accumulated once per pair and mirrored below
+        stage_items = items[:, stage_rows].ravel()
+        gradient += sign * np.bincount(
+            stage_items, residuals.ravel(), minlength=n_segments * n_items
+        )
+        diagonal += np.bincount(
+            stage_items,
+            (weighted_probabilities * (1 - probabilities)).ravel(),
+            minlength=n_segments * n_items,
+        )
+        pair_information += np.bincount(
+            pair_index[:, stage_rows].ravel(),
+            (weighted_probabilities[first] * probabilities[second]).ravel(),
+            minlength=n_segments * n_items * n_items,
+        )
+
+    pair_information = pair_information.reshape(n_segments, n_items, n_items)
+    information = -pair_information - pair_information.transpose(0, 2, 1)
+    information[:, np.arange(n_items), np.arange(n_items)] += diagonal.reshape(
+        n_segments, n_items
+    )
+    gradient = gradient.reshape(n_segments, n_items)
+    return loglike, gradient[:, 1:], -information[:, 1:, 1:]
+
+
+# Flat (segment, item, item) index of every pair of positions a < b in each
+# question, shape (k * (k - 1) / 2, n_questions)
+def _item_pairs(
+    items: np.ndarray, n_items: int, segment: np.ndarray | None = None
+) -> np.ndarray:
+    first, second = np.triu_indices(items.shape[1], 1)
+    pair_index = items.T[first] * n_items + items.T[second]
+    if segment is not None:
+        pair_index += segment * n_items * n_items
+    return pair_index
+
+
+# Progress callback that adds fixed entries (e.g. the chain) to every report
+def _tagged_callback(
+    callback: Callable[[dict], None] | None, **tags
+) -> Callable[[dict], None] | None:
+    if callback is None:
+        return None
+    return lambda progress: callback({**tags, **progress})
+
+
+# Fit the conditional logit by Newton-Raphson with step halving. Optional
+# weights count each question that many times (e.g. bootstrap resamples).
+# callback is called after every iteration with the iteration, the
+# log-likelihood and the current params (and can stop the fit by raising).
+# Steps use the pseudo-inverse, so items that were never shown keep their
+# start values. With few responses, the data are often separated (e.g. an
+# item was chosen every time it was shown): the log-likelihood then flattens
+# out while the utilities of some items keep growing. Such fits stop once
+# the log-likelihood no longer improves, but are not converged, and these
+# utilities, like those of items never shown, have NaN standard errors.
+def fit_maxdiff_logit(
+    choice_data: ChoiceData,
+    n_items: int,
+    best_worst: bool = False,
+    start_params: np.ndarray | None = None,
+    tol: float = 1e-8,
+    maxiter: int = 100,
+    weights: np.ndarray | None = None,
+    callback: Callable[[dict], None] | None = None,
+) -> dict:
+    items, best = choice_data.items, choice_data.best
+    worst = choice_data.worst if best_worst else None
+    params = np.zeros(n_items - 1) if start_params is None else start_params.copy()
+    pair_index = _item_pairs(items, n_items)
+
+    def derivatives(params):
+        return _logit_derivatives(
+            params, items, best, n_items, worst, weights, pair_index
+        )
+
+    loglike, gradient, hessian = derivatives(params)
+    for iteration in range(1, maxiter + 1):
+        step = np.linalg.pinv(hessian) @ gradient
+        step_size = 1.0
+        while True:
+            candidate = params - step_size * step
+            candidate_loglike, candidate_gradient, candidate_hessian = derivatives(
+                candidate
+            )
+            if candidate_loglike >= loglike - 1e-12 or step_size < 1e-8:
+                break
+            step_size /= 2
+
+        improvement = candidate_loglike - loglike
+        params, loglike = candidate, candidate_loglike
+        gradient, hessian = candidate_gradient, candidate_hessian
+        step = step_size * step
+        if callback is not None:
+            callback({"iteration": iteration, "llf": loglike, "params": params})
+        if np.max(np.abs(step)) < tol or abs(improvement) < tol:
+            break
+
+    # Newton steps shrink quadratically near the optimum, while utilities
+    # that run off on separated data still move by about 1 per step
+    diverging = np.abs(step) >= np.sqrt(tol)
+    cov_params = np.linalg.pinv(-hessian)
+    bse = np.sqrt(np.diag(cov_params))
+    bse[diverging | (np.diag(hessian) == 0)] = np.nan
+    k = items.shape[1]
+    if weights is None:
+        weights = np.ones(choice_data.n_questions)
+    llnull = -weights.sum() * np.log(k)
+    if best_worst:
+        llnull -= weights[worst >= 0].sum() * np.log(k - 1)
+    return {
+        "params": params,
+        "bse": bse,
+        "cov_params": cov_params,
+        "llf": loglike,
+        "llnull": llnull,
+        "n_iterations": iteration,
+        "converged": not diverging.any(),
+    }
+
+
+# Fit separate conditional logits for n_segments segments in one batched
+# Newton-Raphson run. segment holds the (0-based) segment of each question.
+# Every segment takes its own step size and stops once converged. Steps use
+# the pseudo-inverse, so segments in which some items are never shown do not
+# hold back the others. With n_jobs > 1, groups of segments are fit in a
+# process pool.
+def fit_segmented_logit(
+    choice_data: ChoiceData,
+    segment: np.ndarray,
+    n_segments: int,
+    n_items: int,
+    best_worst: bool = False,
+    tol: float = 1e-8,
+    maxiter: int = 100,
+    n_jobs: int = 1,
+) -> dict:
+    if n_jobs > 1 and n_segments > 1:
+        groups = [
+            group
+            for group in np.array_split(np.arange(n_segments), n_jobs)
+            if len(group)
+        ]
+        with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+            futures = []
+            for group in groups:
+                rows = (segment >= group[0]) & (segment <= group[-1])
+                futures.append(
+                    executor.submit(
+                        fit_segmented_logit,
+                        ChoiceData(*(field[rows] for field in choice_data)),
+                        segment[rows] - group[0],
+                        len(group),
+                        n_items,
+                        best_worst,
+                        tol,
+                        maxiter,
+                    )
+                )
+            results = [future.result() for future in futures]
+        return {
+            key: np.concatenate([result[key] for result in results])
+            for key in results[0]
+        }
+
+    items, best = choice_data.items, choice_data.best
+    worst = choice_data.worst if best_worst else None
+    pair_index = _item_pairs(items, n_items, segment)
+
+    def derivatives(params):
+        return _segmented_logit_derivatives(
+            params, items, best, n_items, worst, None, pair_index, segment
+        )
+
+    params = np.zeros((n_segments, n_items - 1))
+    loglike, gradient, hessian = derivatives(params)
+    converged = np.zeros(n_segments, dtype=bool)
+    n_iterations = np.zeros(n_segments, dtype=int)
+    for _ in range(maxiter):
+        step = np.einsum("sij,sj->si", np.linalg.pinv(hessian), gradient)
+        step[converged] = 0
+        step_size = np.ones(n_segments)
+        while True:
+            candidate = params - step_size[:, None] * step
+            candidate_loglike, candidate_gradient, candidate_hessian = derivatives(
+                candidate
+            )
+            # Steps below tol are accepted as is, rounding noise in the
+            # log-likelihood would otherwise halve them down to nothing
+            rejected = (
+                (candidate_loglike < loglike - 1e-12)
+                & (step_size >= 1e-8)
+                & (np.abs(step_size[:, None] * step).max(axis=1) >= tol)
+            )
+            if not rejected.any():
+                break
+            step_size[rejected] /= 2
+
+        improvement = candidate_loglike - loglike
+        params, loglike = candidate, candidate_loglike
+        gradient, hessian = candidate_gradient, candidate_hessian
+        n_iterations[~converged] += 1
+        converged |= (np.abs(step_size[:, None] * step).max(axis=1) < tol) | (
+            np.abs(improvement) < tol
+        )
+        if converged.all():
+            break
+
+    cov_params = np.linalg.pinv(-hessian)
+    return {
+        "params": params,
+        "bse": np.sqrt(np.diagonal(cov_params, axis1=1, axis2=2)),
+        "cov_params": cov_params,
+        "llf": loglike,
+        "n_questions": np.bincount(segment, minlength=n_segments),
+        "n_iterations": n_iterations,
+        "converged": converged,
+    }
+
+
+# Fold new questions into an existing logit fit with a single Newton step.
+# The earlier questions enter through their accumulated information matrix,
+# i.e. a quadratic approximation of their log-likelihood around the current
+# estimates (where their gradient is zero), so the cost only depends on the
+# number of new questions. Returns the updated params and information.
+def update_maxdiff_logit(
+    params: np.ndarray,
+    information: np.ndarray,
+    choice_data: ChoiceData,
+    n_items: int,
+    best_worst: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    worst = choice_data.worst if best_worst else None
+    _, gradient, hessian = _logit_derivatives(
+        params, choice_data.items, choice_data.best, n_items, worst
+    )
+    information = information - hessian
+    return params + np.linalg.pinv(information) @ gradient, information
+
+
+# Bootstrap replicates for bootstrap_maxdiff_logit. Each replicate draws
+# respondents with replacement and refits with every question weighted by
+# how often its respondent was drawn; questions of respondents that were not
+# drawn are left out. Newton converges quadratically from the warm start, so a
+# step below 1e-4 leaves an error far below the sampling noise.
+def _run_bootstrap_replicates(
+    choice_data: ChoiceData,
+    n_items: int,
+    best_worst: bool,
+    start_params: np.ndarray,
+    n_replicates: int,
+    seed: np.random.SeedSequence,
+    callback: Callable[[dict], None] | None = None,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    _, respondent = np.unique(choice_data.respondent, return_inverse=True)
+    n_respondents = respondent.max() + 1
+
+    params = np.empty((n_replicates, n_items - 1))
+    for replicate in range(n_replicates):
+        draws = rng.integers(0, n_respondents, n_respondents)
+        weights = np.bincount(draws, minlength=n_respondents)[respondent]
+        drawn = weights > 0
+        params[replicate] = fit_maxdiff_logit(
+            ChoiceData(*(field[drawn] for field in choice_data)),
+            n_items,
+            best_worst=best_worst,
+            start_params=start_params,
+            tol=1e-4,
+            weights=weights[drawn].astype(float),
+        )["params"]
+        if callback is not None:
+            callback({"replicate": replicate + 1})
+    return params
+
+
+# Respondent-level bootstrap of the conditional logit: n_bootstrap refits on
+# respondents resampled with replacement, each starting from start_params
+# (the full-sample estimates by default). Replicates are spread over n_jobs
+# processes. Returns the (n_bootstrap, n_items - 1) parameter draws.
+# callback gets the number of replicates done, after every replicate (or
+# with n_jobs > 1, every finished chunk of replicates).
+def bootstrap_maxdiff_logit(
+    choice_data: ChoiceData,
+    n_items: int,
+    best_worst: bool = False,
+    n_bootstrap: int = 1000,
+    start_params: np.ndarray | None = None,
+    n_jobs: int = 1,
+    seed: int = 42,
+    callback: Callable[[dict], None] | None = None,
+) -> np.ndarray:
+    if start_params is None:
+        start_params = fit_maxdiff_logit(choice_data, n_items, best_worst=best_worst)[
+            "params"
+        ]
+
+    # With n_jobs > 1, each process runs a few chunks of replicates in turn,
+    # so that progress is reported (and cancellation noticed) along the way
+    n_chunks = 4 * n_jobs if n_jobs > 1 else 1
+    chunks = [
+        len(chunk)
+        for chunk in np.array_split(np.arange(n_bootstrap), n_chunks)
+        if len(chunk)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    replicate_args = (choice_data, n_items, best_worst, start_params)
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(_run_bootstrap_replicates, *replicate_args, size, s)
+                for size, s in zip(chunks, seeds)
+            ]
+            draws = []
+            try:
+                for future in futures:
+                    draws.append(future.result())
+                    if callback is not None:
+                        callback(
+                            {
+                                "replicate": sum(len(chunk) for chunk in draws),
+                                "n_bootstrap": n_bootstrap,
+                            }
+                        )
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    else:
+        draws = [
+            _run_bootstrap_replicates(
+                *replicate_args,
+                size,
+                s,
+                callback=_tagged_callback(callback, n_bootstrap=n_bootstrap),
+            )
+            for size, s in zip(chunks, seeds)
+        ]
+    return np.concatenate(draws)
+
+
+# Precomputed gather indices for evaluating per-respondent log-likelihoods
+# repeatedly. Each stage is a single choice per question as
+# (sign, flat index into the (n_respondents, n_items) utilities laid out as
+# (k, n_questions), position of the chosen item, respondent row); the worst
+# stage gathers only the k-1 items left after the best choice.
+def _respondent_choice_stages(
+    choice_data: ChoiceData, n_items: int, best_worst: bool
+) -> list[tuple[float, np.ndarray, np.ndarray, np.ndarray]]:
+    respondent, items, best, worst = choice_data
+    flat_items = respondent[:, None] * n_items + items
+    stages = [(1.0, np.ascontiguousarray(flat_items.T), best, respondent)]
+
+    if best_worst:
+        worst_rows = np.flatnonzero(worst >= 0)
+        k = items.shape[1]
+        positions = np.arange(k)
+        is_rest = positions != best[worst_rows, None]
+        rest = flat_items[worst_rows][is_rest].reshape(-1, k - 1)
+        rest_worst = worst[worst_rows] - (worst[worst_rows] > best[worst_rows])
+        stages.append(
+            (-1.0, np.ascontiguousarray(rest.T), rest_worst, respondent[worst_rows])
+        )
+
+    return stages
+
+
+# Per-respondent log-likelihood for respondent-level utilities of shape
+# (n_respondents, n_items), with all reductions over k running across
+# contiguous rows of length n_questions
+def _respondent_loglike(
+    utilities: np.ndarray,
+    stages: list[tuple[float, np.ndarray, np.ndarray, np.ndarray]],
+) -> np.ndarray:
+    loglike = np.zeros(utilities.shape[0])
+    flat_utilities = utilities.ravel()
+    for sign, flat_index, chosen, respondent in stages:
+        question_utilities = sign * flat_utilities[flat_index]
+        max_utilities = question_utilities.max(axis=0)
+        log_denominator = (
+            np.log(np.exp(question_utilities - max_utilities).sum(axis=0))
+            + max_utilities
+        )
+        chosen_utilities = question_utilities.ravel()[
+            chosen * question_utilities.shape[1] + np.arange(chosen.size)
+        ]
+        loglike += np.bincount(
+            respondent, chosen_utilities - log_denominator, minlength=loglike.size
+        )
+    return loglike
+
+
+# Draw from an inverse Wishart distribution via the Bartlett decomposition
+def _sample_inverse_wishart(
+    df: float, scale: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    p = scale.shape[0]
+    chol = np.linalg.cholesky(np.linalg.inv(scale))
+    bartlett = np.tril(rng.standard_normal((p, p)), -1)
+    bartlett[np.diag_indices(p)] = np.sqrt(rng.chisquare(df - np.arange(p)))
+    factor = chol @ bartlett
+    return np.linalg.inv(factor @ factor.T)
+
+
+# Split-chain potential scale reduction factor (R-hat) for draws of shape
+# (n_chains, n_draws, n_params)
+def _split_rhat(draws: np.ndarray) -> np.ndarray:
+    n_draws = draws.shape[1] // 2
+    halves = np.concatenate(
+        [draws[:, :n_draws], draws[:, n_draws : 2 * n_draws]], axis=0
+    )
+    within = halves.var(axis=1, ddof=1).mean(axis=0)
+    between = n_draws * halves.mean(axis=1).var(axis=0, ddof=1)
+    variance = (n_draws - 1) / n_draws * within + between / n_draws
+    return np.sqrt(variance / within)
+
+
+# A single Gibbs chain of the hierarchical Bayes MNL: respondent utilities
+# are drawn with a random-walk Metropolis step for all respondents at once,
+# followed by Gibbs draws of the population mean and covariance.
+# Priors follow bayesm: mu ~ N(0, 100 I), Sigma ~ IW(p + 3, (p + 3) I).
+def _run_hierarchical_bayes_chain(
+    choice_data: ChoiceData,
+    n_respondents: int,
+    n_items: int,
+    best_worst: bool,
+    n_iterations: int,
+    n_burn: int,
+    start_params: np.ndarray,
+    seed: np.random.SeedSequence,
+    callback: Callable[[dict], None] | None = None,
+) -> dict:
+    rng = np.random.default_rng(seed)
+    stages = _respondent_choice_stages(choice_data, n_items, best_worst)
+    n_params = n_items - 1
+
+    prior_df = n_params + 3
+    prior_scale = prior_df * np.eye(n_params)
+    prior_mean_precision = 1 / 100
+
+    # Respondents start from the initial population distribution N(mu, I)
+    mu = start_params.copy()
+    sigma = np.eye(n_params)
+    beta = mu + rng.standard_normal((n_respondents, n_params))
+    step_size = 2.38 / np.sqrt(n_params)
+    target_acceptance = 0.3
+
+    def loglike_of(beta):
+        utilities = np.column_stack([np.zeros(n_respondents), beta])
+        return _respondent_loglike(utilities, stages)
+
+    loglike = loglike_of(beta)
+    n_keep = n_iterations - n_burn
+    mu_draws = np.empty((n_keep, n_params))
+    loglike_draws = np.empty(n_keep)
+    beta_sum = np.zeros_like(beta)
+    beta_square_sum = np.zeros_like(beta)
+    sigma_sum = np.zeros_like(sigma)
+    n_accepted = 0
+
+    for iteration in range(n_iterations):
+        # Metropolis step for every respondent at once
+        sigma_chol = np.linalg.cholesky(sigma)
+        sigma_inv = np.linalg.inv(sigma)
+        proposal = beta + step_size * rng.standard_normal(beta.shape) @ sigma_chol.T
+        proposal_loglike = loglike_of(proposal)
+        deviation, proposal_deviation = beta - mu, proposal - mu
+        log_prior = -0.5 * np.sum(deviation @ sigma_inv * deviation, axis=1)
+        proposal_log_prior = -0.5 * np.sum(
+            proposal_deviation @ sigma_inv * proposal_deviation, axis=1
+        )
+        log_ratio = proposal_loglike + proposal_log_prior - loglike - log_prior
+        accepted = np.log(rng.random(n_respondents)) < log_ratio
+        beta[accepted] = proposal[accepted]
+        loglike[accepted] = proposal_loglike[accepted]
+        acceptance = accepted.mean()
+
+        # Tune the proposal scale towards the target acceptance during burn-in
+        if iteration < n_burn:
+            step_size *= np.exp(acceptance - target_acceptance)
+
+        # Gibbs step for the population mean
+        posterior_cov = np.linalg.inv(
+            n_respondents * sigma_inv + prior_mean_precision * np.eye(n_params)
+        )
+        posterior_mean = posterior_cov @ (sigma_inv @ beta.sum(axis=0))
+        mu = posterior_mean + np.linalg.cholesky(posterior_cov) @ rng.standard_normal(
+            n_params
+        )
+
+        # Gibbs step for the population covariance
+        deviation = beta - mu
+        sigma = _sample_inverse_wishart(
+            prior_df + n_respondents, prior_scale + deviation.T @ deviation, rng
+        )
+
+        if iteration >= n_burn:
+            keep = iteration - n_burn
+            mu_draws[keep] = mu
+            loglike_draws[keep] = loglike.sum()
+            beta_sum += beta
+            beta_square_sum += beta**2
+            sigma_sum += sigma
+            n_accepted += accepted.sum()
+        if callback is not None:
+            callback(
+                {
+                    "iteration": iteration + 1,
+                    "n_iterations": n_iterations,
+                    "llf": loglike.sum(),
+                    "params": mu,
+                }
+            )
+
+    return {
+        "mu_draws": mu_draws,
+        "loglike_draws": loglike_draws,
+        "beta_mean": beta_sum / n_keep,
+        "beta_square_mean": beta_square_sum / n_keep,
+        "sigma_mean": sigma_sum / n_keep,
+        "acceptance_rate": float(n_accepted / (n_keep * n_respondents)),
+        "step_size": float(step_size),
+    }
+
+
+# Fit a hierarchical Bayes MNL with one or more chains, optionally run in
+# parallel in a process pool. callback gets the progress of each chain
+# (iteration, log-likelihood and population mean) after every iteration, or
+# when a chain finishes if chains run in parallel.
+def fit_hierarchical_bayes(
+    choice_data: ChoiceData,
+    n_items: int,
+    best_worst: bool = False,
+    n_iterations: int = 4000,
+    n_burn: int = 2000,
+    n_chains: int = 1,
+    n_jobs: int = 1,
+    seed: int = 42,
+    callback: Callable[[dict], None] | None = None,
+) -> dict:
+    participant_ids, respondent = np.unique(choice_data.respondent, return_inverse=True)
+    chain_data = choice_data._replace(respondent=respondent)
+
+    # All chains start from the aggregate logit estimates
+    start_params = fit_maxdiff_logit(choice_data, n_items, best_worst=best_worst)[
+        "params"
+    ]
+    chain_args = (
+        chain_data,
+        len(participant_ids),
+        n_items,
+        best_worst,
+        n_iterations,
+        n_burn,
+        start_params,
+    )
+    seeds = np.random.SeedSequence(seed).spawn(n_chains)
+
+    if n_jobs > 1 and n_chains > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, n_chains)) as executor:
+            futures = [
+                executor.submit(_run_hierarchical_bayes_chain, *chain_args, chain_seed)
+                for chain_seed in seeds
+            ]
+            chains = []
+            for chain, future in enumerate(futures, 1):
+                chains.append(future.result())
+                if callback is not None:
+                    callback(
+                        {
+                            "chain": chain,
+                            "n_chains": n_chains,
+                            "iteration": n_iterations,
+                            "n_iterations": n_iterations,
+                        }
+                    )
+    else:
+        chains = [
+            _run_hierarchical_bayes_chain(
+                *chain_args,
+                chain_seed,
+                callback=_tagged_callback(callback, chain=chain, n_chains=n_chains),
+            )
+            for chain, chain_seed in enumerate(seeds, 1)
+        ]
+
+    beta_mean = np.mean([chain["beta_mean"] for chain in chains], axis=0)
+    beta_square_mean = np.mean([chain["beta_square_mean"] for chain in chains], axis=0)
+    mu_draws = np.stack([chain["mu_draws"] for chain in chains])
+    loglike_draws = np.stack([chain["loglike_draws"] for chain in chains])
+
+    return {
+        "participant_ids": participant_ids,
+        "beta_mean": beta_mean,
+        "beta_sd": np.sqrt(np.maximum(beta_square_mean - beta_mean**2, 0)),
+        "mu_mean": mu_draws.mean(axis=(0, 1)),
+        "sigma_mean": np.mean([chain["sigma_mean"] for chain in chains], axis=0),
+        "diagnostics": {
+            "rhat_mu": _split_rhat(mu_draws),
+            "rhat_loglike": _split_rhat(loglike_draws[:, :, None])[0],
+            "acceptance_rate": [chain["acceptance_rate"] for chain in chains],
+            "step_size": [chain["step_size"] for chain in chains],
+            "mean_loglike": loglike_draws.mean(),
+            "n_chains": n_chains,
+            "n_draws": n_chains * (n_iterations - n_burn),
+        },
+    }
+
+
+# One EM run of the latent class MNL from random class memberships. Every
+# iteration is a generalized EM step: the M-step takes a single Newton step
+# for all class utilities at once, on the questions stacked once per class
+# and weighted by class membership (see _segmented_logit_derivatives), and
+# the E-step computes the class memberships of all respondents from their
+# log-likelihood under each class. Steps that lower the log-likelihood are
+# halved. Stops when the relative change of the log-likelihood is below tol.
+def _run_latent_class_em(
+    choice_data: ChoiceData,
+    n_respondents: int,
+    n_items: int,
+    n_classes: int,
+    best_worst: bool,
+    maxiter: int,
+    tol: float,
+    seed: np.random.SeedSequence,
+    callback: Callable[[dict], None] | None = None,
+) -> dict:
+    rng = np.random.default_rng(seed)
+    stages = _respondent_choice_stages(choice_data, n_items, best_worst)
+    respondent, n_questions = choice_data.respondent, choice_data.n_questions
+
+    items = np.tile(choice_data.items, (n_classes, 1))
+    best = np.tile(choice_data.best, n_classes)
+    worst = np.tile(choice_data.worst, n_classes) if best_worst else None
+    segment = np.repeat(np.arange(n_classes), n_questions)
+    pair_index = _item_pairs(items, n_items, segment)
+
+    # (n_respondents, n_classes) log-likelihood of each respondent per class
+    def class_loglike(params):
+        utilities = np.column_stack([np.zeros(n_classes), params])
+        return np.column_stack(
+            [
+                _respondent_loglike(
+                    np.broadcast_to(class_utilities, (n_respondents, n_items)), stages
+                )
+                for class_utilities in utilities
+            ]
+        )
+
+    def e_step(params, class_sizes):
+        joint = class_loglike(params) + np.log(class_sizes)
+        max_joint = joint.max(axis=1, keepdims=True)
+        log_marginal = max_joint[:, 0] + np.log(np.exp(joint - max_joint).sum(axis=1))
+        return log_marginal.sum(), np.exp(joint - log_marginal[:, None])
+
+    params = np.zeros((n_classes, n_items - 1))
+    posterior = rng.dirichlet(np.ones(n_classes), n_respondents)
+    loglike = -np.inf
+    converged = False
+    for iteration in range(1, maxiter + 1):
+        class_sizes = posterior.mean(axis=0)
+        _, gradient, hessian = _segmented_logit_derivatives(
+            params,
+            items,
+            best,
+            n_items,
+            worst,
+            posterior[respondent].T.ravel(),
+            pair_index,
+            segment,
+        )
+        step = np.einsum("sij,sj->si", np.linalg.pinv(hessian), gradient)
+        step_size = 1.0
+        while True:
+            candidate = params - step_size * step
+            candidate_loglike, candidate_posterior = e_step(candidate, class_sizes)
+            if candidate_loglike >= loglike - 1e-12 * abs(candidate_loglike) or (
+                step_size < 1e-8
+            ):
+                break
+            step_size /= 2
+
+        improvement = candidate_loglike - loglike
+        params, loglike, posterior = candidate, candidate_loglike, candidate_posterior
+        if callback is not None:
+            callback({"iteration": iteration, "llf": loglike, "params": params})
+        if abs(improvement) < tol * abs(loglike):
+            converged = True
+            break
+
+    return {
+        "params": params,
+        "class_sizes": posterior.mean(axis=0),
+        "posterior": posterior,
+        "llf": loglike,
+        "n_iterations": iteration,
+        "converged": converged,
+    }
+
+
+# Fit a latent class MNL with n_classes classes by EM from n_starts random
+# starts, optionally run in parallel in a process pool, and keep the start
+# with the highest log-likelihood. Classes are ordered by size. BIC and AIC
+# count (n_items - 1) utilities per class plus n_classes - 1 class sizes,
+# with the number of respondents as sample size. callback gets the progress
+# of each start after every EM iteration, or when a start finishes if starts
+# run in parallel.
+def fit_latent_class_logit(
+    choice_data: ChoiceData,
+    n_items: int,
+    n_classes: int,
+    best_worst: bool = False,
+    n_starts: int = 5,
+    maxiter: int = 500,
+    tol: float = 1e-7,
+    n_jobs: int = 1,
+    seed: int = 42,
+    callback: Callable[[dict], None] | None = None,
+) -> dict:
+    participant_ids, respondent = np.unique(choice_data.respondent, return_inverse=True)
+    start_args = (
+        choice_data._replace(respondent=respondent),
+        len(participant_ids),
+        n_items,
+        n_classes,
+        best_worst,
+        maxiter,
+        tol,
+    )
+    seeds = np.random.SeedSequence(seed).spawn(n_starts)
+
+    if n_jobs > 1 and n_starts > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, n_starts)) as executor:
+            futures = [
+                executor.submit(_run_latent_class_em, *start_args, start_seed)
+                for start_seed in seeds
+            ]
+            starts = []
+            for start, future in enumerate(futures, 1):
+                starts.append(future.result())
+                if callback is not None:
+                    callback(
+                        {"start": start, "n_starts": n_starts, "llf": starts[-1]["llf"]}
+                    )
+    else:
+        starts = [
+            _run_latent_class_em(
+                *start_args,
+                start_seed,
+                callback=_tagged_callback(callback, start=start, n_starts=n_starts),
+            )
+            for start, start_seed in enumerate(seeds, 1)
+        ]
+
+    best = max(starts, key=lambda start: start["llf"])
+    order = np.argsort(-best["class_sizes"], kind="stable")
+    n_params = n_classes * (n_items - 1) + n_classes - 1
+    return {
+        "participant_ids": participant_ids,
+        "params": best["params"][order],
+        "class_sizes": best["class_sizes"][order],
+        "posterior": best["posterior"][:, order],
+        "llf": best["llf"],
+        "n_params": n_params,
+        "aic": -2 * best["llf"] + 2 * n_params,
+        "bic": -2 * best["llf"] + n_params * np.log(len(participant_ids)),
+        "n_iterations": best["n_iterations"],
+        "converged": best["converged"],
+        "start_llf": np.array([start["llf"] for start in starts]),
+    }
+
+
+# Simulate-and-fit replicates of one sample size for plan_sample_size.
+# Respondents are assigned at random to the pool of designs.
+def _run_power_replicates(
+    designs: np.ndarray,
+    true_utilities: np.ndarray,
+    n_respondents: int,
+    n_replicates: int,
+    best_worst: bool,
+    heterogeneity: float,
+    seed: np.random.SeedSequence,
+) -> dict:
+    rng = np.random.default_rng(seed)
+    n_items = len(true_utilities)
+    k = designs.shape[2]
+    true_order = np.sign(true_utilities[:, None] - true_utilities[None, :])
+    upper = np.triu_indices(n_items, 1)
+    is_ordered = true_order[upper] != 0
+
+    standard_errors, errors, pair_order, top_item = [], [], [], []
+    for _ in range(n_replicates):
+        question_items = designs[rng.integers(0, len(designs), n_respondents)]
+        utilities = true_utilities
+        if heterogeneity > 0:
+            utilities = utilities + heterogeneity * rng.standard_normal(
+                (n_respondents, n_items)
+            )
+        lowest, highest = simulate_best_worst(question_items, utilities, rng)
+
+        items = question_items.reshape(-1, k).astype(np.intp)
+        choice_data = ChoiceData(
+            respondent=np.repeat(np.arange(n_respondents), designs.shape[1]),
+            items=items - 1,
+            best=(items == highest.reshape(-1, 1)).argmax(axis=1),
+            worst=(items == lowest.reshape(-1, 1)).argmax(axis=1),
+        )
+        # Starting at the true utilities saves Newton steps, the MLE is the same
+        result = fit_maxdiff_logit(
+            choice_data,
+            n_items,
+            best_worst=best_worst,
+            start_params=true_utilities[1:],
+        )
+
+        estimated = np.insert(result["params"], 0, 0.0)
+        estimated_order = np.sign(estimated[:, None] - estimated[None, :])
+        standard_errors.append(result["bse"])
+        errors.append(result["params"] - true_utilities[1:])
+        pair_order.append(np.mean((estimated_order == true_order)[upper][is_ordered]))
+        top_item.append(estimated.argmax() == true_utilities.argmax())
+
+    return {
+        "standard_errors": np.array(standard_errors),
+        "errors": np.array(errors),
+        "pair_order": np.array(pair_order),
+        "top_item": np.array(top_item),
+    }
+
+
+# Monte Carlo sample size planning: for each number of respondents, simulate
+# n_replicates surveys with the given layout from true_utilities, fit the
+# aggregate logit and summarize the precision of the estimates:
+# - mean_se / max_se: mean and largest standard error of the utilities
+# - rmse: root mean squared error of the utilities
+# - pair_order_recovery: share of item pairs ordered as in true_utilities
+# - top_item_recovery: share of replicates that find the top item
+# By default the true utilities are evenly spread from -1 to 1. Designs come
+# from a pool of n_design_versions generated once. Replicates are spread over
+# n_jobs processes.
+def plan_sample_size(
+    n_items: int,
+    n_items_per_question: int,
+    n_questions_per_participant: int,
+    sample_sizes: list[int],
+    true_utilities: np.ndarray | None = None,
+    n_replicates: int = 200,
+    best_worst: bool = True,
+    heterogeneity: float = 0.0,
+    n_design_versions: int = 300,
+    n_jobs: int = 1,
+    seed: int = 42,
+) -> pd.DataFrame:
+    if true_utilities is None:
+        true_utilities = np.linspace(-1.0, 1.0, n_items)
+    true_utilities = np.asarray(true_utilities, dtype=float)
+    if true_utilities.shape != (n_items,):
+        raise ValueError(
+            f"true_utilities must have one value for each of {n_items} items"
+        )
+    true_utilities = true_utilities - true_utilities[0]
+
+    designs = generate_designs(
+        np.arange(1, n_design_versions + 1),
+        n_items,
+        n_items_per_question,
+        n_questions_per_participant,
+        seed,
+    )
+
+    # Each sample size is split into n_jobs tasks with their own seeds
+    chunks = np.array_split(np.arange(n_replicates), max(n_jobs, 1))
+    tasks = [
+        (n_respondents, len(chunk))
+        for n_respondents in sample_sizes
+        for chunk in chunks
+        if len(chunk)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    task_args = [
+        (designs, true_utilities, n_respondents, size, best_worst, heterogeneity)
+        for n_respondents, size in tasks
+    ]
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(_run_power_replicates, *args, task_seed)
+                for args, task_seed in zip(task_args, seeds)
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _run_power_replicates(*args, task_seed)
+            for args, task_seed in zip(task_args, seeds)
+        ]
+
+    rows = []
+    for n_respondents in sample_sizes:
+        replicates = [
+            result for (size, _), result in zip(tasks, results) if size == n_respondents
+        ]
+        combined = {
+            key: np.concatenate([result[key] for result in replicates])
+            for key in replicates[0]
+        }
+        rows.append(
+            {
+                "n_respondents": n_respondents,
+                "mean_se": combined["standard_errors"].mean(),
+                "max_se": combined["standard_errors"].mean(axis=0).max(),
+                "rmse": np.sqrt(np.mean(np.square(combined["errors"]))),
+                "pair_order_recovery": combined["pair_order"].mean(),
+                "top_item_recovery": combined["top_item"].mean(),
+            }
+        )
+    return pd.DataFrame(rows).set_index("n_respondents")
+
+
+# Write a table that arrives in chunks (DataFrames with the same columns) to
+# path, as CSV (gzip-compressed for a .gz suffix) or Parquet with one row
+# group per chunk. The format is inferred from the file name unless
+# file_format is "csv" or "parquet". Parquet requires pyarrow; CSV is
+# written with pyarrow if it is installed, which is several times faster
+# than DataFrame.to_csv, and with pandas otherwise.
+def write_table_chunks(
+    path: str, chunks: Iterator[pd.DataFrame], file_format: str | None = None
+):
+    if file_format is None:
+        file_format = "parquet" if path.lower().endswith(".parquet") else "csv"
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(
+            f'Unknown file format {file_format!r}, expected "csv" or "parquet"'
+        )
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError:
+        if file_format == "parquet":
+            raise ImportError("Writing Parquet files requires pyarrow") from None
+        opener = gzip.open if path.lower().endswith(".gz") else open
+        with opener(path, "wt", newline="") as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+        return
+
+    sink = path
+    if file_format == "csv" and path.lower().endswith(".gz"):
+        sink = pa.CompressedOutputStream(path, "gzip")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                if file_format == "parquet":
+                    writer = pa.parquet.ParquetWriter(sink, table.schema)
+                else:
+                    writer = pa.csv.CSVWriter(sink, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not path:
+            sink.close()
+
+
+# Question sets of all participants, backed by an (n_designs, n_questions, k)
+# array. Without design versions there is one design per participant;
+# otherwise version_of maps each participant (by index) to a design version.
+# Designs are generated in batches on demand and cached.
+class _QuestionSets(Mapping):
+    def __init__(
+        self,
+        n_participants: int,
+        n_questions: int,
+        n_items_per_question: int,
+        generate: Callable[[np.ndarray], np.ndarray],
+        version_of: np.ndarray | None = None,
+    ):
+        self._generate = generate
+        self._n_participants = n_participants
+        self._version_of = version_of
+        n_designs = n_participants if version_of is None else version_of.max() + 1
+        self._designs = np.zeros(
+            (n_designs, n_questions, n_items_per_question), dtype=np.int16
+        )
+        self._generated = np.zeros(n_designs, dtype=bool)
+
+    def __getitem__(self, participant_id: int) -> list[list[int]]:
+        if not 1 <= participant_id <= self._n_participants:
+            raise KeyError(participant_id)
+        return self.to_array([participant_id])[0].tolist()
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, self._n_participants + 1))
+
+    def __len__(self) -> int:
+        return self._n_participants
+
+    # Design array, generated flags and design version of each participant
+    # (None without versions), e.g. for saving
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        return self._designs, self._generated, self._version_of
+
+    # Use previously generated (e.g. loaded) arrays of the same layout
+    def restore(
+        self,
+        designs: np.ndarray,
+        generated: np.ndarray,
+        version_of: np.ndarray | None = None,
+    ):
+        if designs.shape != self._designs.shape:
+            raise ValueError(
+                f"Designs of shape {designs.shape} do not match the survey, "
+                f"expected {self._designs.shape}"
+            )
+        self._designs, self._generated = designs, generated
+        if version_of is not None:
+            self._version_of = version_of
+
+    # Index into the design array for each participant id
+    def design_index(self, participant_ids: list[int] | np.ndarray) -> np.ndarray:
+        index = np.asarray(participant_ids) - 1
+        return index if self._version_of is None else self._version_of[index]
+
+    # Generate the designs of all given participants not generated yet
+    def ensure(self, participant_ids: list[int] | np.ndarray | None = None):
+        if participant_ids is None:
+            missing = np.flatnonzero(~self._generated)
+        else:
+            index = self.design_index(participant_ids)
+            missing = np.unique(index[~self._generated[index]])
+        if missing.size == 0:
+            return
+
+        designs = self._generate(missing + 1)
+        self._designs[missing] = designs
+        self._generated[missing] = True
+
+    # Question sets as an (n, n_questions, k) array, all participants by default
+    def to_array(self, participant_ids: list[int] | np.ndarray | None = None):
+        if participant_ids is None:
+            participant_ids = np.arange(1, self._n_participants + 1)
+        self.ensure(participant_ids)
+        return self._designs[self.design_index(participant_ids)]
+
+    # Items shown in the given (participant, question) pairs as an (n, k) array
+    def question_items(
+        self, participant_ids: np.ndarray, question_numbers: np.ndarray
+    ) -> np.ndarray:
+        self.ensure(participant_ids)
+        return self._designs[self.design_index(participant_ids), question_numbers - 1]
+
+    # Items shown in a single question, without building the participant's
+    # full list of question sets
+    def question(self, participant_id: int, question_number: int) -> np.ndarray:
+        index = participant_id - 1
+        if self._version_of is not None:
+            index = self._version_of[index]
+        if not self._generated[index]:
+            self.ensure([participant_id])
+        return self._designs[index, question_number - 1]
+
+
+# Version of the on-disk layout written by MaxDiffSurvey.save
+SURVEY_FORMAT_VERSION = 2
 
 
 class MaxDiffSurvey:
@@ -18,7 +1525,23 @@ class MaxDiffSurvey:
         low_response_option: str = "Least important",
         high_response_option: str = "Most important",
         seed: int = 42,
+        lazy_designs: bool = False,
+        n_jobs: int = 1,
+        n_design_versions: int | None = None,
+        version_assignment: str = "round_robin",
+        cache_size: int = 16,
+        cache_dir: str | None = None,
+        respondent_attributes: pd.DataFrame | None = None,
+        shared_store: SharedStore | None = None,
     ):
+        _check_design_size(
+            len(items), n_items_per_question, n_questions_per_participant
+        )
+        if n_participants < 1:
+            raise ValueError(
+                f"A survey needs at least one participant, got {n_participants}"
+            )
+
         # Survey parameters
         self.items = items
         self.n_items_per_question = n_items_per_question
@@ -30,202 +1553,1073 @@ class MaxDiffSurvey:
         self.high_response_option = high_response_option
         self.seed = seed
 
+        # With lazy_designs, question sets are only generated when first used.
+        # Otherwise they are all generated upfront, spread over n_jobs processes.
+        self.lazy_designs = lazy_designs
+        self.n_jobs = n_jobs
+
+        # With n_design_versions, a fixed pool of designs is generated and
+        # participants are assigned to versions ("round_robin" or "random")
+        # instead of getting a design of their own
+        if version_assignment not in ("round_robin", "random"):
+            raise ValueError(
+                f"Unknown version assignment {version_assignment!r}, "
+                'expected "round_robin" or "random"'
+            )
+        if n_design_versions is not None and n_design_versions < 1:
+            raise ValueError(
+                f"There must be at least one design version, got {n_design_versions}"
+            )
+        self.n_design_versions = n_design_versions
+        self.version_assignment = version_assignment
+
+        # Model results are cached by response fingerprint and model options,
+        # keeping the cache_size most recently used ones in memory. With a
+        # cache_dir, results are also written there so that a rebuilt survey
+        # with the same setup and responses can reuse them.
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        # With a shared_store, designs, choice data and model results are
+        # shared with other surveys of the same setup (and responses)
+        self.shared_store = shared_store
+
         # Internal state
         self._items_dict = {i + 1: item for i, item in enumerate(items)}
         self._participant_ids = [i + 1 for i in range(n_participants)]
         self._question_sets = self._generate_all_sets()
-        self._responses = self._initialize_responses()
+        self._responses_lock = threading.RLock()
+        self._change_recorders = []
+        # Increased by every change of the responses, so that a fit running
+        # in the background can tell whether its data is still current
+        self._response_generation = 0
+        self._initialize_responses()
         self._multinomial_logit_model = None
+        self._hierarchical_bayes_model = None
+        self._online_logit = None
+        self._results_cache = OrderedDict()
+        self._results_cache_lock = threading.Lock()
+        self._response_fingerprint = None
+        self._segmented_model = None
+        self._latent_class_model = None
+        self._response_log = None
+        self.set_respondent_attributes(respondent_attributes)
 
-    # Generate the question sets for a single participant
-    def _generate_sets_for_participant(self, participant_id: int) -> list[list[int]]:
-        random.seed(self.seed + participant_id)
-        sets = []
-        item_counts = {item: 0 for item in self._items_dict.keys()}
+    # Generate the question sets for a batch of participants as an
+    # (n_participants, n_questions_per_participant, n_items_per_question) array
+    def _generate_designs(self, participant_ids: list[int]) -> np.ndarray:
+        return generate_designs(
+            participant_ids,
+            len(self.items),
+            self.n_items_per_question,
+            self.n_questions_per_participant,
+            self.seed,
+            n_jobs=self.n_jobs,
+        )
+
+    # Assign participants to design versions (0-based version per participant)
+    def _assign_design_versions(self) -> np.ndarray | None:
+        if self.n_design_versions is None:
+            return None
+        if self.version_assignment == "random":
+            rng = np.random.default_rng(self.seed)
+            return rng.integers(0, self.n_design_versions, self.n_participants)
+        return np.arange(self.n_participants) % self.n_design_versions
 
-        # Define a target number of appearances for each item
-        target_appearances = (
-            self.n_questions_per_participant
-            * self.n_items_per_question
-            // len(self.items)
+    # Generate the question sets for all participants
+    def _generate_all_sets(self) -> _QuestionSets:
+        question_sets = _QuestionSets(
+            self.n_participants,
+            self.n_questions_per_participant,
+            self.n_items_per_question,
+            self._generate_designs,
+            self._assign_design_versions(),
         )
+        if self.lazy_designs:
+            return question_sets
+        if self.shared_store is None:
+            question_sets.ensure()
+            return question_sets
 
-        # Generate each question set
-        for _ in range(self.n_questions_per_participant):
+        # Designs only depend on the setup, so they are generated once
+        def generate():
+            question_sets.ensure()
+            arrays = question_sets.arrays()
+            for values in arrays:
+                if values is not None:
+                    values.flags.writeable = False
+            return arrays
 
-            # Available items are those that haven't reached the target number of appearances yet
-            available_items = [
-                item
-                for item in self._items_dict.keys()
-                if item_counts[item] < target_appearances
-            ]
+        question_sets.restore(
+            *self.shared_store.get_or_compute(
+                ("designs", self.get_survey_id()), generate
+            )
+        )
+        return question_sets
 
-            # If there are not enough available items to fill the question, add from remaining items
-            if len(available_items) < self.n_items_per_question:
-                remaining_items = [
-                    item
-                    for item in self._items_dict.keys()
-                    if item not in available_items
-                ]
-                # Choose least used remaining items first
-                additional_items = sorted(remaining_items, key=lambda x: item_counts[x])
-                available_items.extend(
-                    additional_items[: self.n_items_per_question - len(available_items)]
-                )
+    # Design version of each participant (1-based), None without versions
+    def get_design_versions(self) -> pd.Series | None:
+        if self.n_design_versions is None:
+            return None
+        return pd.Series(
+            self._question_sets.design_index(self._participant_ids) + 1,
+            index=pd.Index(self._participant_ids, name="participant_id"),
+            name="design_version",
+        )
 
-            # Sample the available items to fill the question
-            set_items = random.sample(available_items, self.n_items_per_question)
-
-            # Add the set to the list of sets
-            sets.append(set_items)
-
-            # Update the item counts
-            for item in set_items:
-                item_counts[item] += 1
-
-        # Ensure all items appear at least once
-        unused_items = [item for item, count in item_counts.items() if count == 0]
-        for item in unused_items:
-            least_used_set = min(sets, key=lambda s: sum(item_counts[i] for i in s))
-            replace_index = random.randint(0, self.n_items_per_question - 1)
-            least_used_set[replace_index] = item
-            item_counts[item] += 1
-            item_counts[least_used_set[replace_index]] -= 1
-
-        # Ensure each pair of items appears together at least once
-        item_pairs = set(itertools.combinations(self._items_dict.keys(), 2))
-        for i, set_items in enumerate(sets):
-            for pair in itertools.combinations(set_items, 2):
-                if pair in item_pairs:
-                    item_pairs.remove(pair)
-                elif (pair[1], pair[0]) in item_pairs:
-                    item_pairs.remove((pair[1], pair[0]))
-
-        # If there are still pairs that haven't appeared together, modify sets to include them
-        for pair in item_pairs:
-            for i, set_items in enumerate(sets):
-                if pair[0] in set_items or pair[1] in set_items:
-                    if pair[0] not in set_items:
-                        replace_index = random.randint(0, self.n_items_per_question - 1)
-                        sets[i][replace_index] = pair[0]
-                    elif pair[1] not in set_items:
-                        replace_index = random.randint(0, self.n_items_per_question - 1)
-                        sets[i][replace_index] = pair[1]
-                    break
-            else:
-                # If there is no set with either item, replace two items in a random set
-                random_set = random.choice(sets)
-                replace_indices = random.sample(range(self.n_items_per_question), 2)
-                random_set[replace_indices[0]] = pair[0]
-                random_set[replace_indices[1]] = pair[1]
+    # Save the survey to a directory: survey.json holds the items, wording
+    # and parameters, and the designs and responses are written as raw .npy
+    # arrays (plus respondent_attributes.csv if set). Files are replaced
+    # atomically, so a survey loaded from the directory can be saved back.
+    # Response logs in the directory are superseded by the saved responses.
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        log = self._response_log
+        if log is not None and log.path == os.path.abspath(path):
+            # Changes from now on go to the next log
+            log.wait_for_compaction()
+            log.rotate()
+            log_generation = log.generation
+        else:
+            log_generation = max(log_generations(path), default=0) + 1
+        designs, generated, version_of = self._question_sets.arrays()
+        arrays = {
+            "designs": designs,
+            "designs_generated": generated,
+            "lowest": self._lowest,
+            "highest": self._highest,
+        }
+        if version_of is not None:
+            arrays["design_versions"] = version_of
 
-        return sets
+        def replace(name, write):
+            replace_file(os.path.join(path, name), write)
 
-    # Generate the question sets for all participants
-    def _generate_all_sets(self) -> dict[int, list[list[int]]]:
-        return {
-            pid: self._generate_sets_for_participant(pid)
-            for pid in self._participant_ids
+        for name, values in arrays.items():
+            replace(f"{name}.npy", lambda f: np.save(f, np.ascontiguousarray(values)))
+
+        attributes_file = os.path.join(path, "respondent_attributes.csv")
+        if self.respondent_attributes is not None:
+            replace(
+                "respondent_attributes.csv",
+                lambda f: self.respondent_attributes.to_csv(f),
+            )
+        elif os.path.exists(attributes_file):
+            os.remove(attributes_file)
+
+        header = {
+            "format_version": SURVEY_FORMAT_VERSION,
+            "items": self.items,
+            "n_items_per_question": self.n_items_per_question,
+            "n_questions_per_participant": self.n_questions_per_participant,
+            "n_participants": self.n_participants,
+            "survey_name": self.survey_name,
+            "question_text": self.question_text,
+            "low_response_option": self.low_response_option,
+            "high_response_option": self.high_response_option,
+            "seed": self.seed,
+            "lazy_designs": self.lazy_designs,
+            "n_jobs": self.n_jobs,
+            "n_design_versions": self.n_design_versions,
+            "version_assignment": self.version_assignment,
+            "cache_size": self.cache_size,
+            "cache_dir": self.cache_dir,
+            "arrays": sorted(arrays),
+            "log_generation": log_generation,
         }
+        replace(
+            "survey.json",
+            lambda f: f.write(json.dumps(header, indent=2).encode()),
+        )
+        for generation in log_generations(path):
+            if generation < log_generation:
+                os.remove(log_file(path, generation))
 
-    def _initialize_responses(self) -> pd.DataFrame:
-        index = pd.MultiIndex.from_product(
-            [
-                self._participant_ids,
-                [i + 1 for i in range(self.n_questions_per_participant)],
-            ],
-            names=["participant_id", "question_number"],
+    # Load a survey saved with save. With mmap, the arrays are memory-mapped
+    # copy-on-write instead of read into memory: opening is near-instant
+    # regardless of size, and changes stay in memory until saved again.
+    # Responses logged since the last save or compaction (see
+    # start_response_log) are replayed.
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MaxDiffSurvey":
+        with open(os.path.join(path, "survey.json")) as f:
+            header = json.load(f)
+        format_version = header.pop("format_version")
+        if format_version > SURVEY_FORMAT_VERSION:
+            raise ValueError(
+                f"Survey format version {format_version} is not supported, "
+                f"expected {SURVEY_FORMAT_VERSION} or lower"
+            )
+
+        names = header.pop("arrays")
+        log_generation = header.pop("log_generation", 0)
+        arrays = {
+            name: np.load(
+                os.path.join(path, f"{name}.npy"), mmap_mode="c" if mmap else None
+            )
+            for name in names
+        }
+
+        # Designs are restored from the saved arrays instead of generated
+        lazy_designs = header.pop("lazy_designs")
+        survey = cls(**header, lazy_designs=True)
+        survey.lazy_designs = lazy_designs
+        survey._question_sets.restore(
+            arrays["designs"],
+            arrays["designs_generated"],
+            arrays.get("design_versions"),
         )
-        columns = [f"item_{i+1}" for i in range(self.n_items_per_question)] + [
-            "lowest",
-            "highest",
-        ]
+        survey._lowest, survey._highest = arrays["lowest"], arrays["highest"]
+        for generation in log_generations(path):
+            if generation >= log_generation:
+                survey._replay_response_log(log_file(path, generation))
+        survey._rebuild_progress()
 
-        df = pd.DataFrame(index=index, columns=columns).astype("object")
+        attributes_file = os.path.join(path, "respondent_attributes.csv")
+        if os.path.exists(attributes_file):
+            survey.set_respondent_attributes(
+                pd.read_csv(attributes_file, index_col="participant_id")
+            )
+        return survey
 
-        # Add items from self._question_sets to the item columns
-        for pid in self._participant_ids:
-            for q_num, question_items in enumerate(self._question_sets[pid]):
-                for i, item in enumerate(question_items):
-                    df.loc[(pid, q_num + 1), f"item_{i+1}"] = item
+    # Apply the changes recorded in a response log, where the last record of
+    # each question wins
+    def _replay_response_log(self, file: str):
+        records = read_response_log(file, self._lowest.shape)
+        keys = records["key"].astype(np.intp)
+        last = len(keys) - 1 - np.unique(keys[::-1], return_index=True)[1]
+        np.put(self._lowest, keys[last], records["lowest"][last])
+        np.put(self._highest, keys[last], records["highest"][last])
 
-        return df
+    # Durable mode: save the survey to path and from then on append every
+    # change of responses to a write-ahead log there (see ResponseLog), so
+    # that after a crash
+    #   survey = MaxDiffSurvey.load(path)
+    #   survey.start_response_log(path)
+    # recovers all responses and continues logging. Once the log exceeds
+    # compact_bytes, it is folded into the saved responses in the background.
+    def start_response_log(
+        self,
+        path: str,
+        sync_interval: float = 0.05,
+        sync_bytes: int = 1 << 20,
+        compact_bytes: int = 64 << 20,
+    ):
+        self.stop_response_log()
+        os.makedirs(path, exist_ok=True)
+        path = os.path.abspath(path)
+        self._response_log = ResponseLog(
+            path,
+            max(log_generations(path), default=0) + 1,
+            self._lowest.shape,
+            sync_interval,
+            sync_bytes,
+            compact_bytes,
+        )
+        self.save(path)
+
+    # Sync and close the response log, after any running compaction
+    def stop_response_log(self):
+        if self._response_log is not None:
+            self._response_log.close()
+            self._response_log = None
+
+    # Fold the response log into the saved responses: logging continues in a
+    # new log while a copy of the responses is written in the background
+    # (wait for it with wait=True)
+    def compact_response_log(self, wait: bool = False):
+        log = self._response_log
+        if log is None:
+            raise ValueError("No response log has been started")
+        log.wait_for_compaction()
+        log.rotate()
+        lowest, highest = self._lowest.copy(), self._highest.copy()
+        generation = log.generation
+        log.compact(
+            lambda: write_response_snapshot(log.path, generation, lowest, highest)
+        )
+        if wait:
+            log.wait_for_compaction()
+
+    # Respondent attributes (e.g. country or plan tier) for segment-level
+    # analysis, one row per participant indexed by participant_id (a
+    # participant_id column is used as index if present). Participants that
+    # are not listed get missing values and are left out of all segments.
+    def set_respondent_attributes(self, attributes: pd.DataFrame | None):
+        self._segmented_model = None
+        if attributes is None:
+            self.respondent_attributes = None
+            return
+        if "participant_id" in attributes.columns:
+            attributes = attributes.set_index("participant_id")
+        unknown = attributes.index.difference(self._participant_ids)
+        if len(unknown):
+            raise ValueError(f"Participants {list(unknown[:10])} not found")
+        self.respondent_attributes = attributes.reindex(
+            pd.Index(self._participant_ids, name="participant_id")
+        )
 
-    # Add a response for a single question and participant
+    # Segment of each participant for the attribute column(s) in by, as
+    # 0-based codes (-1 where an attribute is missing) and the sorted segment
+    # labels
+    def _segments(self, by: str | list[str]) -> tuple[np.ndarray, pd.Index]:
+        if self.respondent_attributes is None:
+            raise ValueError("No respondent attributes have been set")
+        by = [by] if isinstance(by, str) else list(by)
+        missing_columns = set(by) - set(self.respondent_attributes.columns)
+        if missing_columns:
+            raise ValueError(f"Unknown respondent attributes {missing_columns}")
+
+        keys = self.respondent_attributes[by]
+        complete = keys.notna().all(axis=1).to_numpy()
+        if len(by) == 1:
+            index = pd.Index(keys[by[0]][complete])
+        else:
+            index = pd.MultiIndex.from_frame(keys[complete])
+        codes = np.full(self.n_participants, -1, dtype=np.intp)
+        codes[complete], labels = index.factorize(sort=True)
+        labels.names = by
+        return codes, labels
+
+    # Item and pair balance plus D-efficiency of the generated question sets
+    def get_design_statistics(self) -> dict:
+        return design_statistics(self._question_sets.to_array(), len(self.items))
+
+    # Responses are stored as (n_participants, n_questions_per_participant)
+    # arrays of item ids, with 0 for questions that have not been answered
+    def _initialize_responses(self):
+        shape = (self.n_participants, self.n_questions_per_participant)
+        self._lowest = np.zeros(shape, dtype=np.int16)
+        self._highest = np.zeros(shape, dtype=np.int16)
+        self._rebuild_progress()
+
+    # Progress index: the number of fully answered questions (lowest and
+    # highest chosen) of each participant, in total, and the number of
+    # participants who answered all questions, with the number of questions
+    # with a highest choice (which the models use). Kept up to date by
+    # _set_responses, so progress queries never scan the response arrays.
+    def _rebuild_progress(self):
+        self._n_questions_with_highest = int((self._highest > 0).sum())
+        complete = (self._lowest > 0) & (self._highest > 0)
+        self._n_answered_by_participant = complete.sum(axis=1).astype(np.int16)
+        self._n_answered_questions = int(self._n_answered_by_participant.sum())
+        self._n_completed_participants = int(
+            (self._n_answered_by_participant == self.n_questions_per_participant).sum()
+        )
+
+    # Write the (lowest, highest) choices of the questions with the given
+    # unique flat (participant x question) indices, updating the progress
+    # index for the questions that became complete or incomplete. Only
+    # questions whose choices actually change are written. In durable mode,
+    # the changes are logged before they are applied. Writes hold a lock, so
+    # that a model fit in the background sees consistent responses.
+    def _set_responses(
+        self,
+        keys: int | np.ndarray,
+        lowest: int | np.ndarray,
+        highest: int | np.ndarray,
+    ):
+        with self._responses_lock:
+            keys = np.atleast_1d(keys)
+            lowest = np.broadcast_to(lowest, keys.shape)
+            highest = np.broadcast_to(highest, keys.shape)
+            old_lowest = self._lowest.ravel()[keys]
+            old_highest = self._highest.ravel()[keys]
+
+            # Writes that leave a question as it was change nothing, so they
+            # keep model results and fingerprint
+            modified = (old_lowest != lowest) | (old_highest != highest)
+            if not modified.all():
+                keys, lowest, highest = (
+                    keys[modified],
+                    lowest[modified],
+                    highest[modified],
+                )
+                old_lowest, old_highest = old_lowest[modified], old_highest[modified]
+            if keys.size == 0:
+                return
+
+            log = self._response_log
+            if log is not None:
+                log.append(keys, lowest, highest)
+            was_complete = (old_lowest > 0) & (old_highest > 0)
+            np.put(self._lowest, keys, lowest)
+            np.put(self._highest, keys, highest)
+            is_complete = (lowest > 0) & (highest > 0)
+            self._n_questions_with_highest += int(
+                np.count_nonzero(highest > 0) - np.count_nonzero(old_highest > 0)
+            )
+
+            changed = was_complete != is_complete
+            if changed.any():
+                participant_index = keys[changed] // self.n_questions_per_participant
+                change = np.where(is_complete[changed], 1, -1).astype(np.int16)
+                touched = np.unique(participant_index)
+                n_questions = self.n_questions_per_participant
+                was_done = self._n_answered_by_participant[touched] == n_questions
+                np.add.at(self._n_answered_by_participant, participant_index, change)
+                is_done = self._n_answered_by_participant[touched] == n_questions
+                self._n_answered_questions += int(change.sum())
+                self._n_completed_participants += int(is_done.sum() - was_done.sum())
+            self._response_generation += 1
+            self._record_response_changes(keys)
+
+            if log is not None and log.size >= log.compact_bytes:
+                if log.compaction is None or log.compaction.done():
+                    self.compact_response_log()
+
+    # Overall progress: fully answered questions, participants who answered
+    # all their questions, and whether all questions are answered. Questions
+    # with a highest choice count as answered for the models.
+    def get_progress(self) -> dict:
+        n_questions = self.n_participants * self.n_questions_per_participant
+        return {
+            "n_answered_questions": self._n_answered_questions,
+            "n_questions_with_highest": self._n_questions_with_highest,
+            "n_questions": n_questions,
+            "n_completed_participants": self._n_completed_participants,
+            "n_participants": self.n_participants,
+            "complete": self._n_answered_questions == n_questions,
+        }
+
+    # Number of fully answered questions of a participant
+    def get_participant_progress(self, participant_id: int) -> int:
+        return int(self._n_answered_by_participant[participant_id - 1])
+
+    def is_participant_complete(self, participant_id: int) -> bool:
+        return bool(
+            self._n_answered_by_participant[participant_id - 1]
+            == self.n_questions_per_participant
+        )
+
+    # Ids of the participants who answered all their questions
+    def get_completed_participants(self) -> np.ndarray:
+        return (
+            np.flatnonzero(
+                self._n_answered_by_participant == self.n_questions_per_participant
+            )
+            + 1
+        )
+
+    # Add a response for a single question and participant. Either choice can
+    # be None to leave it unchanged (e.g. when only one has been made so far).
     def add_response(
-        self, participant_id: int, question_number: int, response: tuple[int, int]
+        self,
+        participant_id: int,
+        question_number: int,
+        response: tuple[int | None, int | None],
     ):
-        if participant_id not in self._participant_ids:
+        if not 1 <= participant_id <= self.n_participants:
             raise ValueError(f"Participant {participant_id} not found")
 
-        if question_number > self.n_questions_per_participant:
+        if not 1 <= question_number <= self.n_questions_per_participant:
             raise ValueError(f"Question number {question_number} is out of range")
 
         if len(response) != 2:
             raise ValueError(f"Response must be a tuple of two integers (item ids)")
 
-        if response[0] == response[1]:
+        lowest, highest = self.get_response(participant_id, question_number)
+        lowest = lowest if response[0] is None else response[0]
+        highest = highest if response[1] is None else response[1]
+
+        if lowest is not None and lowest == highest:
             raise ValueError(
                 f"Response must be a pair of different integers (item ids)"
             )
 
+        question_items = self._question_sets.question(participant_id, question_number)
         for item in response:
-            if item not in self._question_sets[participant_id][question_number - 1]:
+            if item is None:
+                continue
+            if item not in question_items:
                 raise ValueError(
                     f"Response {item} is not a valid item for this question and participant"
                 )
 
-        self._responses.loc[
-            (participant_id, question_number), ("lowest", "highest")
-        ] = response
+        self._set_responses(
+            (participant_id - 1) * self.n_questions_per_participant
+            + question_number
+            - 1,
+            lowest or 0,
+            highest or 0,
+        )
+
+    # Add many responses at once, either from a DataFrame with participant_id,
+    # question_number, lowest and highest columns (or index levels) or from an
+    # (n, 4) array with the columns in that order. Missing choices (NaN, None
+    # or 0) leave the stored choice unchanged, and when a question appears
+    # more than once the last given choice wins. All rows are validated
+    # before anything is written; if any is invalid, InvalidResponsesError
+    # reports all of them.
+    def add_responses(self, responses: pd.DataFrame | np.ndarray):
+        columns = ["participant_id", "question_number", "lowest", "highest"]
+        if isinstance(responses, pd.DataFrame):
+            if not set(columns) <= set(responses.columns):
+                responses = responses.reset_index()
+            missing_columns = set(columns) - set(responses.columns)
+            if missing_columns:
+                raise ValueError(f"Responses are missing columns {missing_columns}")
+            values = responses[columns].to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values = np.array(responses, dtype=float).reshape(-1, 4)
 
-    def get_responses(self) -> pd.DataFrame:
-        return self._responses
-
-    def generate_random_responses(self, overwrite=False):
-        for participant_id in self._participant_ids:
-            for question_number in [
-                i + 1 for i in range(self.n_questions_per_participant)
-            ]:
-                has_response = (
-                    self._responses.loc[
-                        (participant_id, question_number), ["lowest", "highest"]
-                    ]
-                    .notnull()
-                    .all()
-                    .all()
+        errors, messages, touched, merged = self._check_responses(values)
+        invalid = np.flatnonzero(errors)
+        if invalid.size:
+            rows = pd.DataFrame(
+                values[invalid], index=pd.Index(invalid, name="row"), columns=columns
+            )
+            rows["reason"] = np.array(messages, dtype=object)[errors[invalid]]
+            counts = rows["reason"].value_counts(sort=False)
+            reasons = ", ".join(f"{count} {reason}" for reason, count in counts.items())
+            raise InvalidResponsesError(
+                f"{invalid.size} invalid responses, nothing was added ({reasons})",
+                rows,
+            )
+        self._write_responses(touched, merged)
+
+    # Validate (n, 4) float rows of (participant_id, question_number, lowest,
+    # highest) as in add_responses. Returns the first problem of each row (an
+    # index into messages, 0 if the row is valid), and the flat indices of
+    # the questions touched by the valid rows with their merged (lowest,
+    # highest) choices.
+    def _check_responses(
+        self, values: np.ndarray
+    ) -> tuple[np.ndarray, list[str], np.ndarray, dict]:
+        values = np.nan_to_num(values, nan=0.0)
+        messages = [""]
+        errors = np.zeros(len(values), dtype=np.int8)
+
+        # Record the first problem found for each row
+        def flag(mask, message):
+            messages.append(message)
+            errors[mask & (errors == 0)] = len(messages) - 1
+
+        integers = values.astype(np.int64)
+        flag((integers != values).any(axis=1), "values must be integers")
+        participant_ids, question_numbers, lowest, highest = integers.T
+        flag(
+            (participant_ids < 1) | (participant_ids > self.n_participants),
+            "participant not found",
+        )
+        flag(
+            (question_numbers < 1)
+            | (question_numbers > self.n_questions_per_participant),
+            "question number out of range",
+        )
+
+        valid = errors == 0
+        question_items = np.zeros((len(values), self.n_items_per_question), np.int64)
+        question_items[valid] = self._question_sets.question_items(
+            participant_ids[valid], question_numbers[valid]
+        )
+        for name, choice in (("lowest", lowest), ("highest", highest)):
+            flag((choice < 0) | (choice > len(self.items)), f"{name} item not found")
+            # Columnwise comparisons are much faster than any(axis=1) over k
+            shown = np.zeros(len(values), dtype=bool)
+            for position in question_items.T:
+                shown |= position == choice
+            flag(valid & (choice != 0) & ~shown, f"{name} item not in question")
+
+        # Merge the new choices into the stored ones of every touched question
+        # to check that the lowest and highest choice still differ. Rows are
+        # stably sorted by question, so the last given choice of a question is
+        # the last one in its group.
+        rows = np.flatnonzero(errors == 0)
+        keys = (participant_ids[rows] - 1) * self.n_questions_per_participant + (
+            question_numbers[rows] - 1
+        )
+        order = np.argsort(keys, kind="stable")
+        rows, keys = rows[order], keys[order]
+        is_first = np.ones(len(keys), dtype=bool)
+        is_first[1:] = keys[1:] != keys[:-1]
+        group = np.cumsum(is_first) - 1
+        touched = keys[is_first]
+
+        merged = {}
+        for name, choice, stored in (
+            ("lowest", lowest, self._lowest),
+            ("highest", highest, self._highest),
+        ):
+            merged[name] = stored.ravel()[touched]
+            given = np.flatnonzero(choice[rows] != 0)
+            given_group = group[given]
+            is_last = np.ones(len(given), dtype=bool)
+            is_last[:-1] = given_group[1:] != given_group[:-1]
+            merged[name][given_group[is_last]] = choice[rows[given[is_last]]]
+
+        conflicting = (merged["lowest"] != 0) & (merged["lowest"] == merged["highest"])
+        is_conflicting = np.zeros(len(values), dtype=bool)
+        is_conflicting[rows] = conflicting[group]
+        flag(is_conflicting, "lowest and highest are the same")
+
+        merged = {name: choices[~conflicting] for name, choices in merged.items()}
+        return errors, messages, touched[~conflicting], merged
+
+    # Store merged choices of the touched questions (see _check_responses)
+    def _write_responses(self, touched: np.ndarray, merged: dict):
+        self._set_responses(touched, merged["lowest"], merged["highest"])
+
+    # Stream responses from a survey platform export into the survey,
+    # chunk_size rows at a time, so memory use does not grow with the file.
+    # The export is CSV or JSON lines (also compressed), inferred from the
+    # file name unless file_format is "csv" or "jsonl". columns maps any of
+    # participant_id, question_number, lowest and highest to the export's
+    # column names; with item_labels, the lowest and highest columns hold
+    # item labels instead of item ids. Rows are validated as in
+    # add_responses, but invalid rows are skipped instead of failing the
+    # import. Returns the number of rows read, imported and rejected, the
+    # count of each rejection reason and the first max_rejected rejected rows.
+    def import_responses(
+        self,
+        path: str,
+        columns: dict[str, str] | None = None,
+        item_labels: bool = False,
+        file_format: str | None = None,
+        chunk_size: int = 100_000,
+        max_rejected: int = 1000,
+    ) -> dict:
+        names = ["participant_id", "question_number", "lowest", "highest"]
+        unknown_names = set(columns or {}) - set(names)
+        if unknown_names:
+            raise ValueError(f"Unknown response columns {unknown_names}")
+        columns = {name: name for name in names} | (columns or {})
+        export_columns = [columns[name] for name in names]
+
+        if file_format is None:
+            name = os.path.basename(path).lower()
+            for suffix in (".gz", ".bz2", ".zip", ".xz", ".zst"):
+                name = name.removesuffix(suffix)
+            file_format = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+        if file_format == "csv":
+            # Missing columns are reported below, as for JSONL
+            chunks = pd.read_csv(
+                path,
+                usecols=lambda column: column in export_columns,
+                chunksize=chunk_size,
+            )
+        elif file_format == "jsonl":
+            chunks = pd.read_json(path, lines=True, dtype=False, chunksize=chunk_size)
+        else:
+            raise ValueError(
+                f'Unknown file format {file_format!r}, expected "csv" or "jsonl"'
+            )
+        label_ids = {label: item_id for item_id, label in self._items_dict.items()}
+
+        # Values that cannot be read as an item or number become -1, which
+        # validation rejects (missing values stay missing)
+        def to_values(chunk):
+            values = np.empty((len(chunk), 4))
+            for i, name in enumerate(names):
+                column = chunk[columns[name]]
+                if item_labels and name in ("lowest", "highest"):
+                    numeric = column.map(label_ids)
+                elif pd.api.types.is_numeric_dtype(column):
+                    values[:, i] = column.to_numpy(dtype=float, na_value=np.nan)
+                    continue
+                else:
+                    numeric = pd.to_numeric(column, errors="coerce")
+                unreadable = numeric.isna() & column.notna()
+                values[:, i] = numeric.mask(unreadable, -1).to_numpy(
+                    dtype=float, na_value=np.nan
                 )
-                if not has_response:
-                    random_response = random.sample(
-                        sorted(
-                            self._question_sets[participant_id][question_number - 1]
-                        ),
-                        2,
-                    )
-                    self.add_response(participant_id, question_number, random_response)
-                elif overwrite:
-                    self.add_response(participant_id, question_number, random_response)
+            return values
+
+        n_rows = n_rejected = 0
+        reasons = {}
+        rejected = []
+        with chunks:
+            for chunk in chunks:
+                missing_columns = set(export_columns) - set(chunk.columns)
+                if missing_columns:
+                    raise ValueError(f"Export is missing columns {missing_columns}")
+                errors, messages, touched, merged = self._check_responses(
+                    to_values(chunk)
+                )
+                self._write_responses(touched, merged)
+
+                invalid = np.flatnonzero(errors)
+                for error, count in zip(
+                    *np.unique(errors[invalid], return_counts=True)
+                ):
+                    reasons[messages[error]] = reasons.get(messages[error], 0) + count
+                n_kept = sum(len(rows) for rows in rejected)
+                if n_kept < max_rejected and invalid.size:
+                    invalid = invalid[: max_rejected - n_kept]
+                    rows = chunk[export_columns].iloc[invalid].copy()
+                    rows.index = pd.Index(n_rows + invalid, name="row")
+                    rows["reason"] = [messages[error] for error in errors[invalid]]
+                    rejected.append(rows)
+                n_rows += len(chunk)
+                n_rejected += int((errors > 0).sum())
+
+        return {
+            "n_rows": n_rows,
+            "n_imported": n_rows - n_rejected,
+            "n_rejected": n_rejected,
+            "reasons": pd.Series(reasons, name="n_rows", dtype=int),
+            "rejected": (
+                pd.concat(rejected)
+                if rejected
+                else pd.DataFrame(
+                    columns=[*export_columns, "reason"], index=pd.Index([], name="row")
+                )
+            ),
+        }
+
+    # Remember which questions (flat participant x question indices) changed
+    # for update_multinomial_logit. Changing a question that is already part
+    # of the estimates forces a full refit. Refits that are running collect
+    # the changes made meanwhile.
+    def _record_response_changes(self, keys: int | np.ndarray):
+        self._invalidate_results()
+        for changes in self._change_recorders:
+            changes.append(np.atleast_1d(keys))
+        state = self._online_logit
+        if state is None:
+            return
+        keys = np.atleast_1d(keys)
+        if state["estimated"].ravel()[keys].any():
+            state["stale"] = True
+        state["pending"].append(keys)
+
+    # Write the question sets of all participants to path (CSV or Parquet,
+    # see write_table_chunks), chunk_size participants at a time straight
+    # from the design arrays. layout "wide" has one row per question with
+    # item_1..item_k, "long" one row per item shown with its position.
+    # With design versions, each row also holds the participant's version.
+    def export_design(
+        self,
+        path: str,
+        layout: str = "wide",
+        file_format: str | None = None,
+        chunk_size: int = 10_000,
+    ):
+        write_table_chunks(
+            path, self._export_chunks(layout, False, False, chunk_size), file_format
+        )
+
+    # Write the responses to path like export_design, with the lowest and
+    # highest item per question ("wide") or a choice column that is 1 for
+    # the highest, -1 for the lowest and 0 for the other items ("long").
+    # With answered_only, questions without any response are left out.
+    def export_responses(
+        self,
+        path: str,
+        layout: str = "wide",
+        file_format: str | None = None,
+        answered_only: bool = True,
+        chunk_size: int = 10_000,
+    ):
+        write_table_chunks(
+            path,
+            self._export_chunks(layout, True, answered_only, chunk_size),
+            file_format,
+        )
+
+    # DataFrames of chunk_size participants for export_design and
+    # export_responses, built from the design and response arrays
+    def _export_chunks(
+        self, layout: str, responses: bool, answered_only: bool, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        if layout not in ("wide", "long"):
+            raise ValueError(f'Unknown layout {layout!r}, expected "wide" or "long"')
+        n_questions, k = self.n_questions_per_participant, self.n_items_per_question
+
+        for start in range(0, self.n_participants, chunk_size):
+            participant_ids = np.arange(
+                start + 1, min(start + chunk_size, self.n_participants) + 1
+            )
+            designs = self._question_sets.to_array(participant_ids).reshape(-1, k)
+            columns = {
+                "participant_id": np.repeat(participant_ids, n_questions),
+                "question_number": np.tile(
+                    np.arange(1, n_questions + 1, dtype=np.int16),
+                    len(participant_ids),
+                ),
+            }
+            if self.n_design_versions is not None:
+                columns["design_version"] = np.repeat(
+                    self._question_sets.design_index(participant_ids) + 1, n_questions
+                )
+
+            rows = slice(None)
+            lowest = self._lowest[start : start + len(participant_ids)].ravel()
+            highest = self._highest[start : start + len(participant_ids)].ravel()
+            if responses and answered_only:
+                rows = np.flatnonzero((lowest > 0) | (highest > 0))
+
+            if layout == "wide":
+                for position in range(k):
+                    columns[f"item_{position + 1}"] = designs[:, position]
+                if responses:
+                    for name, values in (("lowest", lowest), ("highest", highest)):
+                        columns[name] = pd.arrays.IntegerArray(values, values == 0)
+                chunk = pd.DataFrame(columns).iloc[rows]
+            else:
+                designs = designs[rows]
+                columns = {
+                    name: np.repeat(values[rows], k) for name, values in columns.items()
+                }
+                columns["position"] = np.tile(
+                    np.arange(1, k + 1, dtype=np.int16), len(designs)
+                )
+                columns["item_id"] = designs.ravel()
+                if responses:
+                    choice = np.zeros(designs.shape, dtype=np.int8)
+                    choice[designs == lowest[rows, None]] = -1
+                    choice[designs == highest[rows, None]] = 1
+                    columns["choice"] = choice.ravel()
+                chunk = pd.DataFrame(columns)
+            yield chunk.reset_index(drop=True)
+
+    # The (lowest, highest) response to a question, None where not answered
+    def get_response(
+        self, participant_id: int, question_number: int
+    ) -> tuple[int | None, int | None]:
+        lowest = int(self._lowest[participant_id - 1, question_number - 1])
+        highest = int(self._highest[participant_id - 1, question_number - 1])
+        return (lowest or None, highest or None)
+
+    # All question sets and responses as a DataFrame with one row per
+    # participant and question (item_1..item_k, lowest, highest)
+    def get_responses(self) -> pd.DataFrame:
+        index = pd.MultiIndex.from_product(
+            [
+                self._participant_ids,
+                [i + 1 for i in range(self.n_questions_per_participant)],
+            ],
+            names=["participant_id", "question_number"],
+        )
+        df = pd.DataFrame(
+            self._question_sets.to_array().reshape(-1, self.n_items_per_question),
+            index=index,
+            columns=[f"item_{i+1}" for i in range(self.n_items_per_question)],
+        )
+        for column, values in (("lowest", self._lowest), ("highest", self._highest)):
+            values = values.ravel()
+            df[column] = pd.arrays.IntegerArray(values, values == 0)
+        return df
+
+    # Simulate responses for all questions that have not been fully answered
+    # (all questions with overwrite=True). Without true_utilities all items
+    # are equally attractive, i.e. choices are uniformly random. Respondent
+    # utilities vary around true_utilities with standard deviation
+    # heterogeneity, and a random_share of respondents choose at random.
+    # Returns the utilities each participant responded with. The choices are
+    # drawn from seed (the survey's seed by default), so the same survey
+    # always gets the same simulated responses.
+    def generate_random_responses(
+        self,
+        overwrite: bool = False,
+        true_utilities: list[float] | np.ndarray | None = None,
+        heterogeneity: float = 0.0,
+        random_share: float = 0.0,
+        seed: int | None = None,
+    ) -> pd.DataFrame:
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        n_items = len(self.items)
+        if true_utilities is None:
+            true_utilities = np.zeros(n_items)
+        true_utilities = np.asarray(true_utilities, dtype=float)
+        if true_utilities.shape != (n_items,):
+            raise ValueError(
+                f"true_utilities must have one value for each of {n_items} items"
+            )
+
+        utilities = true_utilities + heterogeneity * rng.standard_normal(
+            (self.n_participants, n_items)
+        )
+        utilities[rng.random(self.n_participants) < random_share] = 0.0
 
-        # TODO: Add option to generate responses in a specific style/pattern
+        lowest, highest = simulate_best_worst(
+            self._question_sets.to_array(), utilities, rng
+        )
+        if overwrite:
+            keys = np.arange(self._lowest.size)
+        else:
+            keys = np.flatnonzero((self._lowest == 0) | (self._highest == 0))
+        self._set_responses(keys, lowest.ravel()[keys], highest.ravel()[keys])
+
+        return pd.DataFrame(
+            utilities,
+            index=pd.Index(self._participant_ids, name="participant_id"),
+            columns=self._items_dict.keys(),
+        )
 
     def delete_all_responses(self):
-        self._responses[["lowest", "highest"]] = None
+        with self._responses_lock:
+            self._lowest[:] = 0
+            self._highest[:] = 0
+            self._rebuild_progress()
+            self._response_generation += 1
+            # Not logged record by record, the emptied responses are saved
+            # instead
+            if self._response_log is not None:
+                self.compact_response_log(wait=True)
+            self._online_logit = None
+            self._invalidate_results()
 
-    def get_item_counts(self) -> pd.DataFrame:
+    # Model results of the previous responses no longer apply (cached results
+    # stay available under their fingerprint)
+    def _invalidate_results(self):
+        self._response_fingerprint = None
+        self._multinomial_logit_model = None
+        self._hierarchical_bayes_model = None
+        self._segmented_model = None
+        self._latent_class_model = None
 
-        value_counts_lowest = self._responses["lowest"].value_counts().sort_index()
-        value_counts_highest = self._responses["highest"].value_counts().sort_index()
+    # Parameters that determine the question sets
+    def _setup(self) -> tuple:
+        return (
+            self.items,
+            self.n_items_per_question,
+            self.n_questions_per_participant,
+            self.n_participants,
+            self.seed,
+            self.n_design_versions,
+            self.version_assignment,
+        )
+
+    # Hash of the survey setup, identifying surveys with the same question sets
+    def get_survey_id(self) -> str:
+        return hashlib.blake2b(repr(self._setup()).encode(), digest_size=16).hexdigest()
+
+    # Hash of the survey setup and all responses, identifying the data that
+    # model results were computed from. Computed once per change of responses.
+    def get_response_fingerprint(self) -> str:
+        if self._response_fingerprint is None:
+            fingerprint = hashlib.blake2b(repr(self._setup()).encode(), digest_size=16)
+            fingerprint.update(self._lowest.tobytes())
+            fingerprint.update(self._highest.tobytes())
+            self._response_fingerprint = fingerprint.hexdigest()
+        return self._response_fingerprint
+
+    # Look up a model result by the response fingerprint (of the current
+    # responses by default) and the model options, in memory first, then in
+    # the shared store and then in cache_dir; compute and store it if it is
+    # not found
+    def _cached_result(
+        self,
+        name: str,
+        options: dict,
+        compute: Callable[[], dict],
+        fingerprint: str | None = None,
+    ) -> dict:
+        if fingerprint is None:
+            fingerprint = self.get_response_fingerprint()
+        key = (fingerprint, name, tuple(sorted(options.items())))
+        with self._results_cache_lock:
+            if key in self._results_cache:
+                self._results_cache.move_to_end(key)
+                return self._results_cache[key]
+
+        def load_or_compute():
+            path = None
+            if self.cache_dir is not None:
+                digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+                path = os.path.join(self.cache_dir, f"{name}-{digest}.pkl")
+            if path is not None and os.path.exists(path):
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+            result = compute()
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(f"{path}.tmp", "wb") as f:
+                    pickle.dump(result, f)
+                os.replace(f"{path}.tmp", path)
+            return result
+
+        if self.shared_store is None:
+            result = load_or_compute()
+        else:
+            result = self.shared_store.get_or_compute(
+                ("result", self.get_survey_id(), *key), load_or_compute
+            )
 
-        out = pd.concat([value_counts_lowest, value_counts_highest], axis=1)
-        out.columns = ["lowest", "highest"]
-        out.fillna(0, inplace=True)
-        out = out.astype(int)
-        out["net"] = out["highest"] - out["lowest"]
-        out.index.name = "item_id"
-        out.sort_index(inplace=True)
+        # Results may be computed in the background (see FitService)
+        with self._results_cache_lock:
+            self._results_cache[key] = result
+            while len(self._results_cache) > self.cache_size:
+                self._results_cache.popitem(last=False)
+        return result
 
+    # (n_groups, n_items, 3) counts of how often each item was shown in an
+    # answered question and chosen as lowest and highest, per group of
+    # participants, in one bincount over integer arrays. group holds the
+    # 0-based group of each participant, -1 to leave a participant out.
+    def _count_choices(self, group: np.ndarray, n_groups: int) -> np.ndarray:
+        n_items, k = len(self.items), self.n_items_per_question
+        answered = (self._lowest > 0) | (self._highest > 0)
+        participant_index, question_index = np.nonzero(answered)
+        question_group = group[participant_index]
+
+        # Flat (group, item, shown / lowest / highest) index of the k items
+        # shown and the two choices of every answered question. Left out
+        # participants and missing choices go to an extra bin that is dropped.
+        n_bins = n_groups * n_items * 3
+        key = np.empty((len(participant_index), k + 2), dtype=np.intp)
+        key[:, :k] = self._question_sets.question_items(
+            participant_index + 1, question_index + 1
+        )
+        key[:, k] = self._lowest[answered]
+        key[:, k + 1] = self._highest[answered]
+        missing = key[:, k:] == 0
+        key += question_group[:, None] * n_items - 1
+        key *= 3
+        key[:, k] += 1
+        key[:, k + 1] += 2
+        key[:, k:][missing] = n_bins
+        key[question_group < 0] = n_bins
+        counts = np.bincount(key.ravel(), minlength=n_bins + 1)[:n_bins]
+        return counts.reshape(n_groups, n_items, 3)
+
+    # How often each item was shown (in answered questions) and chosen as
+    # lowest and highest, the net count (highest - lowest) and the
+    # best-worst score, i.e. the net count per time shown, which corrects for
+    # items being shown unequally often. With by (one or more respondent
+    # attribute columns), counts are broken down by segment.
+    def get_item_counts(self, by: str | list[str] | None = None) -> pd.DataFrame:
+        item_ids = list(self._items_dict.keys())
+        if by is None:
+            counts = self._count_choices(np.zeros(self.n_participants, np.intp), 1)
+            index = pd.Index(item_ids, name="item_id")
+        else:
+            codes, labels = self._segments(by)
+            counts = self._count_choices(codes, len(labels))
+            index = labels.repeat(len(item_ids)).to_frame(index=False)
+            index["item_id"] = np.tile(item_ids, len(labels))
+            index = pd.MultiIndex.from_frame(index)
+
+        counts = counts.reshape(-1, 3)
+        out = pd.DataFrame(
+            {
+                "lowest": counts[:, 1],
+                "highest": counts[:, 2],
+                "net": counts[:, 2] - counts[:, 1],
+                "shown": counts[:, 0],
+            },
+            index=index,
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out["score"] = np.where(counts[:, 0] > 0, out["net"] / counts[:, 0], np.nan)
         return out
 
+    # Best-worst score of each participant and item, (highest - lowest)
+    # per time shown, missing for items a participant has not been shown
+    def get_individual_count_scores(self) -> pd.DataFrame:
+        counts = self._count_choices(
+            np.arange(self.n_participants), self.n_participants
+        )
+        shown = counts[:, :, 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = (counts[:, :, 2] - counts[:, :, 1]) / shown
+        scores[shown == 0] = np.nan
+        return pd.DataFrame(
+            scores,
+            index=pd.Index(self._participant_ids, name="participant_id"),
+            columns=pd.Index(self._items_dict.keys(), name="item_id"),
+        )
+
     def plot_item_counts(self):
         item_counts = self.get_item_counts()
         plot_data = pd.DataFrame(
@@ -285,50 +2679,209 @@ class MaxDiffSurvey:
 
         return fig
 
-    def run_multinomial_logit(self):
-        # Reshape reponse data so that every row contains a single choice
-        # (1 for the highest, -1 for the lowest, 0 otherwise)
-        choices = []
-        question_id = 1
-        for _, row in self._responses.iterrows():
-            items_in_question = row[:-2]  # items in this question
-            for item in items_in_question:
-                choice = (
-                    1
-                    if row["highest"] == item
-                    else (-1 if row["lowest"] == item else 0)
-                )
-                participant_id = row.name[0]
-                question_number = row.name[1]
-                question_id = "_".join([str(participant_id), str(question_number)])
-                choices.append(
-                    {
-                        "participant_id": participant_id,
-                        "question_id": question_id,
-                        "item_id": item,
-                        "choice": choice,
-                    }
-                )
+    # Integer choice arrays for all answered questions
+    def get_choice_data(self) -> ChoiceData:
+        if self.shared_store is None:
+            return self._choice_data(*np.nonzero(self._highest))
+
+        def build():
+            choice_data = self._choice_data(*np.nonzero(self._highest))
+            for values in choice_data:
+                values.flags.writeable = False
+            return choice_data
+
+        return self.shared_store.get_or_compute(
+            ("choice_data", self.get_survey_id(), self.get_response_fingerprint()),
+            build,
+        )
+
+    # Integer choice arrays for the given (0-based) participant and question
+    # indices
+    def _choice_data(
+        self, participant_index: np.ndarray, question_index: np.ndarray
+    ) -> ChoiceData:
+        items = self._question_sets.question_items(
+            participant_index + 1, question_index + 1
+        ).astype(np.intp)
+        highest = self._highest[participant_index, question_index]
+        lowest = self._lowest[participant_index, question_index]
 
-        df = pd.DataFrame(choices)
+        is_worst = items == lowest[:, None]
+        return ChoiceData(
+            respondent=participant_index + 1,
+            items=items - 1,
+            best=(items == highest[:, None]).argmax(axis=1),
+            worst=np.where(is_worst.any(axis=1), is_worst.argmax(axis=1), -1),
+        )
 
-        # Remove "lowest" choices
-        df.loc[df["choice"] == -1, "choice"] = 0
+    # Fit the multinomial logit model. With best_worst=True, the "lowest"
+    # choices are used as well (sequential best-worst model). callback gets
+    # the progress of the fit (see fit_maxdiff_logit), as do the callbacks of
+    # the other estimators, e.g. for running them with a FitService. If the
+    # responses change while the model is fit, the fit is only cached under
+    # the fingerprint of the responses it used.
+    def run_multinomial_logit(
+        self,
+        best_worst: bool = False,
+        callback: Callable[[dict], None] | None = None,
+    ):
+        with self._responses_lock:
+            generation = self._response_generation
+            choice_data = self.get_choice_data()
+            fingerprint = self.get_response_fingerprint()
 
-        # Create dummy variable for item,
-        # dropping one item to avoid multicollinearity
-        X = pd.get_dummies(df["item_id"], drop_first=True)
+        # The first item serves as reference with a utility of 0
+        # to avoid multicollinearity
+        def fit():
+            result = fit_maxdiff_logit(
+                choice_data,
+                len(self.items),
+                best_worst=best_worst,
+                callback=callback,
+            )
+            return self._multinomial_logit_results(result, best_worst)
 
-        y = df["choice"]
+        model = self._cached_result(
+            "multinomial_logit", {"best_worst": best_worst}, fit, fingerprint
+        )
+        with self._responses_lock:
+            if self._response_generation == generation:
+                self._multinomial_logit_model = dict(model)
 
-        question_id = df["question_id"]
+    # Keep the multinomial logit model up to date while responses come in.
+    # The model uses the same questions as run_multinomial_logit, i.e. all
+    # with a "highest" choice. Questions that were answered since the last
+    # call are folded into the estimates with one Newton step (see
+    # update_maxdiff_logit), at a cost proportional to the number of new
+    # questions. To correct the drift of these approximate updates, the model
+    # is refit on all answered questions when there is no model to update
+    # yet, best_worst changed, an already estimated question was changed, or
+    # the questions added since the last full fit exceed refit_fraction of the
+    # questions in it. callback gets the progress of full refits.
+    def update_multinomial_logit(
+        self,
+        best_worst: bool = False,
+        refit_fraction: float = 0.25,
+        callback: Callable[[dict], None] | None = None,
+    ):
+        n_items = len(self.items)
+        with self._responses_lock:
+            if self._update_online_logit(best_worst, refit_fraction):
+                return
 
-        model = ConditionalLogit(endog=y, exog=X, groups=question_id)
+            # The refit uses the responses as they are now. Changes made while
+            # it runs are recorded and folded in by the next update.
+            state = self._online_logit
+            answered = self._highest > 0
+            if not answered.any():
+                return
+            choice_data = self._choice_data(*np.nonzero(answered))
+            fingerprint = self.get_response_fingerprint()
+            generation = self._response_generation
+            changes = []
+            self._change_recorders.append(changes)
 
-        result = model.fit()
+        def refit():
+            result = fit_maxdiff_logit(
+                choice_data,
+                n_items,
+                best_worst=best_worst,
+                start_params=None if state is None else state["params"],
+                callback=callback,
+            )
+            result["n_questions"] = int(answered.sum())
+            result["n_incremental"] = 0
+            return result
 
+        try:
+            # Surveys with the same responses share the refit
+            if self.shared_store is None:
+                result = refit()
+            else:
+                result = self.shared_store.get_or_compute(
+                    ("logit_refit", self.get_survey_id(), fingerprint, best_worst),
+                    refit,
+                )
+        finally:
+            with self._responses_lock:
+                self._change_recorders.remove(changes)
+
+        with self._responses_lock:
+            # Every write since the snapshot is in changes and is folded in
+            # by the next update. Any other change (i.e. deleting all
+            # responses) leaves the refit without its data, so it is dropped.
+            if self._response_generation != generation + len(changes):
+                return
+            changed = np.concatenate(changes or [[]]).astype(np.intp)
+            self._online_logit = {
+                "best_worst": best_worst,
+                "params": result["params"],
+                "information": np.linalg.pinv(result["cov_params"]),
+                "estimated": answered,
+                "pending": changes,
+                "stale": bool(answered.ravel()[changed].any()),
+                "n_refit": result["n_questions"],
+                "n_incremental": 0,
+                "result": result,
+            }
+            self._multinomial_logit_model = self._multinomial_logit_results(
+                result, best_worst
+            )
+
+    # Fold the questions answered since the last update into the online
+    # logit with one Newton step, unless a refit is needed. Returns whether
+    # the model is up to date.
+    def _update_online_logit(self, best_worst: bool, refit_fraction: float) -> bool:
+        state = self._online_logit
+        if state is None or state["best_worst"] != best_worst or state["stale"]:
+            return False
+
+        keys = np.unique(np.concatenate(state["pending"] or [[]]).astype(np.intp))
+        state["pending"] = []
+        estimated = state["estimated"].ravel()
+        keys = keys[(self._highest.ravel()[keys] > 0) & ~estimated[keys]]
+        if keys.size == 0:
+            if self._multinomial_logit_model is None:
+                self._multinomial_logit_model = self._multinomial_logit_results(
+                    state["result"], best_worst
+                )
+            return True
+        if state["n_incremental"] + keys.size > refit_fraction * state["n_refit"]:
+            return False
+
+        params, information = update_maxdiff_logit(
+            state["params"],
+            state["information"],
+            self._choice_data(*np.divmod(keys, self.n_questions_per_participant)),
+            len(self.items),
+            best_worst=best_worst,
+        )
+        estimated[keys] = True
+        state["params"], state["information"] = params, information
+        state["n_incremental"] += keys.size
+
+        cov_params = np.linalg.pinv(information)
+        bse = np.sqrt(np.diag(cov_params))
+        # Utilities without a standard error keep none until the next refit
+        bse[np.isnan(state["result"]["bse"]) | (np.diag(information) == 0)] = np.nan
+        result = {
+            "params": params,
+            "bse": bse,
+            "cov_params": cov_params,
+            "n_questions": state["n_refit"] + state["n_incremental"],
+            "n_incremental": state["n_incremental"],
+            "converged": state["result"]["converged"],
+        }
+        state["result"] = result
+        self._multinomial_logit_model = self._multinomial_logit_results(
+            result, best_worst
+        )
+        return True
+
+    # A multinomial logit fit together with the (rescaled) item utilities
+    def _multinomial_logit_results(self, result: dict, best_worst: bool) -> dict:
         # Calculate item utilities
-        item_utilities = np.squeeze(result.params)
+        item_utilities = result["params"]
         item_utilities = np.insert(
             item_utilities, 0, 0
         )  # add dropped item back in with a 0 utility (relative to the others)
@@ -339,12 +2892,317 @@ class MaxDiffSurvey:
         exp_item_utilities = np.exp(item_utilities)
         rescaled_item_utilities = exp_item_utilities / exp_item_utilities.sum()
 
-        self._multinomial_logit_model = {
+        return {
             "result": result,
+            "best_worst": best_worst,
             "item_utilities": item_utilities,
             "rescaled_item_utilities": rescaled_item_utilities,
         }
 
+    # Respondent-level bootstrap of the multinomial logit model (which is run
+    # first if needed), adding percentile intervals at confidence_level for
+    # the raw and rescaled item utilities. Refits start from the full-sample
+    # estimates and run in a process pool when n_jobs > 1. As with
+    # run_multinomial_logit, intervals of responses that changed meanwhile
+    # are only cached.
+    def bootstrap_multinomial_logit(
+        self,
+        n_bootstrap: int = 1000,
+        confidence_level: float = 0.95,
+        n_jobs: int = 1,
+        callback: Callable[[dict], None] | None = None,
+    ):
+        if self._multinomial_logit_model is None:
+            self.run_multinomial_logit(callback=callback)
+        with self._responses_lock:
+            model = self._multinomial_logit_model
+            if model is None:
+                return
+            generation = self._response_generation
+            choice_data = self.get_choice_data()
+            fingerprint = self.get_response_fingerprint()
+
+        def bootstrap():
+            draws = bootstrap_maxdiff_logit(
+                choice_data,
+                len(self.items),
+                best_worst=model["best_worst"],
+                n_bootstrap=n_bootstrap,
+                start_params=model["result"]["params"],
+                n_jobs=n_jobs,
+                seed=self.seed,
+                callback=callback,
+            )
+            item_utility_draws = pd.DataFrame(
+                np.column_stack([np.zeros(n_bootstrap), draws]),
+                columns=self._items_dict.keys(),
+            )
+            exp_item_utility_draws = np.exp(item_utility_draws)
+            rescaled_item_utility_draws = exp_item_utility_draws.div(
+                exp_item_utility_draws.sum(axis=1), axis=0
+            )
+
+            alpha = (1 - confidence_level) / 2
+
+            def percentile_intervals(draws):
+                intervals = draws.quantile([alpha, 1 - alpha]).T
+                intervals.columns = ["lower", "upper"]
+                return intervals
+
+            return {
+                "n_bootstrap": n_bootstrap,
+                "confidence_level": confidence_level,
+                "item_utility_draws": item_utility_draws,
+                "item_utilities": percentile_intervals(item_utility_draws),
+                "rescaled_item_utilities": percentile_intervals(
+                    rescaled_item_utility_draws
+                ),
+            }
+
+        result = self._cached_result(
+            "bootstrap",
+            {
+                "best_worst": model["best_worst"],
+                "n_bootstrap": n_bootstrap,
+                "confidence_level": confidence_level,
+            },
+            bootstrap,
+            fingerprint,
+        )
+        with self._responses_lock:
+            if self._response_generation == generation:
+                model["bootstrap"] = result
+
+    # Fit a hierarchical Bayes model for individual-level utilities.
+    # Chains run in a process pool when n_jobs > 1.
+    def run_hierarchical_bayes(
+        self,
+        best_worst: bool = False,
+        n_iterations: int = 4000,
+        n_burn: int = 2000,
+        n_chains: int = 1,
+        n_jobs: int = 1,
+        callback: Callable[[dict], None] | None = None,
+    ):
+        def fit():
+            result = fit_hierarchical_bayes(
+                self.get_choice_data(),
+                len(self.items),
+                best_worst=best_worst,
+                n_iterations=n_iterations,
+                n_burn=n_burn,
+                n_chains=n_chains,
+                n_jobs=n_jobs,
+                seed=self.seed,
+                callback=callback,
+            )
+
+            # Respondent x item utility matrix, the first item is the reference
+            # with a utility of 0
+            n_respondents = len(result["participant_ids"])
+            individual_utilities = pd.DataFrame(
+                np.column_stack([np.zeros(n_respondents), result["beta_mean"]]),
+                index=pd.Index(result["participant_ids"], name="participant_id"),
+                columns=self._items_dict.keys(),
+            )
+            exp_individual_utilities = np.exp(individual_utilities)
+            rescaled_individual_utilities = exp_individual_utilities.div(
+                exp_individual_utilities.sum(axis=1), axis=0
+            )
+
+            diagnostics = result["diagnostics"]
+            diagnostics["rhat_mu"] = pd.Series(
+                diagnostics["rhat_mu"], index=list(self._items_dict.keys())[1:]
+            )
+            diagnostics["max_rhat"] = diagnostics["rhat_mu"].max()
+
+            return {
+                "result": result,
+                "best_worst": best_worst,
+                "individual_utilities": individual_utilities,
+                "rescaled_individual_utilities": rescaled_individual_utilities,
+                "mean_utilities": pd.Series(
+                    np.insert(result["mu_mean"], 0, 0), index=self._items_dict.keys()
+                ),
+                "diagnostics": diagnostics,
+            }
+
+        self._hierarchical_bayes_model = self._cached_result(
+            "hierarchical_bayes",
+            {
+                "best_worst": best_worst,
+                "n_iterations": n_iterations,
+                "n_burn": n_burn,
+                "n_chains": n_chains,
+            },
+            fit,
+        )
+
+    # Fit separate multinomial logit models for the segments defined by the
+    # respondent attribute column(s) in by, all in one batched computation
+    # (see fit_segmented_logit) or spread over n_jobs processes. Utilities of
+    # segments without answered questions are missing.
+    def run_segmented(
+        self, by: str | list[str], best_worst: bool = False, n_jobs: int = 1
+    ):
+        codes, labels = self._segments(by)
+        n_items = len(self.items)
+
+        def fit():
+            choice_data = self.get_choice_data()
+            segment = codes[choice_data.respondent - 1]
+            in_segment = segment >= 0
+            result = fit_segmented_logit(
+                ChoiceData(*(field[in_segment] for field in choice_data)),
+                segment[in_segment],
+                len(labels),
+                n_items,
+                best_worst=best_worst,
+                n_jobs=n_jobs,
+            )
+
+            # Segment x item utility matrices, the first item is the reference
+            # with a utility of 0
+            has_data = result["n_questions"] > 0
+            item_utilities = pd.DataFrame(
+                np.column_stack([np.zeros(len(labels)), result["params"]]),
+                index=labels,
+                columns=self._items_dict.keys(),
+            )
+            item_utilities[~has_data] = np.nan
+            exp_item_utilities = np.exp(item_utilities)
+            rescaled_item_utilities = exp_item_utilities.div(
+                exp_item_utilities.sum(axis=1), axis=0
+            )
+            standard_errors = pd.DataFrame(
+                result["bse"],
+                index=labels,
+                columns=list(self._items_dict.keys())[1:],
+            )
+            standard_errors[~has_data] = np.nan
+
+            return {
+                "result": result,
+                "by": list(labels.names),
+                "best_worst": best_worst,
+                "item_utilities": item_utilities,
+                "rescaled_item_utilities": rescaled_item_utilities,
+                "standard_errors": standard_errors,
+                "n_respondents": pd.Series(
+                    np.bincount(codes[codes >= 0], minlength=len(labels)),
+                    index=labels,
+                    name="n_respondents",
+                ),
+                "n_questions": pd.Series(
+                    result["n_questions"], index=labels, name="n_questions"
+                ),
+            }
+
+        # The segment assignment is not part of the response fingerprint
+        segments = hashlib.blake2b(codes.tobytes(), digest_size=16)
+        segments.update(repr(labels.tolist()).encode())
+        self._segmented_model = self._cached_result(
+            "segmented",
+            {"segments": segments.hexdigest(), "best_worst": best_worst},
+            fit,
+        )
+
+    # Fit a latent class multinomial logit model with n_classes classes (see
+    # fit_latent_class_logit). Random starts run in a process pool when
+    # n_jobs > 1.
+    def run_latent_class(
+        self,
+        n_classes: int,
+        best_worst: bool = False,
+        n_starts: int = 5,
+        n_jobs: int = 1,
+        callback: Callable[[dict], None] | None = None,
+    ):
+        self._latent_class_model = self._latent_class_results(
+            n_classes, best_worst, n_starts, n_jobs, callback
+        )
+
+    # Log-likelihood, AIC and BIC of latent class models with each number of
+    # classes in class_counts, for choosing the number of classes
+    def compare_latent_classes(
+        self,
+        class_counts: tuple[int, ...] = (1, 2, 3, 4, 5),
+        best_worst: bool = False,
+        n_starts: int = 5,
+        n_jobs: int = 1,
+        callback: Callable[[dict], None] | None = None,
+    ) -> pd.DataFrame:
+        rows = []
+        for n_classes in class_counts:
+            model = self._latent_class_results(
+                n_classes,
+                best_worst,
+                n_starts,
+                n_jobs,
+                _tagged_callback(callback, n_classes=n_classes),
+            )
+            rows.append({"n_classes": n_classes, **model["fit_statistics"]})
+        return pd.DataFrame(rows).set_index("n_classes")
+
+    def _latent_class_results(
+        self,
+        n_classes: int,
+        best_worst: bool,
+        n_starts: int,
+        n_jobs: int,
+        callback: Callable[[dict], None] | None = None,
+    ) -> dict:
+        def fit():
+            result = fit_latent_class_logit(
+                self.get_choice_data(),
+                len(self.items),
+                n_classes,
+                best_worst=best_worst,
+                n_starts=n_starts,
+                n_jobs=n_jobs,
+                seed=self.seed,
+                callback=callback,
+            )
+
+            # Class x item utility matrix, the first item is the reference
+            # with a utility of 0
+            classes = pd.Index(np.arange(1, n_classes + 1), name="class")
+            class_utilities = pd.DataFrame(
+                np.column_stack([np.zeros(n_classes), result["params"]]),
+                index=classes,
+                columns=self._items_dict.keys(),
+            )
+            exp_class_utilities = np.exp(class_utilities)
+            rescaled_class_utilities = exp_class_utilities.div(
+                exp_class_utilities.sum(axis=1), axis=0
+            )
+            membership = pd.DataFrame(
+                result["posterior"],
+                index=pd.Index(result["participant_ids"], name="participant_id"),
+                columns=classes,
+            )
+
+            return {
+                "result": result,
+                "best_worst": best_worst,
+                "class_sizes": pd.Series(
+                    result["class_sizes"], index=classes, name="class_size"
+                ),
+                "class_utilities": class_utilities,
+                "rescaled_class_utilities": rescaled_class_utilities,
+                "membership": membership,
+                "most_likely_class": membership.idxmax(axis=1).rename("class"),
+                "fit_statistics": {
+                    key: result[key] for key in ("llf", "n_params", "aic", "bic")
+                },
+            }
+
+        return self._cached_result(
+            "latent_class",
+            {"n_classes": n_classes, "best_worst": best_worst, "n_starts": n_starts},
+            fit,
+        )
+
     def plot_item_utilities(self):
         item_utilities = self._multinomial_logit_model["rescaled_item_utilities"]
         plot_data = pd.DataFrame(
@@ -352,7 +3210,24 @@ class MaxDiffSurvey:
                 "Item": [self._items_dict[i] for i in item_utilities.index],
                 "Utility": item_utilities.values * 100,  # Convert to percentage
             }
-        ).sort_values("Utility", ascending=True)
+        )
+
+        # Bootstrap intervals as error bars, if available
+        error_x = None
+        bootstrap = self._multinomial_logit_model.get("bootstrap")
+        if bootstrap is not None:
+            intervals = bootstrap["rescaled_item_utilities"]
+            plot_data["Lower"] = intervals["lower"].values * 100
+            plot_data["Upper"] = intervals["upper"].values * 100
+        plot_data = plot_data.sort_values("Utility", ascending=True)
+        if bootstrap is not None:
+            error_x = dict(
+                type="data",
+                symmetric=False,
+                array=plot_data["Upper"] - plot_data["Utility"],
+                arrayminus=plot_data["Utility"] - plot_data["Lower"],
+                color="black",
+            )
 
         # Create the horizontal bar chart
         fig = go.Figure()
@@ -363,6 +3238,7 @@ class MaxDiffSurvey:
                 orientation="h",
                 name="Utility",
                 marker_color="royalblue",
+                error_x=error_x,
                 text=[
                     f"{x:.1f}%" for x in plot_data["Utility"]
                 ],  # Add percentage labels
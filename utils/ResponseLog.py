@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+
+
+# Write a file through a temporary file that then atomically replaces it,
+# synced to disk so that a crash leaves either the old or the new version
+def replace_file(file: str, write: Callable):
+    with open(f"{file}.tmp", "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{file}.tmp", file)
+
+
+# Response log files start with a header identifying the survey size and
+# then hold fixed-width records: the flat (participant x question) index of
+# a changed question, its new (lowest, highest) choices and a checksum of
+# the three, so that a torn or zero-filled tail is detected on replay
+_LOG_MAGIC = b"MAXDIFF-LOG1"
+_LOG_HEADER = np.dtype(
+    [("magic", "S12"), ("n_participants", "<u4"), ("n_questions", "<u4")]
+)
+_LOG_RECORD = np.dtype(
+    [("key", "<u4"), ("lowest", "<i2"), ("highest", "<i2"), ("check", "<u4")]
+)
+
+
+def _log_checksums(
+    key: np.ndarray, lowest: np.ndarray, highest: np.ndarray
+) -> np.ndarray:
+    choices = (lowest.astype(np.uint16).astype(np.uint32) << 16) | highest.astype(
+        np.uint16
+    )
+    return (
+        (key.astype(np.uint32) * np.uint32(0x9E3779B1))
+        ^ choices
+        ^ np.uint32(0xA5A5A5A5)
+    )
+
+
+def log_file(path: str, generation: int) -> str:
+    return os.path.join(path, f"responses.{generation}.log")
+
+
+# Generations of the response logs in a survey directory, in ascending order
+def log_generations(path: str) -> list[int]:
+    generations = []
+    for name in os.listdir(path):
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "responses" and parts[2] == "log":
+            if parts[1].isdigit():
+                generations.append(int(parts[1]))
+    return sorted(generations)
+
+
+# Valid records of a response log, up to the first torn or corrupt one.
+# shape is the (n_participants, n_questions_per_participant) of the survey.
+def read_response_log(file: str, shape: tuple[int, int]) -> np.ndarray:
+    data = np.fromfile(file, dtype=np.uint8)
+    if len(data) < _LOG_HEADER.itemsize:
+        return np.empty(0, dtype=_LOG_RECORD)
+    header = data[: _LOG_HEADER.itemsize].view(_LOG_HEADER)[0]
+    if header["magic"] != _LOG_MAGIC:
+        raise ValueError(f"{file} is not a response log")
+    if (header["n_participants"], header["n_questions"]) != shape:
+        raise ValueError(f"{file} is the response log of a survey of another size")
+
+    body = data[_LOG_HEADER.itemsize :]
+    n_records = len(body) // _LOG_RECORD.itemsize
+    records = body[: n_records * _LOG_RECORD.itemsize].view(_LOG_RECORD)
+    valid = (
+        records["check"]
+        == _log_checksums(records["key"], records["lowest"], records["highest"])
+    ) & (records["key"] < shape[0] * shape[1])
+    return records if valid.all() else records[: np.argmin(valid)]
+
+
+# Append-only log of response changes for a survey saved in path, written
+# to responses.{generation}.log. Records go straight to the operating
+# system, so a crash of the process loses nothing, while fsync is batched:
+# after sync_bytes unsynced bytes or every sync_interval seconds (so a
+# power failure loses at most that much). rotate continues in a new
+# generation, e.g. to fold the previous ones into a snapshot.
+class ResponseLog:
+    def __init__(
+        self,
+        path: str,
+        generation: int,
+        shape: tuple[int, int],
+        sync_interval: float,
+        sync_bytes: int,
+        compact_bytes: int,
+    ):
+        self.path = path
+        self.generation = generation
+        self.compact_bytes = compact_bytes
+        self.size = 0
+        self.compaction: Future | None = None
+        self._shape = shape
+        self._sync_interval = sync_interval
+        self._sync_bytes = sync_bytes
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._fd = self._create()
+        self._compactor = ThreadPoolExecutor(max_workers=1)
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_periodically, daemon=True)
+        self._syncer.start()
+
+    def _create(self) -> int:
+        header = np.array([(_LOG_MAGIC, *self._shape)], dtype=_LOG_HEADER)
+        fd = os.open(
+            log_file(self.path, self.generation),
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND,
+            0o644,
+        )
+        os.write(fd, header.tobytes())
+        os.fsync(fd)
+        # Make the new file itself durable
+        if os.name == "posix":
+            directory = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        return fd
+
+    # Log new (lowest, highest) choices of the questions with the given flat
+    # indices
+    def append(
+        self,
+        keys: np.ndarray,
+        lowest: int | np.ndarray,
+        highest: int | np.ndarray,
+    ):
+        records = np.empty(len(keys), dtype=_LOG_RECORD)
+        records["key"] = keys
+        records["lowest"] = lowest
+        records["highest"] = highest
+        records["check"] = _log_checksums(
+            records["key"], records["lowest"], records["highest"]
+        )
+        data = memoryview(records.tobytes())
+        with self._lock:
+            while data:
+                data = data[os.write(self._fd, data) :]
+            self.size += records.nbytes
+            self._unsynced += records.nbytes
+            if self._unsynced >= self._sync_bytes:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._unsynced = 0
+
+    def _sync_periodically(self):
+        while not self._closed.wait(self._sync_interval):
+            with self._lock:
+                if self._unsynced:
+                    self._sync()
+
+    def rotate(self):
+        with self._lock:
+            self._sync()
+            os.close(self._fd)
+            self.generation += 1
+            self.size = 0
+            self._fd = self._create()
+
+    # Run a compaction in the background, one at a time
+    def compact(self, compact: Callable):
+        self.compaction = self._compactor.submit(compact)
+
+    def wait_for_compaction(self):
+        if self.compaction is not None:
+            self.compaction.result()
+
+    def close(self):
+        self._closed.set()
+        self._syncer.join()
+        self._compactor.shutdown()
+        with self._lock:
+            self._sync()
+            os.close(self._fd)
+        self.wait_for_compaction()
+
+
+# Fold the response logs before generation into a snapshot: write the
+# response arrays, then record the generation in survey.json, then delete the
+# folded logs. Replaying a log sets absolute choices, so a crash at any point
+# in between still recovers the same responses.
+def write_response_snapshot(
+    path: str, generation: int, lowest: np.ndarray, highest: np.ndarray
+):
+    for name, values in (("lowest", lowest), ("highest", highest)):
+        replace_file(os.path.join(path, f"{name}.npy"), lambda f: np.save(f, values))
+
+    header_file = os.path.join(path, "survey.json")
+    with open(header_file) as f:
+        header = json.load(f)
+    header["log_generation"] = generation
+    replace_file(header_file, lambda f: f.write(json.dumps(header, indent=2).encode()))
+
+    for old in log_generations(path):
+        if old < generation:
+            os.remove(log_file(path, old))
@@ -0,0 +1,17 @@
+import streamlit as st
+from utils.FitService import FitService
+from utils.SharedStore import SharedStore
+
+
+# Designs, choice data and model results of surveys, keyed by survey ID and
+# response fingerprint, so that all browser sessions viewing the same study
+# reuse them
+@st.cache_resource
+def get_shared_store() -> SharedStore:
+    return SharedStore(max_bytes=1 << 30)
+
+
+# One pool of fitting threads for all sessions
+@st.cache_resource
+def get_fit_service() -> FitService:
+    return FitService()
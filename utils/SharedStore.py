@@ -0,0 +1,100 @@
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+
+# Approximate memory use of a stored value in bytes
+def _value_size(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_value_size(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_value_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# Values shared between surveys, e.g. by all sessions of an app: designs by
+# survey ID, and choice data and model results by survey ID and response
+# fingerprint (see the shared_store argument of MaxDiffSurvey), so that
+# surveys with the same setup and responses build each of them only once.
+# Stored values must not be modified. The least recently used values are
+# evicted once the stored values take up more than max_bytes. A value that
+# is requested while it is being computed is not computed again: the caller
+# waits for the running computation (and computes it itself if that fails).
+class SharedStore:
+    def __init__(self, max_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self._values = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._pending = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute: Callable):
+        while True:
+            with self._lock:
+                if key in self._values:
+                    self._values.move_to_end(key)
+                    self._hits += 1
+                    return self._values[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = Future()
+                    self._misses += 1
+                    break
+                self._hits += 1
+            try:
+                return pending.result()
+            except Exception:
+                continue
+
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(error)
+            raise
+        with self._lock:
+            del self._pending[key]
+            self._store(key, value)
+        pending.set_result(value)
+        return value
+
+    def _store(self, key, value):
+        size = _value_size(value)
+        if size > self.max_bytes:
+            return
+        self._values[key] = value
+        self._sizes[key] = size
+        self._size += size
+        while self._size > self.max_bytes:
+            evicted, _ = self._values.popitem(last=False)
+            self._size -= self._sizes.pop(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    # Number and size of the stored values, with the number of lookups that
+    # found a value (or a running computation) and that computed one
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "n_values": len(self._values),
+                "size": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }